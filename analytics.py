@@ -0,0 +1,59 @@
+import json
+import logging
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional, Tuple
+
+PLAUSIBLE_SRC = "https://plausible.io/js/pa-A5dsGG_WKzf8v3a7hqgyH.js"
+
+def _js_literal(valor: Any) -> str:
+    # JSON é JavaScript válido; escapar <, > e & impede fechar a tag <script> pelo valor
+    return json.dumps(valor, ensure_ascii=False).replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
+class EventBuffer:
+    # Acumula os eventos de uma execução do script para enviá-los num único componente
+    def __init__(self, log: Optional["ServerEventLog"] = None):
+        self.events: List[Tuple[str, Dict[str, str]]] = []
+        self.log = log
+
+    def track(self, event_name: str, props: Optional[Dict[str, Any]] = None) -> None:
+        props = {str(k): str(v) for k, v in (props or {}).items()}
+        self.events.append((event_name, props))
+        if self.log is not None:
+            self.log.write(event_name, props)
+
+    def render_html(self, carregar_script: bool = True) -> str:
+        # O componente roda num iframe que some na execução seguinte: o script do Plausible vai para a
+        # janela do app, onde fica carregado pela sessão inteira, e as chamadas são feitas nela
+        chamadas = []
+        for nome, props in self.events:
+            args = _js_literal(nome) + (f", {{props: {_js_literal(props)}}}" if props else "")
+            chamadas.append(f"w.plausible({args});")
+        self.events = []
+        script = f"""
+      if(!w.plausible){{
+        w.plausible=function(){{(w.plausible.q=w.plausible.q||[]).push(arguments)}};w.plausible.init=function(i){{w.plausible.o=i||{{}}}};
+        var s=w.document.createElement("script");s.async=true;s.src={_js_literal(PLAUSIBLE_SRC)};w.document.head.appendChild(s);
+        w.plausible.init();
+      }}""" if carregar_script else ""
+        return f"""
+    <!-- Privacy-friendly analytics by Plausible -->
+    <script>
+      var w;try{{w=window.parent;w.document;}}catch(e){{w=window;}}{script}
+      if(w.plausible){{ {" ".join(chamadas)} }}
+    </script>
+    """
+
+class ServerEventLog:
+    # Grava eventos em JSON Lines com rotação de arquivo, para agregação offline
+    def __init__(self, path: str, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5):
+        self._logger = logging.getLogger(f"analytics.{path}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+
+    def write(self, event_name: str, props: Dict[str, str]) -> None:
+        self._logger.info(json.dumps({"ts": time.time(), "event": event_name, "props": props}, ensure_ascii=False))
@@ -0,0 +1,220 @@
+import argparse
+import json
+import math
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Tuple
+import numpy as np
+from batch import ALERTAS_ERRO, INPUT_COLUMNS, RATE_COLUMNS, SCENARIO_COLUMNS, alert_messages, validate_inputs_batch
+from regimes import REGIMES, compute_regime_batch
+from utils import COMPARISON_METRICS, comparison_columns, compute_scenario, generate_summary_text, validate_inputs
+
+MAX_BODY = 64 * 1024 * 1024
+TAXAS_PADRAO = {"aliquota_irpj_csll": 0.34, "limite_dividendos_pf": 50_000.0, "aliquota_irrf_dividendos": 0.10}
+
+class APIError(Exception):
+    def __init__(self, mensagem: str, status: int = 400):
+        super().__init__(mensagem)
+        self.status = status
+
+def _numero(dados: Dict[str, Any], chave: str, padrao: Any = None) -> float:
+    valor = dados.get(chave, padrao)
+    if valor is None:
+        raise APIError(f"Campo obrigatório ausente: {chave}")
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise APIError(f"Campo numérico inválido: {chave}")
+    # Inteiros do JSON não têm limite: os grandes demais para um float também são inválidos
+    try:
+        valor = float(valor)
+    except OverflowError:
+        raise APIError(f"Campo numérico inválido: {chave}")
+    if not math.isfinite(valor):
+        raise APIError(f"Campo numérico inválido: {chave}")
+    return valor
+
+def _taxas(dados: Dict[str, Any]) -> Dict[str, float]:
+    return {k: _numero(dados, k, v) for k, v in TAXAS_PADRAO.items()}
+
+def _cenario(dados: Any) -> Dict[str, float]:
+    if not isinstance(dados, dict):
+        raise APIError("Cenário deve ser um objeto JSON")
+    return compute_scenario(_numero(dados, "faturamento"), _numero(dados, "despesas"), _numero(dados, "pro_labore"), _numero(dados, "dividendos_total"), _numero(dados, "num_pf", 1), **_taxas(dados)).to_dict()
+
+def handle_validate(dados: Dict[str, Any]) -> Dict[str, Any]:
+    entradas = [_numero(dados, k) for k in ("faturamento", "despesas", "pro_labore", "dividendos_total")]
+    valido, mensagem = validate_inputs(*entradas)
+    return {"valido": valido, "mensagem": mensagem, "codigo_alertas": int(validate_inputs_batch(*entradas))}
+
+def handle_scenario(dados: Dict[str, Any]) -> Dict[str, Any]:
+    return _cenario(dados)
+
+def _par(dados: Dict[str, Any]) -> Tuple[Dict[str, float], Dict[str, float]]:
+    # atual/otimizado herdam num_pf e as taxas do nível de cima quando não informados
+    comuns = {k: dados[k] for k in ("num_pf", *TAXAS_PADRAO) if k in dados}
+    cenarios = []
+    for chave in ("atual", "otimizado"):
+        cenario = dados.get(chave, {})
+        if not isinstance(cenario, dict):
+            raise APIError(f"Campo '{chave}' deve ser um objeto JSON")
+        cenarios.append(_cenario({**comuns, **cenario}))
+    return cenarios[0], cenarios[1]
+
+def handle_summary(dados: Dict[str, Any]) -> Dict[str, Any]:
+    atual, otimizado = _par(dados)
+    economia_mensal = atual["total_impostos"] - otimizado["total_impostos"]
+    texto = generate_summary_text(atual, otimizado, economia_mensal, economia_mensal * 12, int(_numero(dados, "num_pf", 1)), _numero(dados, "limite_dividendos_pf", TAXAS_PADRAO["limite_dividendos_pf"]))
+    return {"texto": texto, "economia_mensal": economia_mensal, "economia_anual": economia_mensal * 12}
+
+def handle_comparison(dados: Dict[str, Any]) -> Dict[str, Any]:
+    coluna_atual, coluna_otimizada = comparison_columns(*_par(dados))
+    return {"linhas": [{"Métrica": m, "Cenário Atual": a, "Cenário Otimizado": o} for m, a, o in zip(COMPARISON_METRICS, coluna_atual, coluna_otimizada)]}
+
+def _coluna_json(valores: np.ndarray) -> list:
+    # NaN e infinito não existem em JSON: viram null na própria célula
+    if valores.dtype.kind != "f" or np.isfinite(valores).all():
+        return valores.tolist()
+    return np.where(np.isfinite(valores), valores, None).tolist()
+
+def _colunas_da_lista(cenarios: list) -> Dict[str, list]:
+    # Lista de cenários vira colunas; todos com as mesmas chaves, já que uma chave ausente viraria NaN
+    if not cenarios:
+        return {}
+    if not all(isinstance(c, dict) for c in cenarios):
+        raise APIError("Cada item de 'cenarios' deve ser um objeto JSON")
+    validas = (*INPUT_COLUMNS, *RATE_COLUMNS)
+    chaves = set(cenarios[0])
+    desconhecidas = sorted(chaves.difference(validas))
+    if desconhecidas:
+        raise APIError(f"Campos desconhecidos no cenário 0: {', '.join(desconhecidas)}")
+    for i, cenario in enumerate(cenarios):
+        if set(cenario) != chaves:
+            diferentes = sorted(chaves.symmetric_difference(cenario))
+            raise APIError(f"Cenário {i} com campos diferentes do primeiro: {', '.join(diferentes)}")
+    return {k: [c[k] for c in cenarios] for k in validas if k in chaves}
+
+def handle_bulk(dados: Dict[str, Any]) -> Dict[str, Any]:
+    # Formato colunar ({"faturamento": [...], ...}) para milhares de cenários num único cálculo vetorizado;
+    # taxas podem vir como escalar ou como lista por cenário
+    colunas = dados.get("cenarios")
+    regime = dados.get("regime", "Lucro Real")
+    if not isinstance(regime, str) or regime not in REGIMES:
+        raise APIError(f"Regime inválido: {regime}")
+    if isinstance(colunas, list):
+        colunas = _colunas_da_lista(colunas)
+    if not isinstance(colunas, dict):
+        raise APIError("Campo 'cenarios' deve ser um objeto de colunas ou uma lista de cenários")
+    entradas = {}
+    for chave in (*INPUT_COLUMNS, *RATE_COLUMNS):
+        padrao = TAXAS_PADRAO.get(chave, 1 if chave == "num_pf" else None)
+        valor = colunas.get(chave, dados.get(chave, padrao))
+        if valor is None:
+            raise APIError(f"Coluna obrigatória ausente: {chave}")
+        try:
+            entradas[chave] = np.asarray(valor, dtype=float)
+        except (TypeError, ValueError, OverflowError):
+            raise APIError(f"Coluna numérica inválida: {chave}")
+        if entradas[chave].ndim > 1:
+            raise APIError(f"Coluna deve ser uma lista de números: {chave}")
+        if not np.isfinite(entradas[chave]).all():
+            raise APIError(f"Coluna numérica inválida: {chave}")
+    try:
+        resultado = compute_regime_batch(regime, **entradas)
+    except ValueError:
+        raise APIError("Colunas com tamanhos diferentes")
+    n = resultado["faturamento"].size
+    # Acima do teto do Simples os valores do regime são NaN: null nessas células e a linha marcada
+    excede = np.broadcast_to(np.isnan(resultado["total_impostos"]), (n,))
+    # Alertas como códigos (bits ALERTA_*) sobre as entradas como vieram; os textos só quando pedidos
+    codigos = np.broadcast_to(validate_inputs_batch(*(entradas[k] for k in ("faturamento", "despesas", "pro_labore", "dividendos_total"))), (n,))
+    alertas = {"valido": ((codigos & ALERTAS_ERRO) == 0).tolist(), "codigo_alertas": codigos.tolist()}
+    if dados.get("mensagens"):
+        alertas["alertas"] = alert_messages(codigos).tolist()
+    return {"n": n, **{c: _coluna_json(np.broadcast_to(resultado[c], (n,))) for c in SCENARIO_COLUMNS}, "excede_limite": excede.tolist(), **alertas}
+
+ROTAS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {"/validate": handle_validate, "/scenario": handle_scenario, "/summary": handle_summary, "/comparison": handle_comparison, "/bulk": handle_bulk}
+
+class APIHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantém a conexão aberta entre requisições (keep-alive)
+    protocol_version = "HTTP/1.1"
+    server_version = "SimuladorReformaAPI/1.0"
+
+    def _responder(self, status: int, corpo: Dict[str, Any]) -> None:
+        dados = json.dumps(corpo, ensure_ascii=False, allow_nan=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._responder(200, {"status": "ok"})
+        else:
+            self._responder(404, {"erro": "Rota não encontrada"})
+
+    def do_POST(self) -> None:
+        # Sem um Content-Length válido não há como saber onde o corpo termina: responde e fecha a conexão
+        cabecalho = self.headers.get("Content-Length")
+        if cabecalho is None:
+            self.close_connection = True
+            self._responder(411, {"erro": "Cabeçalho Content-Length obrigatório"})
+            return
+        tamanho = int(cabecalho) if cabecalho.strip().isdigit() else -1
+        if tamanho < 0:
+            self.close_connection = True
+            self._responder(400, {"erro": "Cabeçalho Content-Length inválido"})
+            return
+        if tamanho > MAX_BODY:
+            self.close_connection = True
+            self._responder(413, {"erro": "Corpo da requisição muito grande"})
+            return
+        corpo = self.rfile.read(tamanho)
+        rota = ROTAS.get(self.path)
+        if rota is None:
+            self._responder(404, {"erro": "Rota não encontrada"})
+            return
+        try:
+            dados = json.loads(corpo or b"{}")
+            if not isinstance(dados, dict):
+                raise APIError("Corpo deve ser um objeto JSON")
+            self._responder(200, rota(dados))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._responder(400, {"erro": "JSON inválido"})
+        except APIError as e:
+            self._responder(e.status, {"erro": str(e)})
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class APIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    verbose = False
+
+def make_server(host: str = "127.0.0.1", port: int = 8502, verbose: bool = False) -> APIServer:
+    servidor = APIServer((host, port), APIHandler)
+    servidor.verbose = verbose
+    return servidor
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="API HTTP/JSON do Simulador Reforma Tributária")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--verbose", action="store_true", help="Registra cada requisição no stderr")
+    args = parser.parse_args(argv)
+    try:
+        servidor = make_server(args.host, args.port, args.verbose)
+    except OSError as e:
+        print(f"❌ Erro: {e}", file=sys.stderr)
+        return 1
+    print(f"✅ API em http://{args.host}:{servidor.server_address[1]}", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,14 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import matplotlib.pyplot as plt
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime
-from utils import compute_scenario, validate_inputs, generate_summary_text, create_comparison_table, format_currency_brl
+import numpy as np
+import os
+from utils import validate_inputs, generate_summary_text, comparison_column, format_currency_brl, format_currency_brl_array, COMPARISON_METRICS
+from optimizer import optimize_scenario
+from regimes import compute_scenario_regime, compare_regimes, REGIMES, REGIME_TAX_LABEL, PRESUNCAO
+from sensitivity import SensitivityCache
+from history import ScenarioStore, scenario_key
+from analytics import EventBuffer, ServerEventLog
+from timing import SessionStages, StageMetrics
 
 st.set_page_config(
     page_title="Simulador Reforma Tributária 2026",
@@ -14,504 +17,568 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Plausible Analytics
-components.html(
-    """
-    <!-- Privacy-friendly analytics by Plausible -->
-    <script async src="https://plausible.io/js/pa-A5dsGG_WKzf8v3a7hqgyH.js"></script>
-    <script>
-      window.plausible=window.plausible||function(){(plausible.q=plausible.q||[]).push(arguments)},plausible.init=plausible.init||function(i){plausible.o=i||{}};
-      plausible.init();
-      console.log('✅ Plausible Analytics inicializado');
-    </script>
-    """,
-    height=0,
-)
+# Plausible Analytics: eventos da execução são enviados juntos em um único componente
+@st.cache_resource
+def get_event_log():
+    path = os.environ.get("ANALYTICS_LOG")
+    return ServerEventLog(path) if path else None
+
+eventos = EventBuffer(get_event_log())
+
+# Um único envio por execução: no fim do script nas execuções completas e dentro do fragmento só
+# quando a execução é apenas dele. O script do Plausible vai no primeiro envio da sessão; depois,
+# execução sem evento não gera componente
+def flush_events():
+    carregado = st.session_state.get("plausible_carregado", False)
+    if carregado and not eventos.events:
+        return
+    components.html(eventos.render_html(carregar_script=not carregado), height=0)
+    st.session_state["plausible_carregado"] = True
+
+def flush_fragment_events():
+    if not st.session_state.get("execucao_completa"):
+        flush_events()
+
+def parar():
+    flush_events()
+    st.stop()
+
+# Fila de feedback: o envio por SMTP acontece em segundo plano. smtplib e os módulos MIME só
+# são carregados no primeiro envio, não a cada partida
+@st.cache_resource
+def get_feedback_queue():
+    from feedback_queue import FeedbackQueue, FeedbackWorker, SMTPConfig
+    queue = FeedbackQueue(os.environ.get("FEEDBACK_QUEUE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "feedback_queue.sqlite3")))
+    try:
+        email_cfg = st.secrets["email"]
+        config = SMTPConfig(email_cfg["smtp_server"], int(email_cfg["smtp_port"]), email_cfg["sender_email"], email_cfg["sender_password"], email_cfg["receiver_email"])
+    except (KeyError, FileNotFoundError):
+        return queue, None
+    worker = FeedbackWorker(queue, config)
+    worker.start()
+    return queue, worker
 
-# Função para enviar email
 def send_email(nome, email, cidade, profissao, sugestao):
     try:
-        smtp_server = st.secrets["email"]["smtp_server"]
-        smtp_port = st.secrets["email"]["smtp_port"]
-        sender_email = st.secrets["email"]["sender_email"]
-        sender_password = st.secrets["email"]["sender_password"]
-        receiver_email = st.secrets["email"]["receiver_email"]
-        
-        message = MIMEMultipart("alternative")
-        message["Subject"] = "Nova Sugestão - Simulador Reforma Tributária"
-        message["From"] = sender_email
-        message["To"] = receiver_email
-        
-        html = f"""
-        <html>
-          <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <h2 style="color: #1e3a5f;">💬 Nova Sugestão Recebida!</h2>
-            <hr style="border: 1px solid #e2e8f0;">
-            
-            <h3 style="color: #2c5282;">📋 Dados do Usuário</h3>
-            <table style="width: 100%; border-collapse: collapse;">
-              <tr>
-                <td style="padding: 8px; background: #f8fafc;"><strong>Nome:</strong></td>
-                <td style="padding: 8px;">{nome}</td>
-              </tr>
-              <tr>
-                <td style="padding: 8px; background: #f8fafc;"><strong>E-mail:</strong></td>
-                <td style="padding: 8px;">{email}</td>
-              </tr>
-              <tr>
-                <td style="padding: 8px; background: #f8fafc;"><strong>Cidade:</strong></td>
-                <td style="padding: 8px;">{cidade}</td>
-              </tr>
-              <tr>
-                <td style="padding: 8px; background: #f8fafc;"><strong>Profissão:</strong></td>
-                <td style="padding: 8px;">{profissao}</td>
-              </tr>
-            </table>
-            
-            <h3 style="color: #2c5282; margin-top: 20px;">💡 Sugestão/Feedback</h3>
-            <div style="background: #f0f9ff; border-left: 4px solid #1e3a5f; padding: 15px; margin: 10px 0;">
-              {sugestao.replace('\n', '<br>')}
-            </div>
-            
-            <hr style="border: 1px solid #e2e8f0; margin-top: 30px;">
-            <p style="color: #64748b; font-size: 0.9em;">
-              🤖 Enviado automaticamente pelo Simulador Reforma Tributária 2026<br>
-              📅 {datetime.now().strftime('%d/%m/%Y às %H:%M')}
-            </p>
-          </body>
-        </html>
-        """
-        
-        part = MIMEText(html, "html")
-        message.attach(part)
-        
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(message)
-        
-        return True, "Email enviado com sucesso!"
-    
+        queue, worker = get_feedback_queue()
+        queue.enqueue(nome, email, cidade, profissao, sugestao)
+        if worker is not None:
+            worker.notify()
+        return True, "Feedback registrado para envio!"
     except Exception as e:
-        return False, f"Erro ao enviar email: {str(e)}"
+        return False, f"Erro ao registrar feedback: {str(e)}"
+
+# Histórico de simulações: cenários já calculados voltam direto do SQLite
+@st.cache_resource
+def get_scenario_store():
+    return ScenarioStore(os.environ.get("SCENARIO_HISTORY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenario_history.sqlite3")))
 
 # Função para rastrear eventos customizados
 def track_event(event_name, props=None):
-    props_js = ""
-    if props:
-        props_items = [f"'{k}': '{v}'" for k, v in props.items()]
-        props_js = f", {{{', '.join(props_items)}}}"
-    
-    components.html(
-        f"""
-        <script>
-            if (window.plausible) {{
-                plausible('{event_name}'{props_js});
-                console.log('✅ Evento rastreado: {event_name}');
-            }}
-        </script>
-        """,
-        height=0,
-    )
-
-# CSS customizado
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    * {
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-    }
-    
-    .main {
-        background: linear-gradient(135deg, #f5f7fa 0%, #e8ecf1 100%);
-    }
-    
-    h1 {
-        color: #1e3a5f !important;
-        font-weight: 700 !important;
-        letter-spacing: -0.5px;
-        margin-bottom: 0.5rem !important;
-    }
-    
-    h2, h3 {
-        color: #2c5282 !important;
-        font-weight: 600 !important;
-        letter-spacing: -0.3px;
-    }
-    
-    .stButton>button {
-        background: linear-gradient(135deg, #1e3a5f 0%, #2c5282 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 0.75rem 2rem !important;
-        font-weight: 600 !important;
-        font-size: 1.1rem !important;
-        box-shadow: 0 4px 15px rgba(30, 58, 95, 0.3) !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(30, 58, 95, 0.4) !important;
-    }
-    
-    .stNumberInput>div>div>input {
-        border-radius: 10px !important;
-        border: 2px solid #e2e8f0 !important;
-        padding: 0.75rem !important;
-        font-size: 1rem !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stNumberInput>div>div>input:focus {
-        border-color: #1e3a5f !important;
-        box-shadow: 0 0 0 3px rgba(30, 58, 95, 0.1) !important;
-    }
-    
-    .stTextInput>div>div>input, .stTextArea>div>div>textarea {
-        border-radius: 10px !important;
-        border: 2px solid #e2e8f0 !important;
-        padding: 0.75rem !important;
-    }
-    
-    .stTextArea>div>div>textarea:focus {
-        border-color: #1e3a5f !important;
-        box-shadow: 0 0 0 3px rgba(30, 58, 95, 0.1) !important;
-    }
-    
-    .stSelectbox>div>div {
-        border-radius: 10px !important;
-        border: 2px solid #e2e8f0 !important;
-    }
-    
-    .stSlider>div>div>div>div {
-        background: linear-gradient(90deg, #1e3a5f 0%, #2c5282 100%) !important;
-    }
-    
-    div[data-testid="stMetricValue"] {
-        font-size: 1.8rem !important;
-        font-weight: 700 !important;
-        color: #1e3a5f !important;
-    }
-    
-    div[data-testid="stMetricLabel"] {
-        font-size: 0.9rem !important;
-        font-weight: 500 !important;
-        color: #64748b !important;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    
-    hr {
-        margin: 2rem 0;
-        border: none;
-        border-top: 2px solid #e2e8f0;
-    }
-    
-    .stDataFrame {
-        border-radius: 12px;
-        overflow: hidden;
-        box-shadow: 0 2px 12px rgba(0,0,0,0.08);
-    }
-    
-    .icon-text {
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-        font-weight: 600;
-        color: #1e3a5f;
-        font-size: 1.1rem;
-        margin-bottom: 0.5rem;
-    }
-    
-    .helper-text {
-        font-size: 0.85rem;
-        color: #64748b;
-        font-weight: 400;
-        margin-top: 0.25rem;
-        line-height: 1.4;
-    }
-    
-    .section-header {
-        background: linear-gradient(135deg, #ffffff 0%, #f8fafc 100%);
-        border-radius: 12px;
-        padding: 1.25rem 1.5rem;
-        margin-bottom: 1.5rem;
-        border-left: 4px solid #1e3a5f;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.06);
-    }
-    
-    .feedback-box {
-        background: linear-gradient(135deg, #ffffff 0%, #f0f9ff 100%);
-        border-radius: 16px;
-        padding: 2rem;
-        border: 2px solid #bae6fd;
-        box-shadow: 0 4px 16px rgba(30, 58, 95, 0.1);
-        margin-top: 2rem;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Header
-st.markdown("<h1>💰 Simulador Reforma Tributária 2026</h1>", unsafe_allow_html=True)
-st.markdown("<p style='color: #64748b; font-size: 1.1rem; margin-top: -0.5rem;'>Profissionais de Saúde</p>", unsafe_allow_html=True)
-st.markdown("<p style='color: #64748b; font-size: 0.95rem;'>Analise o impacto da <strong>nova tributação sobre dividendos</strong> (IRRF de 10% quando dividendos/mês por PF > R$ 50.000)</p>", unsafe_allow_html=True)
-
-st.divider()
-
-# Sidebar
-with st.sidebar:
-    st.markdown("<div class='section-header'><h2 style='margin:0; font-size:1.3rem;'>⚙️ Parâmetros Tributários</h2></div>", unsafe_allow_html=True)
-    
-    aliquota_irpj_csll = st.slider(
-        "Alíquota IRPJ + CSLL (%)",
-        0.0, 50.0, 34.0, 0.5,
-        help="Alíquota combinada de IRPJ e CSLL"
-    ) / 100
-    
-    limite_dividendos_pf = st.number_input(
-        "Limite Dividendos/mês por PF (R$)",
-        min_value=0.0,
-        value=50_000.0,
-        step=1_000.0,
-        help="Limite mensal antes de incidir IRRF"
-    )
-    
-    aliquota_irrf_dividendos = st.slider(
-        "Alíquota IRRF Dividendos (%)",
-        0.0, 30.0, 10.0, 0.5,
-        help="Alíquota do IRRF sobre dividendos excedentes"
-    ) / 100
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    st.caption("💡 Ajuste os parâmetros conforme a legislação vigente")
-
-# Conteúdo principal
-col1, col2 = st.columns(2)
-
-with col1:
-    st.markdown("<div class='section-header'><h3 style='margin:0;'>📋 Dados Básicos</h3></div>", unsafe_allow_html=True)
-    
-    regime = st.selectbox(
-        "Regime Tributário",
-        ["Lucro Real", "Lucro Presumido", "Simples Nacional"],
-        help="Selecione o regime fiscal da empresa"
-    )
-    
-    if regime != "Lucro Real":
-        st.warning(f"⚠️ **{regime}** em modo simplificado. Apenas Lucro Real tem cálculo completo.")
-        st.stop()
-    
-    municipio = st.text_input("Município", "São Paulo - SP")
-    
-    st.markdown("<div class='icon-text'>💵 Faturamento Mensal</div>", unsafe_allow_html=True)
-    faturamento_mensal = st.number_input(
-        "Faturamento (R$)",
-        0.0,
-        value=300_000.0,
-        step=10_000.0,
-        label_visibility="collapsed"
-    )
-    
-    st.markdown("<div class='icon-text'>👥 Número de Sócios PF</div>", unsafe_allow_html=True)
-    num_pf = st.number_input(
-        "Sócios",
-        1,
-        value=1,
-        step=1,
-        label_visibility="collapsed",
-        help="Pessoas físicas que recebem dividendos"
-    )
-
-with col2:
-    st.markdown("""
-    <div class='section-header'>
-        <h3 style='margin:0; margin-bottom: 0.5rem;'>📊 Cenário Atual</h3>
-        <p class='helper-text' style='margin:0;'>Como é feito o lançamento das despesas na PJ e a retirada para PF atualmente</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("<div class='icon-text'>💼 Despesas Operacionais Atuais</div>", unsafe_allow_html=True)
-    st.markdown("<p class='helper-text'>Despesas pagas e declaradas pela PJ</p>", unsafe_allow_html=True)
-    desp_atual = st.number_input("Despesas atuais (R$)", 0.0, value=50_000.0, step=5_000.0, key="da", label_visibility="collapsed")
-    
-    st.markdown("<div class='icon-text'>👔 Pró-labore Atual</div>", unsafe_allow_html=True)
-    st.markdown("<p class='helper-text'>Pró-labore declarado e pago oficialmente</p>", unsafe_allow_html=True)
-    pl_atual = st.number_input("Pró-labore atual (R$)", 0.0, value=15_000.0, step=1_000.0, key="pa", label_visibility="collapsed")
-    
-    st.markdown("<div class='icon-text'>💰 Dividendos Mensais Atuais</div>", unsafe_allow_html=True)
-    st.markdown("<p class='helper-text'>Transferência de lucros da PJ para PF</p>", unsafe_allow_html=True)
-    div_atual = st.number_input("Dividendos atuais (R$)", 0.0, value=150_000.0, step=5_000.0, key="di", label_visibility="collapsed")
-
-st.divider()
-
-st.markdown("""
-<div class='section-header'>
-    <h3 style='margin:0; margin-bottom: 0.5rem;'>🎯 Cenário Otimizado</h3>
-    <p class='helper-text' style='margin:0;'>Valores que ajustará para uma otimização da carga tributária</p>
-</div>
-""", unsafe_allow_html=True)
-
-c3, c4, c5 = st.columns(3)
-
-with c3:
-    st.markdown("<div class='icon-text'>💼 Despesas Otimizadas</div>", unsafe_allow_html=True)
-    st.markdown("<p class='helper-text'>Despesas pagas e declaradas pela PJ</p>", unsafe_allow_html=True)
-    desp_otim = st.number_input("Despesas otimizadas (R$)", 0.0, value=80_000.0, step=5_000.0, key="do", label_visibility="collapsed")
-
-with c4:
-    st.markdown("<div class='icon-text'>👔 Pró-labore Otimizado</div>", unsafe_allow_html=True)
-    st.markdown("<p class='helper-text'>Pró-labore declarado e pago oficialmente</p>", unsafe_allow_html=True)
-    pl_otim = st.number_input("Pró-labore otimizado (R$)", 0.0, value=15_000.0, step=1_000.0, key="po", label_visibility="collapsed")
-
-with c5:
-    st.markdown("<div class='icon-text'>💰 Dividendos Otimizados</div>", unsafe_allow_html=True)
-    st.markdown("<p class='helper-text'>Transferência de lucros da PJ para PF</p>", unsafe_allow_html=True)
-    div_otim = st.number_input("Dividendos otimizados (R$)", 0.0, value=130_000.0, step=5_000.0, key="divo", label_visibility="collapsed")
-
-st.divider()
-
-if st.button("🧮 Calcular Análise Comparativa", type="primary", use_container_width=True):
-    v1, m1 = validate_inputs(faturamento_mensal, desp_atual, pl_atual, div_atual)
-    v2, m2 = validate_inputs(faturamento_mensal, desp_otim, pl_otim, div_otim)
-    
-    if not v1 or not v2:
-        st.error(m1 or m2)
-        st.stop()
-    
-    if m1:
-        st.warning("**Cenário Atual:**\n" + m1)
-    if m2:
-        st.warning("**Cenário Otimizado:**\n" + m2)
-    
-    c_atual = compute_scenario(faturamento_mensal, desp_atual, pl_atual, div_atual, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
-    c_otim = compute_scenario(faturamento_mensal, desp_otim, pl_otim, div_otim, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
-    
-    eco_mensal = c_atual["total_impostos"] - c_otim["total_impostos"]
-    eco_anual = eco_mensal * 12
-    
-    # Rastrear evento de simulação
-    track_event('Simulação Calculada', {
-        'economia_mensal': int(eco_mensal),
-        'num_socios': num_pf
-    })
-    
+    eventos.track(event_name, props)
+
+# Tempo por etapa: desligado por padrão (STAGE_TIMING=1 liga na partida); o painel ?debug=1 alterna em tempo
+# real, só para a própria sessão
+@st.cache_resource
+def get_stage_metrics():
+    return StageMetrics(enabled=os.environ.get("STAGE_TIMING") == "1")
+
+medicoes = get_stage_metrics()
+etapas_sessao = st.session_state.setdefault("etapas_sessao", SessionStages())
+st.session_state.setdefault("medir_etapas", medicoes.enabled)
+
+def etapa(nome):
+    return medicoes.stage(nome, etapas_sessao, st.session_state["medir_etapas"])
+
+# A marca da execução completa é desfeita no fim do script mesmo quando ele para ou falha
+st.session_state["execucao_completa"] = True
+try:
+    # CSS servido como arquivo estático (.streamlit/config.toml: enableStaticServing); o
+    # navegador guarda em cache e cada execução envia só a tag <link>
+    with etapa("css"):
+        st.markdown("<link rel='stylesheet' href='app/static/app.css'>", unsafe_allow_html=True)
+
+    # Header
+    st.markdown("<h1>💰 Simulador Reforma Tributária 2026</h1>", unsafe_allow_html=True)
+    st.markdown("<p style='color: #64748b; font-size: 1.1rem; margin-top: -0.5rem;'>Profissionais de Saúde</p>", unsafe_allow_html=True)
+    st.markdown("<p style='color: #64748b; font-size: 0.95rem;'>Analise o impacto da <strong>nova tributação sobre dividendos</strong> (IRRF de 10% quando dividendos/mês por PF > R$ 50.000)</p>", unsafe_allow_html=True)
+
     st.divider()
-    st.markdown("<div class='section-header'><h2 style='margin:0;'>📈 Indicadores-Chave (KPIs)</h2></div>", unsafe_allow_html=True)
-    
-    k1, k2, k3, k4, k5 = st.columns(5)
-    k1.metric("💸 Impostos Atual", format_currency_brl(c_atual["total_impostos"]))
-    k2.metric("✨ Impostos Otimizado", format_currency_brl(c_otim["total_impostos"]))
-    k3.metric("💰 Economia Mensal", format_currency_brl(eco_mensal))
-    k4.metric("🎯 Economia Anual", format_currency_brl(eco_anual))
-    red = (eco_mensal/c_atual["total_impostos"]*100) if c_atual["total_impostos"]>0 else 0
-    k5.metric("📊 Redução", f"{red:.1f}%")
+
+    # Valores iniciais dos campos; ficam no session_state para o histórico poder substituí-los
+    VALORES_INICIAIS = {"aliq_irpj_csll": 34.0, "limite_div": 50_000.0, "aliq_irrf": 10.0, "regime": "Lucro Real", "cliente": "", "fat": 300_000.0, "npf": 1, "da": 50_000.0, "pa": 15_000.0, "di": 150_000.0, "auto": True, "do": 80_000.0, "po": 15_000.0, "divo": 130_000.0, "atividade": "servicos", "folha": 0.0}
+    for chave, valor in VALORES_INICIAIS.items():
+        st.session_state.setdefault(chave, valor)
+
+    # Sidebar
+    with st.sidebar:
+        st.markdown("<div class='section-header'><h2 style='margin:0; font-size:1.3rem;'>⚙️ Parâmetros Tributários</h2></div>", unsafe_allow_html=True)
+    
+        aliquota_irpj_csll = st.slider(
+            "Alíquota IRPJ + CSLL (%)",
+            0.0, 50.0,
+            step=0.5,
+            key="aliq_irpj_csll",
+            help="Alíquota combinada de IRPJ e CSLL"
+        ) / 100
+    
+        limite_dividendos_pf = st.number_input(
+            "Limite Dividendos/mês por PF (R$)",
+            min_value=0.0,
+            step=1_000.0,
+            key="limite_div",
+            help="Limite mensal antes de incidir IRRF"
+        )
+    
+        aliquota_irrf_dividendos = st.slider(
+            "Alíquota IRRF Dividendos (%)",
+            0.0, 30.0,
+            step=0.5,
+            key="aliq_irrf",
+            help="Alíquota do IRRF sobre dividendos excedentes"
+        ) / 100
+    
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.caption("💡 Ajuste os parâmetros conforme a legislação vigente")
+
+    # Conteúdo principal
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("<div class='section-header'><h3 style='margin:0;'>📋 Dados Básicos</h3></div>", unsafe_allow_html=True)
+    
+        regime = st.selectbox(
+            "Regime Tributário",
+            list(REGIMES),
+            key="regime",
+            help="Selecione o regime fiscal da empresa"
+        )
+    
+        atividade = "servicos"
+        folha_mensal = 0.0
+        if regime == "Lucro Presumido":
+            atividade = st.selectbox(
+                "Atividade",
+                list(PRESUNCAO),
+                format_func=lambda a: {"servicos": "Serviços em geral (presunção de 32%)", "servicos_hospitalares": "Serviços hospitalares (presunção de 8% IRPJ / 12% CSLL)"}[a],
+                key="atividade",
+                help="Define os percentuais de presunção do lucro"
+            )
+        elif regime == "Simples Nacional":
+            folha_mensal = st.number_input(
+                "Folha de salários mensal além do pró-labore (R$)",
+                0.0,
+                step=1_000.0,
+                key="folha",
+                help="Entra no Fator R: com folha (incluindo pró-labore) de pelo menos 28% do faturamento a tributação segue o Anexo III; abaixo disso, o Anexo V"
+            )
     
+        municipio = st.text_input("Município", "São Paulo - SP")
+        cliente = st.text_input("Cliente", key="cliente", help="Identifica a simulação no histórico")
+    
+        st.markdown("<div class='icon-text'>💵 Faturamento Mensal</div>", unsafe_allow_html=True)
+        faturamento_mensal = st.number_input(
+            "Faturamento (R$)",
+            0.0,
+            step=10_000.0,
+            key="fat",
+            label_visibility="collapsed"
+        )
+    
+        st.markdown("<div class='icon-text'>👥 Número de Sócios PF</div>", unsafe_allow_html=True)
+        num_pf = st.number_input(
+            "Sócios",
+            1,
+            step=1,
+            key="npf",
+            label_visibility="collapsed",
+            help="Pessoas físicas que recebem dividendos"
+        )
+
+    with col2:
+        st.markdown("""
+        <div class='section-header'>
+            <h3 style='margin:0; margin-bottom: 0.5rem;'>📊 Cenário Atual</h3>
+            <p class='helper-text' style='margin:0;'>Como é feito o lançamento das despesas na PJ e a retirada para PF atualmente</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+        st.markdown("<div class='icon-text'>💼 Despesas Operacionais Atuais</div>", unsafe_allow_html=True)
+        st.markdown("<p class='helper-text'>Despesas pagas e declaradas pela PJ</p>", unsafe_allow_html=True)
+        desp_atual = st.number_input("Despesas atuais (R$)", 0.0, step=5_000.0, key="da", label_visibility="collapsed")
+    
+        st.markdown("<div class='icon-text'>👔 Pró-labore Atual</div>", unsafe_allow_html=True)
+        st.markdown("<p class='helper-text'>Pró-labore declarado e pago oficialmente</p>", unsafe_allow_html=True)
+        pl_atual = st.number_input("Pró-labore atual (R$)", 0.0, step=1_000.0, key="pa", label_visibility="collapsed")
+    
+        st.markdown("<div class='icon-text'>💰 Dividendos Mensais Atuais</div>", unsafe_allow_html=True)
+        st.markdown("<p class='helper-text'>Transferência de lucros da PJ para PF</p>", unsafe_allow_html=True)
+        div_atual = st.number_input("Dividendos atuais (R$)", 0.0, step=5_000.0, key="di", label_visibility="collapsed")
+
     st.divider()
-    st.markdown(generate_summary_text(c_atual, c_otim, eco_mensal, eco_anual, num_pf, limite_dividendos_pf))
-    
+
+    # Cálculos memorizados: uma edição reaproveita tudo o que não mudou
+    @st.cache_data(show_spinner=False, max_entries=1_000)
+    def cached_validate_inputs(faturamento, despesas, pro_labore, dividendos_total):
+        return validate_inputs(faturamento, despesas, pro_labore, dividendos_total)
+
+    def opcoes_regime(regime, atividade, folha_mensal, pro_labore):
+        if regime == "Lucro Presumido":
+            return {"atividade": atividade}
+        if regime == "Simples Nacional":
+            return {"folha_12m": (pro_labore + folha_mensal) * 12}
+        return {}
+
+    @st.cache_data(show_spinner=False, max_entries=1_000)
+    def cached_compute_scenario(faturamento, despesas, pro_labore, dividendos_total, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, regime="Lucro Real", atividade="servicos", folha_mensal=0.0):
+        # Devolve (chave no histórico, resultado) sem tocar no SQLite: a gravação fica com quem registra a execução
+        opcoes = opcoes_regime(regime, atividade, folha_mensal, pro_labore)
+        chave = scenario_key(regime, (faturamento, despesas, pro_labore, dividendos_total, num_pf), (aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos), opcoes)
+        return chave, compute_scenario_regime(regime, faturamento, despesas, pro_labore, dividendos_total, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, **opcoes)
+
+    @st.cache_data(show_spinner=False, max_entries=100)
+    def cached_regime_comparison(faturamento, cenarios, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, atividade, folha_mensal):
+        import pandas as pd
+        df = pd.DataFrame([{"faturamento": faturamento, "despesas": d, "pro_labore": p, "dividendos_total": v, "num_pf": num_pf, "folha_12m": (p + folha_mensal) * 12} for d, p, v in cenarios])
+        return compare_regimes(df, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, atividade)
+
+    @st.cache_data(show_spinner=False, max_entries=1_000)
+    def cached_optimize_scenario(faturamento, num_pf, retirada_total, desp_max, pl_min_ratio, pl_max, div_max, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos):
+        return optimize_scenario(faturamento, num_pf, retirada_total, desp_max, pl_min_ratio=pl_min_ratio, pl_max=pl_max, div_max=div_max, aliquota_irpj_csll=aliquota_irpj_csll, limite_dividendos_pf=limite_dividendos_pf, aliquota_irrf_dividendos=aliquota_irrf_dividendos)
+
+    @st.cache_data(show_spinner=False, max_entries=1_000)
+    def cached_comparison_column(cenario):
+        return comparison_column(cenario)
+
+    @st.cache_data(show_spinner=False, max_entries=100)
+    def cached_sensitivity_png(fat_min, fat_max, div_min, div_max, despesas, pro_labore, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos):
+        faturamentos = np.linspace(fat_min * 1_000, fat_max * 1_000, 200)
+        dividendos = np.linspace(div_min * 1_000, div_max * 1_000, 200)
+        from charts import render_sensitivity_png
+        grade = get_sensitivity_cache().grid(faturamentos, dividendos, despesas, pro_labore, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
+        return render_sensitivity_png(grade, faturamentos, dividendos), grade["gatilho"]
+
+    @st.cache_resource
+    def get_sensitivity_cache():
+        return SensitivityCache()
+
+    # Cenário otimizado e resultados: editar estes campos reexecuta apenas este fragmento
+    @st.fragment
+    def secao_otimizada():
+        st.markdown("""
+        <div class='section-header'>
+            <h3 style='margin:0; margin-bottom: 0.5rem;'>🎯 Cenário Otimizado</h3>
+            <p class='helper-text' style='margin:0;'>Valores que ajustará para uma otimização da carga tributária</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+        # O otimizador segue a estrutura do Lucro Real (despesas reduzem a base do IRPJ/CSLL)
+        otimizacao_auto = st.toggle("🤖 Otimização automática", key="auto", disabled=regime != "Lucro Real", help="Busca a combinação de despesas, pró-labore e dividendos com menor carga tributária, mantendo a mesma retirada total do cenário atual (disponível no Lucro Real)") and regime == "Lucro Real"
+    
+        if otimizacao_auto:
+            c3, c4, c6, c5 = st.columns(4)
+        
+            with c3:
+                st.markdown("<div class='icon-text'>💼 Despesas Máximas</div>", unsafe_allow_html=True)
+                st.markdown("<p class='helper-text'>Teto de despesas dedutíveis que a PJ pode assumir</p>", unsafe_allow_html=True)
+                desp_max = st.number_input("Despesas máximas (R$)", 0.0, value=80_000.0, step=5_000.0, key="dmax", label_visibility="collapsed")
+        
+            with c4:
+                st.markdown("<div class='icon-text'>👔 Pró-labore Mínimo</div>", unsafe_allow_html=True)
+                st.markdown("<p class='helper-text'>Percentual mínimo do faturamento pago como pró-labore</p>", unsafe_allow_html=True)
+                pl_min_ratio = st.number_input("Pró-labore mínimo (%)", 0.0, 100.0, value=5.0, step=0.5, key="plmin", label_visibility="collapsed") / 100
+        
+            with c6:
+                st.markdown("<div class='icon-text'>👔 Pró-labore Máximo</div>", unsafe_allow_html=True)
+                st.markdown("<p class='helper-text'>Teto do pró-labore (vazio = pró-labore atual, ou o mínimo se for maior)</p>", unsafe_allow_html=True)
+                # Sem INSS/IRPF no cálculo, trocar dividendos por pró-labore sempre reduziria o imposto:
+                # por padrão o otimizador não passa do pró-labore atual, nem fica abaixo do mínimo exigido
+                pl_teto_padrao = max(pl_atual, pl_min_ratio * faturamento_mensal)
+                pl_max = st.number_input("Pró-labore máximo (R$)", 0.0, value=None, step=1_000.0, key="plmax", placeholder=format_currency_brl(pl_teto_padrao), label_visibility="collapsed")
+                pl_max = pl_teto_padrao if pl_max is None else pl_max
+        
+            with c5:
+                st.markdown("<div class='icon-text'>💰 Teto de Dividendos</div>", unsafe_allow_html=True)
+                st.markdown("<p class='helper-text'>Limite de dividendos mensais (0 = sem teto)</p>", unsafe_allow_html=True)
+                div_max = st.number_input("Teto de dividendos (R$)", 0.0, value=0.0, step=5_000.0, key="dvmax", label_visibility="collapsed")
+        
+            otimo = cached_optimize_scenario(faturamento_mensal, num_pf, pl_atual + div_atual, desp_max, pl_min_ratio, pl_max, div_max or None, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
+        
+            if otimo is None:
+                st.error("❌ Não há combinação que respeite as restrições informadas. Revise os limites.")
+                parar()
+        
+            desp_otim, pl_otim, div_otim = otimo["despesas"], otimo["pro_labore"], otimo["dividendos_total"]
+            o1, o2, o3 = st.columns(3)
+            o1.metric("💼 Despesas Otimizadas", format_currency_brl(desp_otim))
+            o2.metric("👔 Pró-labore Otimizado", format_currency_brl(pl_otim))
+            o3.metric("💰 Dividendos Otimizados", format_currency_brl(div_otim))
+            st.caption("💡 O simulador não considera INSS/IRPF sobre o pró-labore; ajuste o pró-labore mínimo e máximo conforme a realidade da empresa.")
+        else:
+            c3, c4, c5 = st.columns(3)
+        
+            with c3:
+                st.markdown("<div class='icon-text'>💼 Despesas Otimizadas</div>", unsafe_allow_html=True)
+                st.markdown("<p class='helper-text'>Despesas pagas e declaradas pela PJ</p>", unsafe_allow_html=True)
+                desp_otim = st.number_input("Despesas otimizadas (R$)", 0.0, step=5_000.0, key="do", label_visibility="collapsed")
+        
+            with c4:
+                st.markdown("<div class='icon-text'>👔 Pró-labore Otimizado</div>", unsafe_allow_html=True)
+                st.markdown("<p class='helper-text'>Pró-labore declarado e pago oficialmente</p>", unsafe_allow_html=True)
+                pl_otim = st.number_input("Pró-labore otimizado (R$)", 0.0, step=1_000.0, key="po", label_visibility="collapsed")
+        
+            with c5:
+                st.markdown("<div class='icon-text'>💰 Dividendos Otimizados</div>", unsafe_allow_html=True)
+                st.markdown("<p class='helper-text'>Transferência de lucros da PJ para PF</p>", unsafe_allow_html=True)
+                div_otim = st.number_input("Dividendos otimizados (R$)", 0.0, step=5_000.0, key="divo", label_visibility="collapsed")
+    
+        st.session_state["cenario_otimizado"] = (desp_otim, pl_otim, div_otim)
+    
+        st.divider()
+    
+        # Após o primeiro cálculo, os resultados acompanham as edições sem novo clique
+        calcular = st.button("🧮 Calcular Análise Comparativa", type="primary", use_container_width=True)
+        if calcular:
+            st.session_state["calculado"] = True
+        if not st.session_state.get("calculado"):
+            return
+    
+        # pandas e matplotlib entram só quando a primeira tabela e o primeiro gráfico são montados
+        import pandas as pd
+        from charts import render_tax_chart_png
+    
+        with etapa("validate_inputs"):
+            v1, m1 = cached_validate_inputs(faturamento_mensal, desp_atual, pl_atual, div_atual)
+            v2, m2 = cached_validate_inputs(faturamento_mensal, desp_otim, pl_otim, div_otim)
+    
+        if not v1 or not v2:
+            st.error(m1 or m2)
+            parar()
+    
+        if regime == "Simples Nacional" and faturamento_mensal * 12 > 4_800_000:
+            st.error("❌ Erro: Faturamento anualizado acima do teto do Simples Nacional (R$ 4.800.000,00).")
+            parar()
+    
+        if m1:
+            st.warning("**Cenário Atual:**\n" + m1)
+        if m2:
+            st.warning("**Cenário Otimizado:**\n" + m2)
+    
+        with etapa("compute_scenario"):
+            chave_atual, c_atual = cached_compute_scenario(faturamento_mensal, desp_atual, pl_atual, div_atual, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, regime, atividade, folha_mensal)
+            chave_otim, c_otim = cached_compute_scenario(faturamento_mensal, desp_otim, pl_otim, div_otim, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, regime, atividade, folha_mensal)
+    
+        eco_mensal = c_atual["total_impostos"] - c_otim["total_impostos"]
+        eco_anual = eco_mensal * 12
+    
+        if calcular:
+            store, taxas = get_scenario_store(), (aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
+            store.save(chave_atual, regime, (faturamento_mensal, desp_atual, pl_atual, div_atual, num_pf), taxas, c_atual)
+            store.save(chave_otim, regime, (faturamento_mensal, desp_otim, pl_otim, div_otim, num_pf), taxas, c_otim)
+            store.record_run(cliente.strip() or "Sem nome", regime, taxas, chave_atual, chave_otim, atividade, folha_mensal)
+            # Rastrear evento de simulação
+            track_event('Simulação Calculada', {
+                'economia_mensal': int(eco_mensal),
+                'num_socios': num_pf
+            })
+    
+        st.divider()
+        st.markdown("<div class='section-header'><h2 style='margin:0;'>📈 Indicadores-Chave (KPIs)</h2></div>", unsafe_allow_html=True)
+    
+        k1, k2, k3, k4, k5 = st.columns(5)
+        k1.metric("💸 Impostos Atual", format_currency_brl(c_atual["total_impostos"]))
+        k2.metric("✨ Impostos Otimizado", format_currency_brl(c_otim["total_impostos"]))
+        k3.metric("💰 Economia Mensal", format_currency_brl(eco_mensal))
+        k4.metric("🎯 Economia Anual", format_currency_brl(eco_anual))
+        red = (eco_mensal/c_atual["total_impostos"]*100) if c_atual["total_impostos"]>0 else 0
+        k5.metric("📊 Redução", f"{red:.1f}%")
+    
+        st.divider()
+        st.markdown(generate_summary_text(c_atual, c_otim, eco_mensal, eco_anual, num_pf, limite_dividendos_pf))
+        if otimizacao_auto and pl_otim > pl_atual:
+            st.warning(f"⚠️ **Limitação:** o pró-labore otimizado ({format_currency_brl(pl_otim)}) é maior que o atual ({format_currency_brl(pl_atual)}). O simulador não calcula INSS nem IRPF sobre o pró-labore, então a economia acima não desconta esses tributos.")
+    
+        st.divider()
+        st.markdown("<div class='section-header'><h2 style='margin:0;'>📊 Comparativo Detalhado</h2></div>", unsafe_allow_html=True)
+        metricas = [REGIME_TAX_LABEL[regime] if m == REGIME_TAX_LABEL["Lucro Real"] else m for m in COMPARISON_METRICS]
+        with etapa("dataframe"):
+            tabela = pd.DataFrame({"Métrica": metricas, "Cenário Atual": cached_comparison_column(c_atual), "Cenário Otimizado": cached_comparison_column(c_otim)})
+        st.dataframe(tabela, use_container_width=True, hide_index=True)
+    
+        st.markdown("<div class='section-header'><h3 style='margin:0;'>⚖️ Comparativo entre Regimes</h3></div>", unsafe_allow_html=True)
+        comparativo = cached_regime_comparison(faturamento_mensal, ((desp_atual, pl_atual, div_atual), (desp_otim, pl_otim, div_otim)), num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, atividade, folha_mensal)
+        linhas = [[r] + [format_currency_brl(v) if pd.notna(v) else "Acima do teto do Simples" for v in comparativo[f"{r} - total_impostos"]] for r in REGIMES]
+        st.dataframe(pd.DataFrame(linhas, columns=["Regime", "Impostos - Cenário Atual", "Impostos - Cenário Otimizado"]), use_container_width=True, hide_index=True)
+        st.caption(f"💡 Menor imposto no cenário otimizado: **{comparativo.at[1, 'melhor_regime']}**. Lucro Real e Presumido consideram IRPJ/CSLL; o DAS do Simples reúne os tributos federais, o ISS e a CPP. PIS/COFINS e ISS fora do Simples não entram no cálculo.")
+    
+        st.divider()
+        st.markdown("<div class='section-header'><h2 style='margin:0;'>📊 Visualização: Impostos por Cenário</h2></div>", unsafe_allow_html=True)
+    
+        with etapa("chart"):
+            st.image(render_tax_chart_png(c_atual["irpj_csll"], c_atual["irrf_dividendos"], c_atual["total_impostos"], c_otim["irpj_csll"], c_otim["irrf_dividendos"], c_otim["total_impostos"]))
+    
+        st.divider()
+        st.markdown("<div class='section-header'><h2 style='margin:0;'>💡 Insights e Recomendações</h2></div>", unsafe_allow_html=True)
+    
+        if c_atual["estourou_gatilho"] and not c_otim["estourou_gatilho"]:
+            st.success("✅ **Excelente!** O cenário otimizado elimina o IRRF sobre dividendos, mantendo distribuição por PF abaixo do limite de R$ 50.000/mês.")
+        elif c_atual["estourou_gatilho"] and c_otim["estourou_gatilho"]:
+            st.info("ℹ️ **Oportunidade:** Ambos os cenários ainda geram IRRF. Considere aumentar o número de sócios, reduzir dividendos ou aumentar despesas dedutíveis na PJ.")
+    
+        if eco_mensal > 10_000:
+            st.success(f"💰 **Economia significativa!** Você pode economizar {format_currency_brl(eco_anual)} por ano. Recomendamos consultar um contador.")
+    
+        flush_fragment_events()
+
+    secao_otimizada()
+
+    # Histórico: recarregar uma execução preenche os campos antes da próxima execução do script
+    def recarregar_execucao(execucao):
+        st.session_state.update({
+            "regime": execucao["regime"], "atividade": execucao["atividade"], "folha": execucao["folha_mensal"], "cliente": execucao["cliente"], "fat": execucao["faturamento"], "npf": int(execucao["num_pf"]),
+            "aliq_irpj_csll": execucao["aliquota_irpj_csll"] * 100, "limite_div": execucao["limite_dividendos_pf"], "aliq_irrf": execucao["aliquota_irrf_dividendos"] * 100,
+            "da": execucao["despesas_atual"], "pa": execucao["pro_labore_atual"], "di": execucao["dividendos_atual"],
+            "auto": False, "do": execucao["despesas_otimizado"], "po": execucao["pro_labore_otimizado"], "divo": execucao["dividendos_otimizado"],
+            "calculado": True,
+        })
+
+    @st.fragment
+    def secao_historico():
+        with st.expander("🗂️ Histórico de Simulações"):
+            store = get_scenario_store()
+            filtro = st.selectbox("Cliente", ["Todos"] + store.clients(), key="hist_cliente")
+            execucoes = store.runs(None if filtro == "Todos" else filtro)
+            if not execucoes:
+                st.caption("Nenhuma simulação salva ainda. Clique em Calcular para registrar a primeira.")
+                return
+            import pandas as pd
+            historico = pd.DataFrame(execucoes)
+            economia = historico["impostos_atual"] - historico["impostos_otimizado"]
+            valores = format_currency_brl_array(np.column_stack([historico["faturamento"], historico["impostos_atual"], historico["impostos_otimizado"], economia]))
+            st.dataframe(pd.DataFrame({
+                "Data": pd.to_datetime(historico["criado_em"], unit="s").dt.strftime("%d/%m/%Y %H:%M"),
+                "Cliente": historico["cliente"],
+                "Regime": historico["regime"],
+                "Faturamento": valores[:, 0],
+                "Impostos Atual": valores[:, 1],
+                "Impostos Otimizado": valores[:, 2],
+                "Economia Mensal": valores[:, 3],
+            }), use_container_width=True, hide_index=True)
+            escolha = st.selectbox("Execução", range(len(execucoes)), format_func=lambda i: f"#{execucoes[i]['id']} · {execucoes[i]['cliente']} · {valores[i, 3]}/mês", key="hist_execucao")
+            # O callback roda antes do fragmento; o restante da página só é redesenhado numa nova execução completa
+            if st.button("↩️ Recarregar simulação", on_click=recarregar_execucao, args=(execucoes[escolha],), key="hist_recarregar"):
+                st.rerun(scope="app")
+
     st.divider()
-    st.markdown("<div class='section-header'><h2 style='margin:0;'>📊 Comparativo Detalhado</h2></div>", unsafe_allow_html=True)
-    st.dataframe(create_comparison_table(c_atual, c_otim), use_container_width=True, hide_index=True)
-    
+    secao_historico()
+
+    # Análise de sensibilidade
+    @st.fragment
+    def secao_sensibilidade():
+        # A grade e o matplotlib só entram quando o expander é aberto; fechado, a seção não calcula nada
+        secao = st.expander("🔥 Análise de Sensibilidade: Faturamento × Dividendos", key="sens_aberto", on_change="rerun")
+        if not secao.open:
+            return
+        with secao:
+            base = st.radio("Cenário base", ["Cenário Atual", "Cenário Otimizado"], horizontal=True, key="sens_base")
+            desp_base, pl_base = (desp_atual, pl_atual) if base == "Cenário Atual" else st.session_state["cenario_otimizado"][:2]
+            s1, s2 = st.columns(2)
+            fat_min, fat_max = s1.slider("Faixa de faturamento (R$ mil)", 0, 2_000, (0, 1_000), 10, key="sens_fat")
+            div_min, div_max_grade = s2.slider("Faixa de dividendos (R$ mil)", 0, 1_000, (0, 300), 5, key="sens_div")
+            png, gatilho = cached_sensitivity_png(fat_min, fat_max, div_min, div_max_grade, desp_base, pl_base, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
+        
+            st.image(png)
+            st.caption(f"💡 Acima da linha tracejada ({format_currency_brl(gatilho)} = limite × sócios) incide IRRF sobre todo o dividendo distribuído.")
+
+    # O mapa de sensibilidade usa a estrutura do Lucro Real
+    if regime == "Lucro Real":
+        st.divider()
+        secao_sensibilidade()
+
+    # Seção de Feedback
+    @st.fragment
+    def secao_feedback():
+        st.markdown("""
+        <div class='feedback-box'>
+            <h2 style='color: #1e3a5f; margin-top: 0;'>💬 Ajude-nos a Melhorar!</h2>
+            <p style='color: #64748b; font-size: 1rem; margin-bottom: 1.5rem;'>
+                Esta plataforma é um <strong>MVP (Produto Mínimo Viável)</strong> e estamos em constante evolução. 
+                Sua opinião é fundamental para desenvolvermos uma ferramenta cada vez mais útil para profissionais de saúde.
+                <strong>Todas as sugestões são muito bem-vindas!</strong> 🙏
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+        col_f1, col_f2 = st.columns(2)
+    
+        with col_f1:
+            nome = st.text_input("Nome (opcional)", placeholder="Seu nome", key="nome_input")
+            email_user = st.text_input("E-mail (opcional)", placeholder="seu@email.com", key="email_input")
+    
+        with col_f2:
+            cidade = st.text_input("Cidade/Estado (opcional)", placeholder="Ex: São Paulo - SP", key="cidade_input")
+            profissao = st.text_input("Profissão (opcional)", placeholder="Ex: Médico, Contador", key="prof_input")
+    
+        sugestao = st.text_area(
+            "Sua sugestão, crítica ou ideia de melhoria:",
+            placeholder="Conte-nos o que você achou, o que poderia ser melhorado, quais funcionalidades gostaria de ver...",
+            height=150,
+            key="sugestao_input"
+        )
+    
+        if st.button("📤 Enviar Feedback", use_container_width=True, key="btn_feedback"):
+            if sugestao.strip():
+                with etapa("send_email"):
+                    success, message = send_email(
+                        nome or "Anônimo",
+                        email_user or "Não informado",
+                        cidade or "Não informado",
+                        profissao or "Não informado",
+                        sugestao
+                    )
+            
+                if success:
+                    # Rastrear evento de feedback
+                    track_event('Feedback Enviado')
+                    st.success("✅ Feedback enviado com sucesso! Muito obrigado pela sua contribuição! 🎉")
+                    st.balloons()
+                else:
+                    st.error(f"❌ {message}")
+            else:
+                st.warning("⚠️ Por favor, escreva sua sugestão antes de enviar.")
+    
+        flush_fragment_events()
+
     st.divider()
-    st.markdown("<div class='section-header'><h2 style='margin:0;'>📊 Visualização: Impostos por Cenário</h2></div>", unsafe_allow_html=True)
-    
-    fig, ax = plt.subplots(figsize=(12, 6))
-    fig.patch.set_facecolor('white')
-    ax.set_facecolor('#f8fafc')
-    
-    cats = ["IRPJ + CSLL", "IRRF Dividendos", "TOTAL"]
-    v_atual = [c_atual["irpj_csll"], c_atual["irrf_dividendos"], c_atual["total_impostos"]]
-    v_otim = [c_otim["irpj_csll"], c_otim["irrf_dividendos"], c_otim["total_impostos"]]
-    
-    x = range(3)
-    w = 0.35
-    
-    bars1 = ax.bar([i-w/2 for i in x], v_atual, w, label="Cenário Atual", color="#ef4444", alpha=0.85, edgecolor='white', linewidth=2)
-    bars2 = ax.bar([i+w/2 for i in x], v_otim, w, label="Cenário Otimizado", color="#1e3a5f", alpha=0.85, edgecolor='white', linewidth=2)
-    
-    ax.set_xlabel("Categoria de Imposto", fontsize=13, fontweight='600', color='#1e3a5f')
-    ax.set_ylabel("Valor (R$)", fontsize=13, fontweight='600', color='#1e3a5f')
-    ax.set_title("Comparação de Impostos: Atual vs Otimizado", fontsize=16, fontweight='700', color='#1e3a5f', pad=20)
-    ax.set_xticks(x)
-    ax.set_xticklabels(cats, fontsize=11)
-    ax.legend(frameon=True, fancybox=True, shadow=True, fontsize=11)
-    ax.grid(axis="y", alpha=0.2, linestyle='--')
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    
-    for bars in [bars1, bars2]:
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width() / 2.0, height, f"R$ {height:,.0f}", 
-                   ha="center", va="bottom", fontsize=10, fontweight='600')
-    
-    st.pyplot(fig)
-    
+    secao_feedback()
+
     st.divider()
-    st.markdown("<div class='section-header'><h2 style='margin:0;'>💡 Insights e Recomendações</h2></div>", unsafe_allow_html=True)
-    
-    if c_atual["estourou_gatilho"] and not c_otim["estourou_gatilho"]:
-        st.success("✅ **Excelente!** O cenário otimizado elimina o IRRF sobre dividendos, mantendo distribuição por PF abaixo do limite de R$ 50.000/mês.")
-    elif c_atual["estourou_gatilho"] and c_otim["estourou_gatilho"]:
-        st.info("ℹ️ **Oportunidade:** Ambos os cenários ainda geram IRRF. Considere aumentar o número de sócios, reduzir dividendos ou aumentar despesas dedutíveis na PJ.")
-    
-    if eco_mensal > 10_000:
-        st.success(f"💰 **Economia significativa!** Você pode economizar {format_currency_brl(eco_anual)} por ano. Recomendamos consultar um contador.")
-
-# Seção de Feedback
-st.divider()
-st.markdown("""
-<div class='feedback-box'>
-    <h2 style='color: #1e3a5f; margin-top: 0;'>💬 Ajude-nos a Melhorar!</h2>
-    <p style='color: #64748b; font-size: 1rem; margin-bottom: 1.5rem;'>
-        Esta plataforma é um <strong>MVP (Produto Mínimo Viável)</strong> e estamos em constante evolução. 
-        Sua opinião é fundamental para desenvolvermos uma ferramenta cada vez mais útil para profissionais de saúde.
-        <strong>Todas as sugestões são muito bem-vindas!</strong> 🙏
-    </p>
-</div>
-""", unsafe_allow_html=True)
-
-col_f1, col_f2 = st.columns(2)
-
-with col_f1:
-    nome = st.text_input("Nome (opcional)", placeholder="Seu nome", key="nome_input")
-    email_user = st.text_input("E-mail (opcional)", placeholder="seu@email.com", key="email_input")
-
-with col_f2:
-    cidade = st.text_input("Cidade/Estado (opcional)", placeholder="Ex: São Paulo - SP", key="cidade_input")
-    profissao = st.text_input("Profissão (opcional)", placeholder="Ex: Médico, Contador", key="prof_input")
-
-sugestao = st.text_area(
-    "Sua sugestão, crítica ou ideia de melhoria:",
-    placeholder="Conte-nos o que você achou, o que poderia ser melhorado, quais funcionalidades gostaria de ver...",
-    height=150,
-    key="sugestao_input"
-)
+    st.caption("⚠️ **DISCLAIMER:** Este é um simulador educativo e não substitui consultoria contábil ou jurídica.")
 
-if st.button("📤 Enviar Feedback", use_container_width=True, key="btn_feedback"):
-    if sugestao.strip():
-        with st.spinner("Enviando..."):
-            success, message = send_email(
-                nome or "Anônimo",
-                email_user or "Não informado",
-                cidade or "Não informado",
-                profissao or "Não informado",
-                sugestao
-            )
-        
-        if success:
-            # Rastrear evento de feedback
-            track_event('Feedback Enviado')
-            st.success("✅ Feedback enviado com sucesso! Muito obrigado pela sua contribuição! 🎉")
-            st.balloons()
-        else:
-            st.error(f"❌ {message}")
-    else:
-        st.warning("⚠️ Por favor, escreva sua sugestão antes de enviar.")
+    # Painel de depuração, visível só com ?debug=1 na URL
+    def alternar_medicoes():
+        st.session_state["medir_etapas"] = st.session_state["debug_medir"]
+
+    if st.query_params.get("debug") == "1":
+        import pandas as pd
+        with st.expander("🛠️ Depuração: tempo por etapa", expanded=True):
+            st.toggle("Medir etapas", value=st.session_state["medir_etapas"], key="debug_medir", on_change=alternar_medicoes)
+            lentas = etapas_sessao.slowest()
+            if lentas:
+                st.caption("Etapas mais lentas nesta sessão (ms)")
+                st.dataframe(pd.DataFrame(lentas).set_index("etapa")[["execucoes", "pior", "media", "ultima"]].mul([1, 1000, 1000, 1000]).round(2), use_container_width=True)
+            resumo = medicoes.snapshot()
+            if resumo:
+                st.caption("Todas as sessões (ms)")
+                st.dataframe(pd.DataFrame(resumo).T[["count", "p50", "p95", "p99", "max"]].astype(float).mul([1, 1000, 1000, 1000, 1000]).round(2), use_container_width=True)
+                d1, d2 = st.columns(2)
+                d1.download_button("⬇️ Prometheus", medicoes.to_prometheus(), "simulador_metrics.prom", "text/plain", key="debug_prom")
+                d2.download_button("⬇️ JSON", medicoes.to_json(), "simulador_metrics.json", "application/json", key="debug_json")
+
+    # Exportação contínua para o coletor (arquivo .prom do node_exporter ou snapshot .json)
+    if st.session_state["medir_etapas"] and os.environ.get("METRICS_EXPORT_PATH"):
+        medicoes.export(os.environ["METRICS_EXPORT_PATH"])
 
-st.divider()
-st.caption("⚠️ **DISCLAIMER:** Este é um simulador educativo e não substitui consultoria contábil ou jurídica.")
+    flush_events()
+finally:
+    st.session_state["execucao_completa"] = False
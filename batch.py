@@ -0,0 +1,96 @@
+from typing import TYPE_CHECKING, Dict, Union
+import numpy as np
+
+# pandas só é importado quando um DataFrame é de fato montado; o app parte sem ele
+if TYPE_CHECKING:
+    import pandas as pd
+
+ArrayLike = Union[float, int, np.ndarray, "pd.Series"]
+
+SCENARIO_COLUMNS = ("faturamento", "despesas", "pro_labore", "lucro_antes_impostos", "irpj_csll", "lucro_apos_irpj_csll", "dividendos_total", "dividendos_por_pf", "estourou_gatilho", "irrf_dividendos", "total_impostos", "carga_efetiva", "caixa_apos_impostos")
+INPUT_COLUMNS = ("faturamento", "despesas", "pro_labore", "dividendos_total", "num_pf")
+RATE_COLUMNS = ("aliquota_irpj_csll", "limite_dividendos_pf", "aliquota_irrf_dividendos")
+# Colunas obrigatórias dos arquivos do processamento em lote (cli e outofcore): os dois cenários de cada cliente
+COLUNAS_ENTRADA = ("faturamento", "num_pf", "desp_atual", "pl_atual", "div_atual", "desp_otim", "pl_otim", "div_otim")
+
+# Alertas da validação, um bit cada; os dois primeiros são erros que impedem o cálculo
+ALERTA_NEGATIVO = 1
+ALERTA_FATURAMENTO_ZERO = 2
+ALERTA_DESPESAS_EXCEDEM = 4
+ALERTA_DIVIDENDOS_EXCEDEM = 8
+ALERTA_PRO_LABORE_BAIXO = 16
+ALERTAS_ERRO = ALERTA_NEGATIVO | ALERTA_FATURAMENTO_ZERO
+MENSAGENS_ALERTA = {
+    ALERTA_NEGATIVO: "❌ Erro: Valores não podem ser negativos.",
+    ALERTA_FATURAMENTO_ZERO: "❌ Erro: Faturamento deve ser maior que zero.",
+    ALERTA_DESPESAS_EXCEDEM: "⚠️ Atenção: Despesas + Pró-labore excedem o faturamento (lucro negativo).",
+    ALERTA_DIVIDENDOS_EXCEDEM: "⚠️ Atenção: Dividendos informados excedem o lucro líquido estimado. Verifique os valores.",
+    ALERTA_PRO_LABORE_BAIXO: "⚠️ Alerta: Pró-labore muito baixo em relação ao faturamento. Isso pode gerar questionamentos fiscais.",
+}
+
+def _clamp(valores: np.ndarray, minimo: float) -> np.ndarray:
+    # Mesmo comportamento de max(minimo, v): NaN e valores <= minimo viram o mínimo
+    return np.where(valores > minimo, valores, minimo)
+
+def validate_inputs_batch(faturamento: ArrayLike, despesas: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike) -> np.ndarray:
+    # Todas as regras sobre colunas inteiras, sem parar no primeiro erro: um uint8 por linha com os bits
+    # ALERTA_*. Válida é a linha sem bits de ALERTAS_ERRO; os textos só saem em alert_messages
+    faturamento = np.asarray(faturamento, dtype=float)
+    despesas = np.asarray(despesas, dtype=float)
+    pro_labore = np.asarray(pro_labore, dtype=float)
+    dividendos_total = np.asarray(dividendos_total, dtype=float)
+    faturamento, despesas, pro_labore, dividendos_total = np.broadcast_arrays(faturamento, despesas, pro_labore, dividendos_total)
+    custos = despesas + pro_labore
+    codigos = ((faturamento < 0) | (despesas < 0) | (pro_labore < 0) | (dividendos_total < 0)).view(np.uint8) * np.uint8(ALERTA_NEGATIVO)
+    codigos |= (faturamento == 0).view(np.uint8) * np.uint8(ALERTA_FATURAMENTO_ZERO)
+    codigos |= (custos > faturamento).view(np.uint8) * np.uint8(ALERTA_DESPESAS_EXCEDEM)
+    # NaN e infinitos seguem as mesmas comparações do validate_inputs, sem avisos do NumPy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Mesma conta e mesma ordem das subtrações de validate_inputs: lucro estimado após 34% de IRPJ/CSLL, com 10% de folga
+        codigos |= (dividendos_total > _clamp(faturamento - despesas - pro_labore, 0.0) * 0.66 * 1.1).view(np.uint8) * np.uint8(ALERTA_DIVIDENDOS_EXCEDEM)
+        codigos |= ((faturamento > 0) & (pro_labore / faturamento < 0.05)).view(np.uint8) * np.uint8(ALERTA_PRO_LABORE_BAIXO)
+    return codigos
+
+def _mensagem_alerta(codigo: int, mensagens: Dict[int, str]) -> str:
+    # Como validate_inputs: um erro aparece sozinho (o primeiro); sem erro, os avisos em ordem
+    for bit in (ALERTA_NEGATIVO, ALERTA_FATURAMENTO_ZERO):
+        if codigo & bit:
+            return mensagens[bit]
+    return "\n".join(mensagens[bit] for bit in (ALERTA_DESPESAS_EXCEDEM, ALERTA_DIVIDENDOS_EXCEDEM, ALERTA_PRO_LABORE_BAIXO) if codigo & bit)
+
+def alert_messages(codigos: ArrayLike, mensagens: Dict[int, str] = MENSAGENS_ALERTA) -> np.ndarray:
+    # Textos só para o que for exibido: uma tabela com as 32 combinações possíveis e uma indexação,
+    # seja qual for o tamanho da coluna; outro idioma é outro dicionário de mensagens
+    tabela = np.array([_mensagem_alerta(c, mensagens) for c in range(2 * ALERTA_PRO_LABORE_BAIXO)], dtype=object)
+    return tabela[np.asarray(codigos, dtype=np.uint8)]
+
+def compute_scenario_batch(faturamento: ArrayLike, despesas: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike, num_pf: ArrayLike, aliquota_irpj_csll: ArrayLike = 0.34, limite_dividendos_pf: ArrayLike = 50_000.0, aliquota_irrf_dividendos: ArrayLike = 0.10) -> Dict[str, np.ndarray]:
+    faturamento = _clamp(np.asarray(faturamento, dtype=float), 0.0)
+    despesas = _clamp(np.asarray(despesas, dtype=float), 0.0)
+    pro_labore = _clamp(np.asarray(pro_labore, dtype=float), 0.0)
+    dividendos_total = _clamp(np.asarray(dividendos_total, dtype=float), 0.0)
+    num_pf = _clamp(np.asarray(num_pf, dtype=float), 1.0)
+    aliquota_irpj_csll = np.asarray(aliquota_irpj_csll, dtype=float)
+    limite_dividendos_pf = np.asarray(limite_dividendos_pf, dtype=float)
+    aliquota_irrf_dividendos = np.asarray(aliquota_irrf_dividendos, dtype=float)
+    faturamento, despesas, pro_labore, dividendos_total, num_pf = np.broadcast_arrays(faturamento, despesas, pro_labore, dividendos_total, num_pf)
+    lucro_antes_impostos = _clamp(faturamento - despesas - pro_labore, 0.0)
+    irpj_csll = aliquota_irpj_csll * lucro_antes_impostos
+    dividendos_por_pf = dividendos_total / num_pf
+    estourou_gatilho = dividendos_por_pf > limite_dividendos_pf
+    irrf_dividendos = np.where(estourou_gatilho, aliquota_irrf_dividendos * dividendos_total, 0.0)
+    total_impostos = irpj_csll + irrf_dividendos
+    tem_faturamento = faturamento > 0
+    carga_efetiva = np.divide(total_impostos, faturamento, out=np.zeros_like(total_impostos), where=tem_faturamento) * 100
+    caixa_apos_impostos = faturamento - despesas - pro_labore - total_impostos
+    lucro_apos_irpj_csll = lucro_antes_impostos - irpj_csll
+    return {"faturamento": faturamento, "despesas": despesas, "pro_labore": pro_labore, "lucro_antes_impostos": lucro_antes_impostos, "irpj_csll": irpj_csll, "lucro_apos_irpj_csll": lucro_apos_irpj_csll, "dividendos_total": dividendos_total, "dividendos_por_pf": dividendos_por_pf, "estourou_gatilho": estourou_gatilho, "irrf_dividendos": irrf_dividendos, "total_impostos": total_impostos, "carga_efetiva": carga_efetiva, "caixa_apos_impostos": caixa_apos_impostos}
+
+def compute_scenario_frame(df: "pd.DataFrame", aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10) -> "pd.DataFrame":
+    import pandas as pd
+    # Colunas de alíquota/limite no DataFrame têm precedência sobre os valores padrão
+    padroes = {"aliquota_irpj_csll": aliquota_irpj_csll, "limite_dividendos_pf": limite_dividendos_pf, "aliquota_irrf_dividendos": aliquota_irrf_dividendos}
+    taxas = {k: (df[k].to_numpy(dtype=float) if k in df.columns else v) for k, v in padroes.items()}
+    entradas = {k: df[k].to_numpy(dtype=float) for k in INPUT_COLUMNS}
+    resultado = compute_scenario_batch(**entradas, **taxas)
+    return pd.DataFrame(resultado, index=df.index, columns=list(SCENARIO_COLUMNS))
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from breakeven import BreakevenIndex, breakeven_despesas, revenue_for_load
+from regimes import compute_regime_batch
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo das consultas inversas (equilíbrio de despesas e receita para uma carga alvo)")
+    parser.add_argument("--consultas", type=int, default=20_000)
+    parser.add_argument("--repeticoes", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    n = args.consultas
+    faturamento = rng.uniform(20_000, 1_000_000, n)
+    despesas = faturamento * rng.uniform(0.1, 0.6, n)
+    pro_labore = faturamento * 0.05
+    dividendos = rng.uniform(0, 300_000, n)
+    num_pf = rng.integers(1, 5, n)
+    alvo = rng.uniform(5, 25, n)
+
+    erro = 0.0
+    for regime in ("Lucro Real", "Lucro Presumido", "Simples Nacional"):
+        inicio = time.perf_counter()
+        receita = revenue_for_load(alvo, despesas, pro_labore, dividendos, num_pf, regime)
+        fim = time.perf_counter()
+        ok = ~np.isnan(receita) & (receita > despesas + pro_labore)
+        # A carga salta nos gatilhos e faixas: a resposta atinge o alvo e logo abaixo dela ainda não
+        carga = compute_regime_batch(regime, receita[ok], despesas[ok], pro_labore[ok], dividendos[ok], num_pf[ok])["carga_efetiva"]
+        antes = compute_regime_batch(regime, receita[ok] * (1 - 1e-9), despesas[ok], pro_labore[ok], dividendos[ok], num_pf[ok])["carga_efetiva"]
+        erro = max(erro, float(np.maximum(alvo[ok] - carga, antes - alvo[ok]).max(initial=0.0)))
+        print(f"receita p/ carga {regime:<17} {n} consultas: {(fim - inicio) * 1000:8.1f} ms ({n / (fim - inicio):>10,.0f}/s)  sem solução: {np.isnan(receita).mean():.1%}")
+    for regime in ("Lucro Presumido", "Simples Nacional"):
+        inicio = time.perf_counter()
+        breakeven_despesas(faturamento, pro_labore, dividendos, num_pf, regime)
+        fim = time.perf_counter()
+        print(f"despesas de equilíbrio vs {regime:<17} {n} consultas: {(fim - inicio) * 1000:8.1f} ms ({n / (fim - inicio):>10,.0f}/s)")
+
+    indice = BreakevenIndex()
+    inicio = time.perf_counter()
+    indice.revenue_for_load(alvo, despesas, pro_labore, dividendos, num_pf, "Lucro Presumido")
+    meio = time.perf_counter()
+    for i in range(args.repeticoes):
+        j = i % n
+        indice.revenue_for_load(alvo[j], despesas[j], pro_labore[j], dividendos[j], num_pf[j], "Lucro Presumido")
+    fim = time.perf_counter()
+    print(f"índice: carga inicial {(meio - inicio) * 1000:8.1f} ms, consulta repetida {(fim - meio) / args.repeticoes * 1e6:6.1f} µs")
+    print(f"maior desvio do cruzamento da carga alvo: {erro:.2e} p.p.")
+    return 0 if erro < 1e-6 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import format_currency_brl, format_currency_brl_array
+
+def valores_monetarios(n: int, seed: int = 0) -> np.ndarray:
+    # Mistura de valores de cenários: de centavos a dezenas de milhões em escala log, 10% negativos
+    # (economias e caixas negativos) e metade já arredondada em centavos
+    rng = np.random.default_rng(seed)
+    valores = 10 ** rng.uniform(-1, 7.5, n) * np.where(rng.random(n) < 0.1, -1, 1)
+    centavos = rng.random(n) < 0.5
+    valores[centavos] = np.round(valores[centavos], 2)
+    return valores
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="format_currency_brl valor a valor contra format_currency_brl_array")
+    parser.add_argument("--valores", type=int, default=1_000_000)
+    parser.add_argument("--repeticoes", type=int, default=5, help="Rodadas alternadas das duas versões; vale o menor tempo de cada")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    valores = valores_monetarios(args.valores, args.seed)
+    lista = valores.tolist()
+    por_valor, em_lote = [], []
+    for _ in range(args.repeticoes):
+        inicio = time.perf_counter()
+        esperado = [format_currency_brl(v) for v in lista]
+        por_valor.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        textos = format_currency_brl_array(valores)
+        em_lote.append(time.perf_counter() - inicio)
+    iguais = textos.tolist() == esperado
+    print(f"{args.valores} valores: por valor {min(por_valor) * 1000:8.1f} ms   em lote {min(em_lote) * 1000:8.1f} ms   {min(por_valor) / min(em_lote):5.1f}x")
+    print(f"textos idênticos a format_currency_brl: {'ok' if iguais else 'DIVERGENTE'}")
+    return 0 if iguais else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from irpfm import reconcile_year
+from partners import allocate_dividends_batch, compute_scenario_partners
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo do ajuste anual do IRPFM por sócio")
+    parser.add_argument("--empresas", type=int, default=10_000)
+    parser.add_argument("--socios-por-empresa", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    forma = (args.empresas, 12)
+    faturamento = rng.uniform(100_000, 2_000_000, forma)
+    despesas = faturamento * rng.uniform(0.2, 0.6, forma)
+    pro_labore = faturamento * 0.05
+    dividendos = (faturamento - despesas - pro_labore) * 0.66 * rng.uniform(0.3, 1.0, forma)
+    participacoes = rng.uniform(0, 1, (args.empresas, args.socios_por_empresa))
+    dividendos_socios = allocate_dividends_batch(dividendos.reshape(-1), np.repeat(participacoes, 12, axis=0)).reshape(*forma, -1)
+    outros = rng.uniform(0, 400_000, (args.empresas, args.socios_por_empresa))
+
+    inicio = time.perf_counter()
+    mensal = compute_scenario_partners(faturamento, despesas, pro_labore, dividendos_socios)
+    meio = time.perf_counter()
+    anual = reconcile_year(mensal, outros_rendimentos=outros, imposto_outros=outros * 0.2)
+    fim = time.perf_counter()
+    socios = args.empresas * args.socios_por_empresa
+    print(f"{args.empresas} empresas x {args.socios_por_empresa} sócios x 12 meses: cenários {(meio - inicio) * 1000:8.1f} ms, ajuste anual {(fim - meio) * 1000:8.1f} ms ({socios / (fim - meio) / 1e6:.1f} M sócios/s)")
+    print(f"a pagar: {(anual['imposto_a_pagar'] > 0).sum()} sócios   restituição: {(anual['restituicao'] > 0).sum()} sócios   redutor médio: {anual['redutor'].mean():,.2f}")
+    return 0 if np.allclose(anual["saldo"], anual["irpfm_devido"] - anual["irrf_retido"]) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
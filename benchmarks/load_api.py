@@ -0,0 +1,112 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _corpos(bulk: int):
+    rng = random.Random(0)
+    cenario = {"faturamento": 300_000, "despesas": 50_000, "pro_labore": 15_000, "dividendos_total": 200_000, "num_pf": 1}
+    par = {"num_pf": 2, "atual": cenario, "otimizado": {**cenario, "despesas": 80_000, "dividendos_total": 90_000}}
+    colunas = {k: [rng.uniform(0, 1_000_000) for _ in range(bulk)] for k in ("faturamento", "despesas", "pro_labore", "dividendos_total")}
+    colunas["num_pf"] = [rng.randint(1, 5) for _ in range(bulk)]
+    return {
+        "/validate": json.dumps(cenario).encode(),
+        "/scenario": json.dumps(cenario).encode(),
+        "/summary": json.dumps(par).encode(),
+        "/comparison": json.dumps(par).encode(),
+        "/bulk": json.dumps({"cenarios": colunas}).encode(),
+    }
+
+def _cliente(host: str, port: int, rotas, corpos, fim: float, latencias, erros) -> None:
+    # Uma conexão keep-alive por cliente, reaproveitada em todas as requisições
+    conexao = http.client.HTTPConnection(host, port, timeout=30)
+    i = 0
+    while time.perf_counter() < fim:
+        rota = rotas[i % len(rotas)]
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            conexao.request("POST", rota, corpos[rota], {"Content-Type": "application/json"})
+            resposta = conexao.getresponse()
+            resposta.read()
+            if resposta.status != 200:
+                erros.append(rota)
+        except (OSError, http.client.HTTPException):
+            erros.append(rota)
+            conexao.close()
+            conexao = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencias[rota].append((time.perf_counter() - inicio) * 1000)
+    conexao.close()
+
+def _percentil(valores, p: float) -> float:
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1] if len(valores) > 1 else valores[0]
+
+def _aguardar(host: str, port: int, timeout: float = 15.0) -> None:
+    limite = time.monotonic() + timeout
+    while True:
+        try:
+            conexao = http.client.HTTPConnection(host, port, timeout=1)
+            conexao.request("GET", "/health")
+            conexao.getresponse().read()
+            conexao.close()
+            return
+        except OSError:
+            if time.monotonic() > limite:
+                raise
+            time.sleep(0.1)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga da API: requisições/s e latências p50/p99")
+    parser.add_argument("--url", help="API já em execução; sem isso, uma instância local é iniciada")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--clientes", type=int, default=16, help="Conexões concorrentes")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument("--bulk", type=int, default=5_000, help="Cenários por requisição no /bulk")
+    parser.add_argument("--rotas", default="/validate,/scenario,/summary,/comparison,/bulk")
+    args = parser.parse_args(argv)
+
+    processo = None
+    if args.url:
+        destino = urlparse(args.url)
+        host, port = destino.hostname, destino.port or 80
+    else:
+        host, port = "127.0.0.1", args.port
+        processo = subprocess.Popen([sys.executable, os.path.join(RAIZ, "api.py"), "--port", str(port)], stdout=subprocess.DEVNULL)
+    try:
+        _aguardar(host, port)
+        rotas = args.rotas.split(",")
+        corpos = _corpos(args.bulk)
+        latencias = {r: [] for r in rotas}
+        erros = []
+        fim = time.perf_counter() + args.duracao
+        clientes = [threading.Thread(target=_cliente, args=(host, port, rotas[i % len(rotas):] + rotas[:i % len(rotas)], corpos, fim, latencias, erros)) for i in range(args.clientes)]
+        inicio = time.perf_counter()
+        for c in clientes:
+            c.start()
+        for c in clientes:
+            c.join()
+        duracao = time.perf_counter() - inicio
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+
+    total = sum(len(v) for v in latencias.values())
+    print(f"{total} requisições em {duracao:.1f} s com {args.clientes} conexões: {total / duracao:.0f} req/s, {len(erros)} erros")
+    for rota, valores in latencias.items():
+        if valores:
+            print(f"{rota:<12} {len(valores):>7} req   p50 {_percentil(valores, 50):8.2f} ms   p99 {_percentil(valores, 99):8.2f} ms")
+    return 1 if erros or not total else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _lote(rng: np.random.Generator, n: int):
+    import pyarrow as pa
+    faturamento = rng.uniform(10_000, 1_000_000, n)
+    return pa.record_batch({"faturamento": faturamento, "num_pf": rng.integers(1, 5, n), "desp_atual": faturamento * rng.uniform(0.1, 0.6, n), "pl_atual": faturamento * rng.uniform(0.01, 0.2, n), "div_atual": rng.uniform(0, 300_000, n), "desp_otim": faturamento * rng.uniform(0.3, 0.7, n), "pl_otim": faturamento * 0.06, "div_otim": rng.uniform(0, 150_000, n)})
+
+def gerar(caminho: str, linhas: int, seed: int = 0, bloco: int = 100_000) -> None:
+    # Gera a entrada em blocos, sem montar o arquivo inteiro na memória
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    rng = np.random.default_rng(seed)
+    schema = _lote(rng, 1).schema
+    with (pq.ParquetWriter(caminho, schema) if caminho.endswith(".parquet") else pa.ipc.new_file(caminho, schema)) as escritor:
+        for inicio in range(0, linhas, bloco):
+            escritor.write_batch(_lote(rng, min(bloco, linhas - inicio)))
+
+def _rss_anonimo() -> float:
+    # Memória própria do processo (sem as páginas do arquivo mapeado, que o sistema pode descartar); só no Linux
+    with open("/proc/self/status") as f:
+        for linha in f:
+            if linha.startswith("RssAnon:"):
+                return int(linha.split()[1]) / 1024
+    return 0.0
+
+def executar(entrada: str, saida: str, batch_size: int) -> dict:
+    from outofcore import run
+    amostras = [0.0]
+    parar = threading.Event()
+    def amostrar():
+        while not parar.wait(0.005):
+            amostras.append(max(amostras[-1], _rss_anonimo()))
+    if os.path.exists("/proc/self/status"):
+        threading.Thread(target=amostrar, daemon=True).start()
+    inicio = time.perf_counter()
+    linhas = run(entrada, saida, batch_size)
+    segundos = time.perf_counter() - inicio
+    parar.set()
+    # ru_maxrss vem em KB no Linux e em bytes no macOS; inclui as páginas do arquivo mapeado já lidas
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {"linhas": linhas, "segundos": segundos, "pico_rss_mb": pico, "pico_anonimo_mb": amostras[-1]}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vazão e pico de memória do processamento out-of-core (Arrow IPC/Parquet)")
+    parser.add_argument("--linhas", default="250000,1000000", help="Tamanhos de entrada, separados por vírgula")
+    parser.add_argument("--formato", choices=("arrow", "parquet"), default="arrow")
+    parser.add_argument("--batch-size", type=int, default=65_536)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--executar", nargs=2, metavar=("ENTRADA", "SAIDA"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.executar:
+        print(json.dumps(executar(*args.executar, args.batch_size)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for linhas in map(int, args.linhas.split(",")):
+            entrada = os.path.join(pasta, f"entrada_{linhas}.{args.formato}")
+            saida = os.path.join(pasta, f"saida_{linhas}.parquet")
+            gerar(entrada, linhas, args.seed)
+            # Um processo novo por tamanho: o pico de RSS de cada execução não se mistura com a geração
+            processo = subprocess.run([sys.executable, os.path.abspath(__file__), "--executar", entrada, saida, "--batch-size", str(args.batch_size)], capture_output=True, text=True, check=True)
+            r = json.loads(processo.stdout.splitlines()[-1])
+            print(f"{args.formato:<8} {r['linhas']:>10} linhas  entrada {os.path.getsize(entrada) / 2**20:8.1f} MB  saída {os.path.getsize(saida) / 2**20:8.1f} MB  {r['segundos']:8.2f} s  {r['linhas'] / r['segundos']:>10,.0f} linhas/s  pico RSS {r['pico_rss_mb']:7.1f} MB (anônimo {r['pico_anonimo_mb']:7.1f} MB)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
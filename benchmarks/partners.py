@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from partners import allocate_dividends, allocate_dividends_batch, compute_scenario_partners
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo do alocador de dividendos por sócio")
+    parser.add_argument("--socios", type=int, default=500, help="Sócios numa única empresa")
+    parser.add_argument("--empresas", type=int, default=5_000)
+    parser.add_argument("--socios-por-empresa", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    participacoes = rng.uniform(0, 1, args.socios)
+    inicio = time.perf_counter()
+    alocacao = allocate_dividends(args.socios * 40_000.0, participacoes)
+    print(f"1 empresa x {args.socios} sócios: {(time.perf_counter() - inicio) * 1000:8.2f} ms  (acima do limite: {(alocacao > 50_000).sum()})")
+
+    participacoes = rng.uniform(0, 1, (args.empresas, args.socios_por_empresa)) * (rng.uniform(size=(args.empresas, args.socios_por_empresa)) > 0.3)
+    dividendos = rng.uniform(0, 80_000 * args.socios_por_empresa, args.empresas)
+    inicio = time.perf_counter()
+    alocacao = allocate_dividends_batch(dividendos, participacoes)
+    resultado = compute_scenario_partners(dividendos * 3, dividendos * 0.5, dividendos * 0.2, alocacao)
+    print(f"{args.empresas} empresas x {args.socios_por_empresa} sócios: {(time.perf_counter() - inicio) * 1000:8.2f} ms  (empresas com IRRF: {resultado['estourou_gatilho'].sum()})")
+    return 0 if np.allclose(alocacao.sum(axis=1), dividendos) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
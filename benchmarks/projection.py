@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from projection import MESES_MAXIMO, Projection, month_year
+from utils import compute_scenario
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo da projeção 2026–2033 para muitos clientes")
+    parser.add_argument("--clientes", type=int, default=10_000)
+    parser.add_argument("--meses", type=int, default=MESES_MAXIMO)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    forma = (args.clientes, args.meses)
+    faturamento = rng.uniform(50_000, 1_000_000, forma)
+    despesas = faturamento * rng.uniform(0.1, 0.6, forma)
+    pro_labore = faturamento * rng.uniform(0.05, 0.3, forma)
+    dividendos = (faturamento - despesas - pro_labore).clip(0) * 0.66 * rng.uniform(0, 1, forma)
+    num_pf = rng.integers(1, 5, args.clientes)
+
+    inicio = time.perf_counter()
+    projecao = Projection(faturamento, despesas, pro_labore, dividendos, num_pf)
+    acumulado = projecao.impostos_acumulados
+    print(f"horizonte completo: {time.perf_counter() - inicio:8.3f} s  ({args.clientes} clientes x {args.meses} meses)")
+
+    inicio = time.perf_counter()
+    projecao.update(args.meses - 1, faturamento=faturamento[:, -1] * 1.1)
+    projecao.impostos_acumulados
+    print(f"alterar um mês:     {time.perf_counter() - inicio:8.3f} s")
+
+    inicio = time.perf_counter()
+    projecao.set_year_params(2030, aliquota_irrf_dividendos=0.15)
+    projecao.impostos_acumulados
+    print(f"alterar 2030:       {time.perf_counter() - inicio:8.3f} s")
+
+    # Conferência com o cálculo escalar para alguns clientes
+    for cliente in rng.integers(0, args.clientes, 5):
+        total = 0.0
+        for mes in range(args.meses):
+            fat = faturamento[cliente, mes] * (1.1 if mes == args.meses - 1 else 1)
+            p = projecao.params[month_year(mes)]
+            total += compute_scenario(fat, despesas[cliente, mes], pro_labore[cliente, mes], dividendos[cliente, mes], num_pf[cliente], *p)["total_impostos"]
+        if not np.isclose(total, acumulado[cliente, -1], rtol=1e-9):
+            print(f"divergência no cliente {cliente}: {total} != {acumulado[cliente, -1]}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
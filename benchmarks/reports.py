@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reports import FORMATOS, run
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vazão do gerador de relatórios por cliente")
+    parser.add_argument("--clientes", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--formato", choices=FORMATOS, default="html")
+    parser.add_argument("--chunksize", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    n = args.clientes
+    faturamento = rng.uniform(50_000, 1_000_000, n)
+    carteira = pd.DataFrame({"cliente": [f"Cliente {i}" for i in range(n)], "faturamento": faturamento, "num_pf": rng.integers(1, 5, n), "desp_atual": faturamento * rng.uniform(0.1, 0.4, n), "pl_atual": faturamento * 0.05, "div_atual": faturamento * rng.uniform(0.1, 0.5, n), "desp_otim": faturamento * rng.uniform(0.3, 0.5, n), "pl_otim": faturamento * 0.05, "div_otim": faturamento * rng.uniform(0.05, 0.3, n)})
+    with tempfile.TemporaryDirectory() as pasta:
+        entrada = Path(pasta) / "carteira.csv"
+        carteira.to_csv(entrada, index=False)
+        inicio = time.perf_counter()
+        total = run(entrada, Path(pasta) / "relatorios", args.formato, args.workers, args.chunksize)
+        duracao = time.perf_counter() - inicio
+        tamanho = sum(f.stat().st_size for f in (Path(pasta) / "relatorios").iterdir())
+    vazao = total / duracao
+    print(f"{total} relatórios {args.formato} em {duracao:.1f} s com {args.workers} processos: {vazao:.1f} relatórios/s, {tamanho / total / 1024:.0f} KB em média")
+    print(f"estimativa para 10.000 relatórios: {10_000 / vazao / 60:.1f} min")
+    return 0 if total == n else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+def _medir(at: AppTest, acao) -> float:
+    inicio = time.perf_counter()
+    acao(at)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return (time.perf_counter() - inicio) * 1000
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Latência por interação do app medida com o AppTest do Streamlit")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    at.toggle[0].set_value(False).run()
+    at.button[0].click().run()
+
+    interacoes = {
+        "editar desp_otim": lambda at, i: at.number_input(key="do").set_value(80_000.0 + 1_000 * i),
+        "editar desp_atual": lambda at, i: at.number_input(key="da").set_value(50_000.0 + 1_000 * i),
+        "mover faixa da sensibilidade": lambda at, i: at.slider(key="sens_fat").set_value((0, 1_000 + 10 * i)),
+        "digitar feedback": lambda at, i: at.text_area(key="sugestao_input").input(f"sugestão {i}"),
+    }
+    for nome, acao in interacoes.items():
+        tempos = [_medir(at, lambda at: acao(at, i + 1)) for i in range(args.repeticoes)]
+        print(f"{nome:<30} p50 {statistics.median(tempos):7.1f} ms   max {max(tempos):7.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from charts import render_tax_chart_png
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+def _render(i: int) -> int:
+    # Valores majoritariamente únicos para exercitar a renderização, não só o cache LRU
+    base = 10_000.0 + (i % 5_000) * 37.0
+    return len(render_tax_chart_png(base, base * 0.1, base * 1.1, base * 0.8, 0.0, base * 0.8))
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Soak test de memória dos gráficos sob sessões concorrentes")
+    parser.add_argument("--renders", type=int, default=10_000)
+    parser.add_argument("--sessions", type=int, default=8, help="Threads simulando sessões concorrentes")
+    parser.add_argument("--max-growth-mb", type=float, default=50.0, help="Crescimento de RSS tolerado após o aquecimento")
+    args = parser.parse_args(argv)
+
+    bloco = max(1, args.renders // 10)
+    amostras = []
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        for feitos in range(0, args.renders, bloco):
+            list(pool.map(_render, range(feitos, min(feitos + bloco, args.renders))))
+            amostras.append(rss_mb())
+            print(f"{min(feitos + bloco, args.renders):>6} renders  RSS {amostras[-1]:8.1f} MB")
+    duracao = time.perf_counter() - inicio
+    crescimento = amostras[-1] - amostras[0]
+    print(f"{args.renders / duracao:.0f} renders/s, crescimento após aquecimento: {crescimento:.1f} MB")
+    return 0 if crescimento <= args.max_growth_mb else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RAIZ, "app.py")
+PESADOS = ("pandas", "matplotlib", "smtplib", "email.mime.multipart", "pyarrow")
+
+# Executa só os imports de topo do app.py num interpretador novo
+_IMPORTS = """
+import json, sys, time
+inicio = time.perf_counter()
+import streamlit
+meio = time.perf_counter()
+exec(compile({codigo!r}, "app.py", "exec"))
+fim = time.perf_counter()
+print(json.dumps({{"streamlit": meio - inicio, "app": fim - meio, "carregados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+# Primeira execução completa do script, do início do processo até a página montada
+_PRIMEIRA = """
+import json, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=300)
+meio = time.perf_counter()
+app.run()
+fim = time.perf_counter()
+if app.exception:
+    sys.exit(str(app.exception[0].value))
+print(json.dumps({{"script": fim - meio, "total": fim - inicio, "carregados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+def _imports_do_app() -> str:
+    arvore = ast.parse(open(APP, encoding="utf-8").read())
+    return "\n".join(ast.unparse(no) for no in arvore.body if isinstance(no, (ast.Import, ast.ImportFrom)) and not (isinstance(no, ast.Import) and no.names[0].name.startswith("streamlit")))
+
+def _rodar(codigo: str, env) -> dict:
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=env, capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Partida a frio do app: tempo de import e até a primeira página montada")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos novos por medição")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        env = {**os.environ, "PYTHONPATH": RAIZ, "SCENARIO_HISTORY_PATH": os.path.join(pasta, "historico.sqlite3")}
+        # Um processo de aquecimento compila os .pyc e aquece o cache de disco antes das medições
+        _rodar(_IMPORTS.format(codigo=_imports_do_app(), pesados=PESADOS), env)
+        imports = [_rodar(_IMPORTS.format(codigo=_imports_do_app(), pesados=PESADOS), env) for _ in range(args.repeticoes)]
+        primeiras = [_rodar(_PRIMEIRA.format(app=APP, pesados=PESADOS), env) for _ in range(args.repeticoes)]
+
+    mediana = lambda medidas, chave: statistics.median(m[chave] for m in medidas) * 1000
+    print(f"import do streamlit:            {mediana(imports, 'streamlit'):8.0f} ms (mediana de {args.repeticoes})")
+    print(f"imports de topo do app.py:      {mediana(imports, 'app'):8.0f} ms   módulos pesados carregados: {', '.join(imports[-1]['carregados']) or 'nenhum'}")
+    print(f"primeira execução do script:    {mediana(primeiras, 'script'):8.0f} ms   módulos pesados após a página: {', '.join(primeiras[-1]['carregados']) or 'nenhum'}")
+    print(f"processo novo até a 1ª página:  {mediana(primeiras, 'total'):8.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
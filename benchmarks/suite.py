@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+APP = os.path.join(RAIZ, "app.py")
+BASELINE = os.path.join(RAIZ, "benchmarks", "baseline.json")
+# Latências comparadas com a baseline. Cada amostra dos micro-benchmarks já é a média de um lote, e a
+# cauda deles mede mais a interferência da máquina que o código; o p99 de poucas amostras oscila demais
+LATENCIAS = {"micro": ("p50",), "app": ("p50", "p95")}
+MEMORIA = "memoria_kb"
+
+def _percentis(valores: List[float]) -> Dict[str, float]:
+    if len(valores) < 2:
+        return {"p50": valores[0], "p95": valores[0], "p99": valores[0]}
+    q = statistics.quantiles(valores, n=100, method="inclusive")
+    return {"p50": q[49], "p95": q[94], "p99": q[98]}
+
+def _rss_kb() -> float:
+    # RSS atual no Linux; fora dele, o pico do processo (ru_maxrss em KB no Linux, bytes no macOS)
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return float(linha.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform == "darwin" else 1)
+
+def micro(lotes: int = 200, chamadas: int = 200) -> Dict[str, Dict[str, float]]:
+    # Tempo por chamada (µs) de cada lote de chamadas e pico de alocação (tracemalloc) de um lote
+    from utils import compute_scenario, create_comparison_table, format_currency_brl, validate_inputs
+    atual = compute_scenario(300_000, 50_000, 15_000, 200_000, 2)
+    otimizado = compute_scenario(300_000, 80_000, 15_000, 90_000, 2)
+    casos: Dict[str, Callable[[int], object]] = {
+        "compute_scenario": lambda i: compute_scenario(300_000.0 + i, 50_000.0, 15_000.0, 200_000.0, 2),
+        "validate_inputs": lambda i: validate_inputs(300_000.0 + i, 50_000.0, 15_000.0, 200_000.0),
+        "format_currency_brl": lambda i: format_currency_brl(1_234_567.89 + i),
+        "create_comparison_table": lambda i: create_comparison_table(atual, otimizado),
+    }
+    resultados = {}
+    for nome, caso in casos.items():
+        # create_comparison_table monta um DataFrame por chamada: menos chamadas por lote
+        n = max(chamadas // 10, 1) if nome == "create_comparison_table" else chamadas
+        for i in range(n):
+            caso(i)
+        tempos = []
+        for _ in range(lotes):
+            inicio = time.perf_counter()
+            for i in range(n):
+                caso(i)
+            tempos.append((time.perf_counter() - inicio) / n * 1e6)
+        tracemalloc.start()
+        for i in range(n):
+            caso(i)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        resultados[nome] = {**_percentis(tempos), "unidade": "us", MEMORIA: pico / 1024}
+    return resultados
+
+def _sessao(indice: int, cliques: int, largada: threading.Barrier, latencias: List[float], erros: List[str]) -> None:
+    from streamlit.testing.v1 import AppTest
+    try:
+        at = AppTest.from_file(APP, default_timeout=300).run()
+        botao = next(b for b in at.button if b.label.startswith("🧮"))
+        largada.wait()
+        for clique in range(cliques):
+            # Cada clique com um faturamento diferente, para não cair só nos caches do app; em torno do
+            # padrão, onde os dividendos atuais cabem no lucro e a otimização automática tem solução
+            at.number_input(key="fat").set_value(300_000.0 + 1_000.0 * (indice * cliques + clique))
+            inicio = time.perf_counter()
+            botao.click()
+            at.run()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if at.exception:
+                erros.append(str(at.exception[0].value))
+            botao = next(b for b in at.button if b.label.startswith("🧮"))
+    except Exception as e:
+        erros.append(repr(e))
+        largada.abort()
+
+def sessions(n: int = 4, cliques: int = 5) -> Dict[str, Dict[str, float]]:
+    # N sessões do AppTest no mesmo processo, como um servidor do Streamlit atende sessões em threads
+    # com os caches compartilhados; a largada é sincronizada depois que todas montaram a primeira página.
+    # Uma sessão de aquecimento carrega os módulos antes, para a memória medida ser a das sessões
+    from streamlit import config
+    # O AppTest liga global.appTest só durante a própria execução, trocando config.get_option por um
+    # mock que restaura ao terminar; com sessões sobrepostas, uma desligaria a opção no meio da execução
+    # da outra e a última poderia deixar o mock de outra no lugar. A suíte liga a opção uma vez para
+    # todas e devolve, no fim, o valor e a função originais
+    get_option = config.get_option
+    anterior = get_option("global.appTest")
+    config.set_option("global.appTest", True)
+    latencias: List[float] = []
+    erros: List[str] = []
+    parar = threading.Event()
+    try:
+        _sessao(-1, 1, threading.Barrier(1), [], erros)
+        base = _rss_kb()
+        largada = threading.Barrier(n)
+        pico = [base]
+        def amostrar():
+            while not parar.wait(0.01):
+                pico[0] = max(pico[0], _rss_kb())
+        threading.Thread(target=amostrar, daemon=True).start()
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=_sessao, args=(i, cliques, largada, latencias, erros)) for i in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - inicio
+    finally:
+        parar.set()
+        config.get_option = get_option
+        config.set_option("global.appTest", anterior)
+    if erros or not latencias:
+        raise RuntimeError(f"falha nas sessões: {erros[0] if erros else 'nenhum clique medido'}")
+    return {f"{n}_sessoes": {**_percentis(latencias), "unidade": "ms", MEMORIA: (max(pico[0], _rss_kb()) - base) / n, "cliques_por_s": len(latencias) / duracao}}
+
+def _maquina() -> Dict[str, object]:
+    return {"python": platform.python_version(), "sistema": platform.platform(), "cpus": os.cpu_count()}
+
+def machine_mismatch(maquina: Dict) -> List[str]:
+    # Tempos de outro interpretador (versão major.minor) ou de outro número de CPUs não são comparáveis
+    atual = _maquina()
+    diferencas = []
+    versao = lambda v: ".".join(str(v).split(".")[:2])
+    if versao(maquina.get("python")) != versao(atual["python"]):
+        diferencas.append(f"Python {maquina.get('python')} na baseline, {atual['python']} aqui")
+    if maquina.get("cpus") != atual["cpus"]:
+        diferencas.append(f"{maquina.get('cpus')} CPUs na baseline, {atual['cpus']} aqui")
+    return diferencas
+
+def compare(resultados: Dict, baseline: Dict, tolerancia: float, tolerancia_memoria: float) -> List[str]:
+    regressoes = []
+    for grupo, casos in resultados.items():
+        for nome, atual in casos.items():
+            referencia = baseline.get(grupo, {}).get(nome)
+            if referencia is None:
+                continue
+            for metrica, limite in [(m, tolerancia) for m in LATENCIAS.get(grupo, ())] + [(MEMORIA, tolerancia_memoria)]:
+                if metrica in referencia and atual[metrica] > referencia[metrica] * (1 + limite):
+                    regressoes.append(f"{grupo}/{nome} {metrica}: {atual[metrica]:.2f} > {referencia[metrica]:.2f} (+{limite:.0%})")
+    return regressoes
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks: funções do cálculo e sessões concorrentes do app, comparadas com a baseline")
+    parser.add_argument("--sessoes", type=int, default=4, help="Sessões do AppTest em paralelo")
+    parser.add_argument("--cliques", type=int, default=5, help="Cliques em Calcular por sessão")
+    parser.add_argument("--lotes", type=int, default=200, help="Lotes medidos por micro-benchmark")
+    parser.add_argument("--so-micro", action="store_true", help="Pula as sessões do app (sem Streamlit)")
+    parser.add_argument("--baseline", default=BASELINE, help="JSON com os resultados de referência desta máquina")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os resultados como nova baseline em vez de comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.5, help="Piora aceita nas latências comparadas (fração)")
+    parser.add_argument("--tolerancia-memoria", type=float, default=0.25, help="Piora aceita na memória (fração)")
+    parser.add_argument("--saida", help="Grava os resultados desta execução em JSON")
+    args = parser.parse_args(argv)
+
+    resultados = {"micro": micro(args.lotes)}
+    if not args.so_micro:
+        with tempfile.TemporaryDirectory() as pasta:
+            # Histórico, fila de feedback e eventos do app ficam numa pasta descartável
+            os.environ.update({"SCENARIO_HISTORY_PATH": os.path.join(pasta, "historico.sqlite3"), "FEEDBACK_QUEUE_PATH": os.path.join(pasta, "feedback.sqlite3"), "ANALYTICS_LOG": os.path.join(pasta, "eventos.log")})
+            resultados["app"] = sessions(args.sessoes, args.cliques)
+
+    for grupo, casos in resultados.items():
+        for nome, r in casos.items():
+            extra = f"   {r['cliques_por_s']:6.2f} cliques/s" if "cliques_por_s" in r else ""
+            print(f"{grupo:<6} {nome:<24} p50 {r['p50']:10.2f} {r['unidade']}   p95 {r['p95']:10.2f} {r['unidade']}   p99 {r['p99']:10.2f} {r['unidade']}   memória {r[MEMORIA]:10.1f} KB{extra}")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+    if args.salvar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"maquina": _maquina(), **resultados}, f, indent=2)
+            f.write("\n")
+        print(f"✅ Baseline gravada em {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ Sem baseline em {args.baseline}; rode com --salvar-baseline para criar uma")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    diferencas = machine_mismatch(baseline.get("maquina", {}))
+    if diferencas:
+        print(f"⚠️ Baseline de outro ambiente ({'; '.join(diferencas)}): comparação pulada. Rode com --salvar-baseline neste ambiente")
+        return 0
+    regressoes = compare(resultados, baseline, args.tolerancia, args.tolerancia_memoria)
+    for r in regressoes:
+        print(f"❌ Regressão: {r}", file=sys.stderr)
+    if not regressoes:
+        print("✅ Sem regressões em relação à baseline")
+    return 1 if regressoes else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
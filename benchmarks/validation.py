@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from batch import ALERTAS_ERRO, MENSAGENS_ALERTA, alert_messages, validate_inputs_batch
+from utils import validate_inputs
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo da validação vetorizada com códigos de alerta")
+    parser.add_argument("--linhas", type=int, default=10_000_000)
+    parser.add_argument("--conferir", type=int, default=100_000, help="Linhas conferidas contra validate_inputs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    faturamento = rng.uniform(-10_000, 1_000_000, args.linhas)
+    faturamento[rng.random(args.linhas) < 0.01] = 0.0
+    despesas = faturamento * rng.uniform(0, 1.2, args.linhas)
+    pro_labore = faturamento * rng.uniform(0, 0.2, args.linhas)
+    dividendos = rng.uniform(0, 400_000, args.linhas)
+
+    inicio = time.perf_counter()
+    codigos = validate_inputs_batch(faturamento, despesas, pro_labore, dividendos)
+    meio = time.perf_counter()
+    invalidas = int(((codigos & ALERTAS_ERRO) != 0).sum())
+    contagem = {bit: int(((codigos & bit) != 0).sum()) for bit in MENSAGENS_ALERTA}
+    fim = time.perf_counter()
+    print(f"{args.linhas} linhas: códigos {(meio - inicio) * 1000:8.1f} ms ({args.linhas / (meio - inicio) / 1e6:.1f} M linhas/s), contagens {(fim - meio) * 1000:8.1f} ms, {invalidas} inválidas")
+    for bit, n in contagem.items():
+        print(f"  {bit:>3} {n:>10}  {MENSAGENS_ALERTA[bit]}")
+
+    # Textos só para uma página exibida, e conferência contra a versão de um cenário
+    inicio = time.perf_counter()
+    pagina = alert_messages(codigos[:1_000])
+    print(f"mensagens de 1000 linhas: {(time.perf_counter() - inicio) * 1000:.2f} ms")
+    n = min(args.conferir, args.linhas)
+    mensagens = alert_messages(codigos[:n])
+    esperado = [validate_inputs(*linha) for linha in zip(faturamento[:n].tolist(), despesas[:n].tolist(), pro_labore[:n].tolist(), dividendos[:n].tolist())]
+    iguais = all(((c & ALERTAS_ERRO) == 0, m) == e for c, m, e in zip(codigos[:n].tolist(), mensagens, esperado)) and pagina.size == min(1_000, args.linhas)
+    print(f"conferência com validate_inputs em {n} linhas: {'ok' if iguais else 'DIVERGENTE'}")
+    return 0 if iguais else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
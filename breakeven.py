@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from batch import ArrayLike, _clamp
+from regimes import ANEXO_III, compute_regime_batch
+
+# Busca da receita: grade log-espaçada para achar o primeiro cruzamento e bisseção dentro dele
+PONTOS_GRADE = 64
+ITERACOES = 50
+FATURAMENTO_MAXIMO = 100_000_000.0
+# Teto mensal do Simples (RBT12 / 12)
+FATURAMENTO_MAXIMO_SIMPLES = float(ANEXO_III.tetos[-1]) / 12
+
+def _opcao_por_linha(valor) -> bool:
+    return valor is not None and not isinstance(valor, str)
+
+def max_tax_free_dividend(num_pf: ArrayLike, limite_dividendos_pf: ArrayLike = 50_000.0, lucro_disponivel: Optional[ArrayLike] = None) -> np.ndarray:
+    # O gatilho é estrito (dividendos por PF > limite): limite × sócios ainda sai sem IRRF.
+    # Com o lucro após os tributos da empresa informado, o teto é também o que há para distribuir
+    maximo = np.asarray(limite_dividendos_pf, dtype=float) * _clamp(np.asarray(num_pf, dtype=float), 1.0)
+    if lucro_disponivel is not None:
+        maximo = np.minimum(maximo, _clamp(np.asarray(lucro_disponivel, dtype=float), 0.0))
+    return maximo
+
+def breakeven_despesas(faturamento: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike, num_pf: ArrayLike, regime: str = "Lucro Presumido", aliquota_irpj_csll: ArrayLike = 0.34, limite_dividendos_pf: ArrayLike = 50_000.0, aliquota_irrf_dividendos: ArrayLike = 0.10, **opcoes) -> np.ndarray:
+    # Despesas a partir das quais o Lucro Real paga menos que `regime`. O tributo do Presumido e do
+    # Simples não depende das despesas e o IRRF é o mesmo nos dois lados, então o equilíbrio sai de
+    # a × (F − D − P) = tributo: D = F − P − tributo / a. Zero quando o Real já ganha sem despesas;
+    # NaN acima do teto do Simples
+    alternativo = compute_regime_batch(regime, faturamento, 0.0, pro_labore, dividendos_total, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, **opcoes)
+    base = _clamp(alternativo["faturamento"] - alternativo["pro_labore"], 0.0)
+    aliquota = np.broadcast_to(np.asarray(aliquota_irpj_csll, dtype=float), base.shape)
+    tributo = alternativo["irpj_csll"]
+    despesas = np.divide(tributo, aliquota, out=np.full(base.shape, np.inf), where=aliquota > 0)
+    return np.where(np.isnan(tributo), np.nan, np.clip(base - despesas, 0.0, None))
+
+def revenue_for_load(carga_alvo: ArrayLike, despesas: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike, num_pf: ArrayLike, regime: str = "Lucro Real", aliquota_irpj_csll: ArrayLike = 0.34, limite_dividendos_pf: ArrayLike = 50_000.0, aliquota_irrf_dividendos: ArrayLike = 0.10, faturamento_maximo: Optional[float] = None, **opcoes) -> np.ndarray:
+    # Menor faturamento mensal, a partir de despesas + pró-labore (empresa sem prejuízo), em que a
+    # carga efetiva (%) chega ao alvo; NaN quando não chega dentro do teto
+    carga_alvo, despesas, pro_labore, dividendos_total, num_pf = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (carga_alvo, despesas, pro_labore, dividendos_total, num_pf)))
+    forma = carga_alvo.shape
+    alvo = carga_alvo.reshape(-1) / 100
+    minimo = np.maximum(_clamp(despesas, 0.0) + _clamp(pro_labore, 0.0), 1.0).reshape(-1)
+    entradas = [v.reshape(-1) for v in (despesas, pro_labore, dividendos_total, num_pf)]
+    taxas = [np.broadcast_to(np.asarray(t, dtype=float), forma).reshape(-1) for t in (aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)]
+    if regime == "Lucro Real":
+        # Com lucro, carga = a − (a(D + P) − I) / F: fórmula fechada
+        irrf = compute_regime_batch(regime, 0.0, 0.0, 0.0, entradas[2], entradas[3], *taxas)["irrf_dividendos"]
+        a = taxas[0]
+        carga_minimo = irrf / minimo
+        numerador = a * minimo - irrf
+        faturamento = np.divide(numerador, a - alvo, out=np.full(alvo.shape, np.nan), where=(a > alvo) & (numerador > 0))
+        faturamento = np.where(carga_minimo >= alvo, minimo, faturamento)
+        if faturamento_maximo is not None:
+            faturamento = np.where(faturamento <= faturamento_maximo, faturamento, np.nan)
+        return faturamento.reshape(forma)
+    maximo = faturamento_maximo or (FATURAMENTO_MAXIMO_SIMPLES if regime == "Simples Nacional" else FATURAMENTO_MAXIMO)
+    # Opções numéricas (folha_12m, rbt12) podem vir por linha, como as entradas
+    por_linha = {k: np.broadcast_to(np.asarray(v, dtype=float), forma).reshape(-1) for k, v in opcoes.items() if _opcao_por_linha(v)}
+    fixas = {k: v for k, v in opcoes.items() if k not in por_linha}
+    def excesso(faturamento: np.ndarray, linhas) -> np.ndarray:
+        colunas = [v[linhas].reshape(-1, *([1] * (faturamento.ndim - 1))) for v in (*entradas, *taxas)]
+        extras = {k: v[linhas].reshape(colunas[0].shape) for k, v in por_linha.items()}
+        carga = compute_regime_batch(regime, faturamento, *colunas, **fixas, **extras)["carga_efetiva"] / 100
+        return carga - alvo[linhas].reshape(colunas[0].shape)
+    # Primeiro ponto da grade que atinge o alvo, linha a linha
+    passos = np.linspace(0.0, 1.0, PONTOS_GRADE)
+    grade = minimo[:, None] * (maximo / minimo[:, None]) ** passos[None, :]
+    todas = np.arange(alvo.size)
+    atingiu = excesso(grade, todas) >= 0
+    atingiu &= np.isfinite(grade)
+    primeiro = atingiu.argmax(axis=1)
+    encontrado = atingiu[todas, primeiro] & (minimo <= maximo)
+    faturamento = np.full(alvo.size, np.nan)
+    faturamento[encontrado & (primeiro == 0)] = minimo[encontrado & (primeiro == 0)]
+    linhas = np.flatnonzero(encontrado & (primeiro > 0))
+    baixo = grade[linhas, primeiro[linhas] - 1]
+    alto = grade[linhas, primeiro[linhas]]
+    for _ in range(ITERACOES):
+        meio = (baixo + alto) / 2
+        acima = excesso(meio, linhas) >= 0
+        alto = np.where(acima, meio, alto)
+        baixo = np.where(acima, baixo, meio)
+    faturamento[linhas] = alto
+    return faturamento.reshape(forma)
+
+class BreakevenIndex:
+    # Respostas memorizadas por conjunto de parâmetros tributários (regime, alíquotas, limite e opções do
+    # regime) e, dentro dele, por entradas da consulta: repetir uma pergunta é um acesso a dicionário.
+    # As perguntas novas de um lote são resolvidas juntas numa única chamada vetorizada
+    def __init__(self, max_parametros: int = 32):
+        self.max_parametros = max_parametros
+        self._entradas: "OrderedDict[Tuple, Dict[str, Dict[Tuple, float]]]" = OrderedDict()
+        self._lock = Lock()
+
+    def _entrada(self, chave: Tuple) -> Dict[str, Dict[Tuple, float]]:
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                entrada = self._entradas[chave] = {"dividendo": {}, "despesas": {}, "faturamento": {}}
+                while len(self._entradas) > self.max_parametros:
+                    self._entradas.popitem(last=False)
+            else:
+                self._entradas.move_to_end(chave)
+            return entrada
+
+    @staticmethod
+    def _opcoes(opcoes: Dict) -> Tuple[Tuple, Tuple[str, ...]]:
+        # Opções de texto (atividade) entram na chave do conjunto de parâmetros; as numéricas, que podem
+        # ser vetores (folha_12m=np.array(...)), viram colunas da consulta, como as entradas
+        fixas = tuple(sorted((k, v) for k, v in opcoes.items() if not _opcao_por_linha(v)))
+        return fixas, tuple(sorted(k for k, v in opcoes.items() if _opcao_por_linha(v)))
+
+    @staticmethod
+    def _completar(memo: Dict[Tuple, float], colunas: Tuple[ArrayLike, ...], calcular: Callable[..., np.ndarray]) -> np.ndarray:
+        colunas = np.broadcast_arrays(*(np.asarray(c, dtype=float) for c in colunas))
+        chaves = list(zip(*(c.reshape(-1).tolist() for c in colunas)))
+        novas = list(dict.fromkeys(k for k in chaves if k not in memo))
+        if novas:
+            memo.update(zip(novas, calcular(*np.array(novas).T).tolist()))
+        return np.array([memo[k] for k in chaves]).reshape(colunas[0].shape)
+
+    def max_tax_free_dividend(self, num_pf: ArrayLike, lucro_disponivel: ArrayLike = np.inf, limite_dividendos_pf: float = 50_000.0) -> np.ndarray:
+        memo = self._entrada(("dividendo", float(limite_dividendos_pf)))["dividendo"]
+        return self._completar(memo, (num_pf, lucro_disponivel), lambda n, lucro: max_tax_free_dividend(n, limite_dividendos_pf, lucro))
+
+    def breakeven_despesas(self, faturamento: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike, num_pf: ArrayLike, regime: str = "Lucro Presumido", aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10, **opcoes) -> np.ndarray:
+        taxas = (float(aliquota_irpj_csll), float(limite_dividendos_pf), float(aliquota_irrf_dividendos))
+        fixas, nomes = self._opcoes(opcoes)
+        memo = self._entrada((regime, *taxas, *fixas, nomes))["despesas"]
+        return self._completar(memo, (faturamento, pro_labore, dividendos_total, num_pf, *(opcoes[k] for k in nomes)), lambda f, p, v, n, *extras: breakeven_despesas(f, p, v, n, regime, *taxas, **dict(fixas), **dict(zip(nomes, extras))))
+
+    def revenue_for_load(self, carga_alvo: ArrayLike, despesas: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike, num_pf: ArrayLike, regime: str = "Lucro Real", aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10, **opcoes) -> np.ndarray:
+        taxas = (float(aliquota_irpj_csll), float(limite_dividendos_pf), float(aliquota_irrf_dividendos))
+        fixas, nomes = self._opcoes(opcoes)
+        memo = self._entrada((regime, *taxas, *fixas, nomes))["faturamento"]
+        return self._completar(memo, (carga_alvo, despesas, pro_labore, dividendos_total, num_pf, *(opcoes[k] for k in nomes)), lambda c, d, p, v, n, *extras: revenue_for_load(c, d, p, v, n, regime, *taxas, **dict(fixas), **dict(zip(nomes, extras))))
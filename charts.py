@@ -0,0 +1,71 @@
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, Sequence
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Figuras criadas sem pyplot não entram no registro global e são liberadas ao sair do escopo. Cada
+# renderização usa só a própria figura (o matplotlib guarda as fontes FreeType por thread), então sessões
+# concorrentes renderizam em paralelo, sem lock
+
+def _to_png(fig: Figure, dpi: int = 100) -> bytes:
+    FigureCanvasAgg(fig)
+    buffer = BytesIO()
+    try:
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight", pil_kwargs={"compress_level": 1})
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+def draw_tax_chart(fig: Figure, v_atual: Sequence[float], v_otim: Sequence[float]) -> None:
+    fig.patch.set_facecolor('white')
+    ax = fig.subplots()
+    ax.set_facecolor('#f8fafc')
+
+    cats = ["IRPJ + CSLL", "IRRF Dividendos", "TOTAL"]
+    x = range(3)
+    w = 0.35
+
+    bars1 = ax.bar([i-w/2 for i in x], v_atual, w, label="Cenário Atual", color="#ef4444", alpha=0.85, edgecolor='white', linewidth=2)
+    bars2 = ax.bar([i+w/2 for i in x], v_otim, w, label="Cenário Otimizado", color="#1e3a5f", alpha=0.85, edgecolor='white', linewidth=2)
+
+    ax.set_xlabel("Categoria de Imposto", fontsize=13, fontweight='600', color='#1e3a5f')
+    ax.set_ylabel("Valor (R$)", fontsize=13, fontweight='600', color='#1e3a5f')
+    ax.set_title("Comparação de Impostos: Atual vs Otimizado", fontsize=16, fontweight='700', color='#1e3a5f', pad=20)
+    ax.set_xticks(x)
+    ax.set_xticklabels(cats, fontsize=11)
+    ax.legend(frameon=True, fancybox=True, shadow=True, fontsize=11)
+    ax.grid(axis="y", alpha=0.2, linestyle='--')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+    for bars in [bars1, bars2]:
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width() / 2.0, height, f"R$ {height:,.0f}",
+                   ha="center", va="bottom", fontsize=10, fontweight='600')
+
+@lru_cache(maxsize=256)
+def render_tax_chart_png(irpj_atual: float, irrf_atual: float, total_atual: float, irpj_otim: float, irrf_otim: float, total_otim: float) -> bytes:
+    fig = Figure(figsize=(12, 6))
+    draw_tax_chart(fig, [irpj_atual, irrf_atual, total_atual], [irpj_otim, irrf_otim, total_otim])
+    return _to_png(fig)
+
+def render_sensitivity_png(grade: Dict[str, np.ndarray], faturamentos: np.ndarray, dividendos: np.ndarray) -> bytes:
+    fig = Figure(figsize=(14, 5.5))
+    axes = fig.subplots(1, 2)
+    extent = [faturamentos[0] / 1_000, faturamentos[-1] / 1_000, dividendos[0] / 1_000, dividendos[-1] / 1_000]
+    for ax, (chave, titulo, rotulo) in zip(axes, [("total_impostos", "Total de Impostos", "R$"), ("carga_efetiva", "Carga Efetiva", "%")]):
+        # Faturamentos próximos de zero explodem a carga efetiva; o percentil 98 preserva o contraste
+        vmax = float(np.percentile(grade[chave], 98)) if chave == "carga_efetiva" else None
+        im = ax.imshow(grade[chave], origin="lower", aspect="auto", extent=extent, cmap="RdYlBu_r", vmax=vmax)
+        fig.colorbar(im, ax=ax, label=rotulo)
+        if dividendos[0] <= grade["gatilho"] <= dividendos[-1]:
+            ax.axhline(grade["gatilho"] / 1_000, color="#1e3a5f", linestyle="--", linewidth=1.5, label="Gatilho IRRF")
+            ax.legend(loc="upper right", fontsize=9)
+        ax.set_title(titulo, fontsize=13, fontweight='700', color='#1e3a5f')
+        ax.set_xlabel("Faturamento (R$ mil)", fontsize=11, color='#1e3a5f')
+        ax.set_ylabel("Dividendos (R$ mil)", fontsize=11, color='#1e3a5f')
+    fig.tight_layout()
+    return _to_png(fig)
@@ -0,0 +1,149 @@
+import argparse
+import os
+import sqlite3
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+import pandas as pd
+from batch import ALERTAS_ERRO, COLUNAS_ENTRADA, RATE_COLUMNS, SCENARIO_COLUMNS, alert_messages, validate_inputs_batch
+from history import save_history
+from regimes import REGIMES, compute_regime_batch
+
+EXTENSOES_ARROW = (".arrow", ".feather", ".ipc", ".arrows")
+# Lidas sempre como float: um chunk só com inteiros não pode fixar int64 no esquema do Parquet de saída
+COLUNAS_NUMERICAS = (*COLUNAS_ENTRADA, *RATE_COLUMNS, "rbt12", "folha_12m")
+
+def read_chunks(caminho: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    if caminho.suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
+        arquivo = pq.ParquetFile(caminho)
+        for lote in arquivo.iter_batches(batch_size=chunksize):
+            df = lote.to_pandas()
+            yield df.astype({c: float for c in COLUNAS_NUMERICAS if c in df.columns})
+    else:
+        yield from pd.read_csv(caminho, chunksize=chunksize, dtype={c: float for c in COLUNAS_NUMERICAS})
+
+def process_chunk(df: pd.DataFrame, taxas: Dict[str, float], regime: str = "Lucro Real") -> pd.DataFrame:
+    faltando = [c for c in COLUNAS_ENTRADA if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    parametros = {k: (df[k].to_numpy(dtype=float) if k in df.columns else v) for k, v in taxas.items()}
+    # No Simples, RBT12 e folha de 12 meses por cliente entram no lugar da anualização do mês
+    opcoes = {k: df[k].to_numpy(dtype=float) for k in ("rbt12", "folha_12m") if k in df.columns} if regime == "Simples Nacional" else {}
+    saida = {}
+    for cenario in ("atual", "otim"):
+        desp, pl, div = df[f"desp_{cenario}"], df[f"pl_{cenario}"], df[f"div_{cenario}"]
+        codigos = validate_inputs_batch(df["faturamento"].to_numpy(dtype=float), desp.to_numpy(dtype=float), pl.to_numpy(dtype=float), div.to_numpy(dtype=float))
+        resultado = compute_regime_batch(regime, df["faturamento"].to_numpy(dtype=float), desp.to_numpy(dtype=float), pl.to_numpy(dtype=float), div.to_numpy(dtype=float), df["num_pf"].to_numpy(dtype=float), **parametros, **opcoes)
+        for coluna in SCENARIO_COLUMNS:
+            saida[f"{cenario}_{coluna}"] = resultado[coluna]
+        saida[f"{cenario}_valido"] = (codigos & ALERTAS_ERRO) == 0
+        saida[f"{cenario}_alertas"] = alert_messages(codigos)
+        saida[f"{cenario}_codigo_alertas"] = codigos
+    resultado = pd.DataFrame(saida, index=df.index)
+    resultado["economia_mensal"] = resultado["atual_total_impostos"] - resultado["otim_total_impostos"]
+    resultado["economia_anual"] = resultado["economia_mensal"] * 12
+    return pd.concat([df, resultado], axis=1)
+
+def _serializar(df: pd.DataFrame, taxas: Dict[str, float], parquet: bool, regime: str = "Lucro Real", historico: Optional[Path] = None):
+    # A serialização roda no worker para não virar gargalo no processo principal
+    resultado = process_chunk(df, taxas, regime)
+    if historico is not None:
+        save_history(historico, resultado, taxas, regime)
+    if parquet:
+        import pyarrow as pa
+        return len(resultado), pa.Table.from_pandas(resultado, preserve_index=False)
+    return len(resultado), (list(resultado.columns), resultado.to_csv(index=False, header=False))
+
+def _em_ordem(chunks: Iterator[pd.DataFrame], taxas: Dict[str, float], workers: int, parquet: bool, regime: str = "Lucro Real", historico: Optional[Path] = None) -> Iterator:
+    if workers <= 1:
+        for df in chunks:
+            yield _serializar(df, taxas, parquet, regime, historico)
+        return
+    # Janela limitada de chunks em voo: mantém a memória estável e a ordem de entrada
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pendentes = deque()
+        for df in chunks:
+            pendentes.append(pool.submit(_serializar, df, taxas, parquet, regime, historico))
+            if len(pendentes) >= workers * 2:
+                yield pendentes.popleft().result()
+        while pendentes:
+            yield pendentes.popleft().result()
+
+class _Escritor:
+    def __init__(self, caminho: Path):
+        self.caminho = caminho
+        self.parquet = caminho.suffix.lower() == ".parquet"
+        self._writer = None
+
+    def write(self, bloco) -> None:
+        if self.parquet:
+            import pyarrow.parquet as pq
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.caminho, bloco.schema)
+            self._writer.write_table(bloco.cast(self._writer.schema))
+        else:
+            colunas, texto = bloco
+            if self._writer is None:
+                self._writer = open(self.caminho, "w", newline="", encoding="utf-8")
+                pd.DataFrame(columns=colunas).to_csv(self._writer, index=False)
+            self._writer.write(texto)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+def run(entrada: Path, saida: Path, chunksize: int = 10_000, workers: int = 1, taxas: Optional[Dict[str, float]] = None, regime: str = "Lucro Real", historico: Optional[Path] = None, out_of_core: bool = False) -> int:
+    taxas = taxas or {"aliquota_irpj_csll": 0.34, "limite_dividendos_pf": 50_000.0, "aliquota_irrf_dividendos": 0.10}
+    if out_of_core and entrada.suffix.lower() not in (".parquet", *EXTENSOES_ARROW):
+        raise ValueError(f"--out-of-core requer entrada Parquet ou Arrow IPC ({', '.join(('.parquet', *EXTENSOES_ARROW))}): {entrada.name}")
+    if (out_of_core or entrada.suffix.lower() in EXTENSOES_ARROW) and workers > 1:
+        raise ValueError("O processamento out-of-core roda em um único processo; use --workers 1")
+    # Grava num temporário ao lado da saída e só renomeia no fim: uma falha no meio não deixa arquivo truncado
+    temporario = saida.with_name(f".{saida.stem}.{os.getpid()}.tmp{saida.suffix}")
+    try:
+        # Arrow IPC só tem leitura mapeada; Parquet também pode ir por ela, sem pandas e com memória limitada
+        if out_of_core or entrada.suffix.lower() in EXTENSOES_ARROW:
+            from outofcore import run as run_out_of_core
+            linhas = run_out_of_core(entrada, temporario, chunksize, taxas, regime, historico)
+        else:
+            escritor = _Escritor(temporario)
+            linhas = 0
+            try:
+                for n, bloco in _em_ordem(read_chunks(entrada, chunksize), taxas, workers, escritor.parquet, regime, historico):
+                    escritor.write(bloco)
+                    linhas += n
+            finally:
+                escritor.close()
+        os.replace(temporario, saida)
+    except BaseException:
+        temporario.unlink(missing_ok=True)
+        raise
+    return linhas
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulação em lote da Reforma Tributária a partir de arquivos CSV/Parquet")
+    parser.add_argument("entrada", type=Path, help="Arquivo CSV, Parquet ou Arrow IPC com os cenários dos clientes")
+    parser.add_argument("saida", type=Path, help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--chunksize", type=int, default=10_000, help="Linhas por bloco processado")
+    parser.add_argument("--workers", type=int, default=1, help="Processos em paralelo")
+    parser.add_argument("--regime", choices=REGIMES, default="Lucro Real", help="Regime tributário aplicado a todos os clientes")
+    parser.add_argument("--out-of-core", action="store_true", help="Lê o Parquet mapeado em memória, um lote por vez, e grava Parquet (automático para Arrow IPC)")
+    parser.add_argument("--historico", type=Path, help="Banco SQLite do histórico de cenários onde gravar os resultados")
+    parser.add_argument("--aliquota-irpj-csll", type=float, default=0.34)
+    parser.add_argument("--limite-dividendos-pf", type=float, default=50_000.0)
+    parser.add_argument("--aliquota-irrf-dividendos", type=float, default=0.10)
+    args = parser.parse_args(argv)
+    taxas = {"aliquota_irpj_csll": args.aliquota_irpj_csll, "limite_dividendos_pf": args.limite_dividendos_pf, "aliquota_irrf_dividendos": args.aliquota_irrf_dividendos}
+    try:
+        linhas = run(args.entrada, args.saida, args.chunksize, args.workers, taxas, args.regime, args.historico, args.out_of_core)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"❌ Erro: {e}", file=sys.stderr)
+        return 1
+    print(f"✅ {linhas} linhas processadas em {args.saida}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import html
+import logging
+import smtplib
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, NamedTuple, Optional, Tuple
+
+ASSUNTO = "Nova Sugestão - Simulador Reforma Tributária"
+# Recusas do servidor que dizem respeito só à mensagem; as demais falhas (conexão, login, queda)
+# valem para todo o lote
+ERROS_DA_MENSAGEM = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+logger = logging.getLogger(__name__)
+
+class SMTPConfig(NamedTuple):
+    smtp_server: str
+    smtp_port: int
+    sender_email: str
+    sender_password: str
+    receiver_email: str
+    starttls: bool = True
+
+def build_feedback_html(nome: str, email: str, cidade: str, profissao: str, sugestao: str) -> str:
+    nome, email, cidade, profissao = (html.escape(v) for v in (nome, email, cidade, profissao))
+    sugestao_html = html.escape(sugestao).replace("\n", "<br>")
+    return f"""
+        <html>
+          <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <h2 style="color: #1e3a5f;">💬 Nova Sugestão Recebida!</h2>
+            <hr style="border: 1px solid #e2e8f0;">
+
+            <h3 style="color: #2c5282;">📋 Dados do Usuário</h3>
+            <table style="width: 100%; border-collapse: collapse;">
+              <tr>
+                <td style="padding: 8px; background: #f8fafc;"><strong>Nome:</strong></td>
+                <td style="padding: 8px;">{nome}</td>
+              </tr>
+              <tr>
+                <td style="padding: 8px; background: #f8fafc;"><strong>E-mail:</strong></td>
+                <td style="padding: 8px;">{email}</td>
+              </tr>
+              <tr>
+                <td style="padding: 8px; background: #f8fafc;"><strong>Cidade:</strong></td>
+                <td style="padding: 8px;">{cidade}</td>
+              </tr>
+              <tr>
+                <td style="padding: 8px; background: #f8fafc;"><strong>Profissão:</strong></td>
+                <td style="padding: 8px;">{profissao}</td>
+              </tr>
+            </table>
+
+            <h3 style="color: #2c5282; margin-top: 20px;">💡 Sugestão/Feedback</h3>
+            <div style="background: #f0f9ff; border-left: 4px solid #1e3a5f; padding: 15px; margin: 10px 0;">
+              {sugestao_html}
+            </div>
+
+            <hr style="border: 1px solid #e2e8f0; margin-top: 30px;">
+            <p style="color: #64748b; font-size: 0.9em;">
+              🤖 Enviado automaticamente pelo Simulador Reforma Tributária 2026<br>
+              📅 {datetime.now().strftime('%d/%m/%Y às %H:%M')}
+            </p>
+          </body>
+        </html>
+        """
+
+class FeedbackQueue:
+    # Fila persistente em SQLite: o envio acontece fora da thread do Streamlit
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS fila_feedback (id INTEGER PRIMARY KEY AUTOINCREMENT, criado_em REAL NOT NULL, assunto TEXT NOT NULL, html TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pendente', tentativas INTEGER NOT NULL DEFAULT 0, proxima_tentativa REAL NOT NULL, enviado_em REAL, ultimo_erro TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fila_pendentes ON fila_feedback (status, proxima_tentativa)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def enqueue(self, nome: str, email: str, cidade: str, profissao: str, sugestao: str) -> int:
+        agora = time.time()
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute("INSERT INTO fila_feedback (criado_em, assunto, html, proxima_tentativa) VALUES (?, ?, ?, ?)", (agora, ASSUNTO, build_feedback_html(nome, email, cidade, profissao, sugestao), agora))
+            return cur.lastrowid
+
+    def due(self, limite: int) -> List[Tuple[int, str, str, int]]:
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("SELECT id, assunto, html, tentativas FROM fila_feedback WHERE status = 'pendente' AND proxima_tentativa <= ? ORDER BY id LIMIT ?", (time.time(), limite)).fetchall()
+
+    def mark_sent(self, ids: List[int]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("UPDATE fila_feedback SET status = 'enviado', enviado_em = ? WHERE id = ?", [(time.time(), i) for i in ids])
+
+    def mark_failed(self, item_id: int, tentativas: int, erro: str, proxima_tentativa: Optional[float]) -> None:
+        status = "pendente" if proxima_tentativa is not None else "falhou"
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE fila_feedback SET status = ?, tentativas = ?, ultimo_erro = ?, proxima_tentativa = COALESCE(?, proxima_tentativa) WHERE id = ?", (status, tentativas, erro, proxima_tentativa, item_id))
+
+    def counts(self) -> dict:
+        with closing(self._connect()) as conn, conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM fila_feedback GROUP BY status").fetchall())
+
+class FeedbackWorker(threading.Thread):
+    def __init__(self, queue: FeedbackQueue, config: SMTPConfig, batch_size: int = 20, max_tentativas: int = 6, backoff_base: float = 5.0, backoff_max: float = 3600.0, idle_timeout: float = 60.0, poll_interval: float = 5.0):
+        super().__init__(name="feedback-smtp", daemon=True)
+        self.queue = queue
+        self.config = config
+        self.batch_size = batch_size
+        self.max_tentativas = max_tentativas
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._parar = threading.Event()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._ultimo_uso = 0.0
+        self._falhas_conexao = 0
+        self._pausa_ate = 0.0
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._parar.set()
+        self._wake.set()
+        self.join(timeout)
+
+    def _connection(self) -> smtplib.SMTP:
+        # Reaproveita a conexão aberta; após um período ocioso, um NOOP confirma que o servidor ainda responde
+        if self._smtp is not None:
+            if time.time() - self._ultimo_uso < 10:
+                return self._smtp
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close()
+        smtp = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port, timeout=30)
+        if self.config.starttls:
+            smtp.starttls()
+        if self.config.sender_password:
+            smtp.login(self.config.sender_email, self.config.sender_password)
+        self._smtp = smtp
+        return smtp
+
+    def _close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _message(self, assunto: str, corpo: str) -> MIMEMultipart:
+        message = MIMEMultipart("alternative")
+        message["Subject"] = assunto
+        message["From"] = self.config.sender_email
+        message["To"] = self.config.receiver_email
+        message.attach(MIMEText(corpo, "html"))
+        return message
+
+    def _backoff(self, tentativas: int) -> float:
+        return min(self.backoff_max, self.backoff_base * 2 ** (tentativas - 1))
+
+    def process_once(self) -> int:
+        # Com o servidor fora do ar, o lote para na primeira falha de conexão ou envio e o worker espera
+        # (backoff crescente) antes de tentar de novo; os itens seguintes continuam pendentes
+        if time.time() < self._pausa_ate:
+            return 0
+        itens = self.queue.due(self.batch_size)
+        enviados = []
+        try:
+            for item_id, assunto, corpo, tentativas in itens:
+                try:
+                    self._connection().send_message(self._message(assunto, corpo))
+                    self._ultimo_uso = time.time()
+                    self._falhas_conexao = 0
+                    enviados.append(item_id)
+                except (smtplib.SMTPException, OSError) as e:
+                    tentativas += 1
+                    self.queue.mark_failed(item_id, tentativas, str(e), None if tentativas >= self.max_tentativas else time.time() + self._backoff(tentativas))
+                    if not isinstance(e, ERROS_DA_MENSAGEM):
+                        self._close()
+                        self._falhas_conexao += 1
+                        self._pausa_ate = time.time() + self._backoff(self._falhas_conexao)
+                        break
+        finally:
+            if enviados:
+                self.queue.mark_sent(enviados)
+        return len(enviados)
+
+    def run(self) -> None:
+        while not self._parar.is_set():
+            try:
+                while self.process_once() == self.batch_size and not self._parar.is_set():
+                    pass
+            except Exception:
+                # Qualquer erro de um ciclo fica no log; a thread segue drenando a fila no próximo
+                logger.exception("Falha ao processar a fila de feedback")
+            if self._smtp is not None and time.time() - self._ultimo_uso > self.idle_timeout:
+                self._close()
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        self._close()
@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Sequence
+import numpy as np
+from batch import SCENARIO_COLUMNS
+from utils import SCENARIO_KEYS, ScenarioResult
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Entra na chave de cada cenário: mudanças nas regras de cálculo invalidam os resultados já gravados
+VERSAO_REGRAS = "2026.2"
+ENTRADAS = ("faturamento", "despesas", "pro_labore", "dividendos_total", "num_pf")
+TAXAS = ("aliquota_irpj_csll", "limite_dividendos_pf", "aliquota_irrf_dividendos")
+# Opções do regime guardadas com cada execução (Lucro Presumido: atividade; Simples: folha além do pró-labore)
+OPCOES_EXECUCAO = {"atividade": "TEXT NOT NULL DEFAULT 'servicos'", "folha_mensal": "REAL NOT NULL DEFAULT 0"}
+# Colunas do resultado que não repetem as entradas
+SAIDAS = tuple(k for k in SCENARIO_KEYS if k not in ENTRADAS)
+
+logger = logging.getLogger(__name__)
+
+def scenario_key(regime: str, entradas: Sequence[float], taxas: Sequence[float], opcoes: Optional[Mapping] = None) -> str:
+    # Endereçamento por conteúdo: entradas idênticas (mesmo regime, valores e parâmetros) e as mesmas
+    # regras de cálculo têm a mesma chave
+    texto = "|".join([VERSAO_REGRAS, regime, *map(repr, map(float, entradas)), *map(repr, map(float, taxas)), *(f"{k}={opcoes[k]!r}" for k in sorted(opcoes or {}))])
+    return hashlib.blake2b(texto.encode(), digest_size=16).hexdigest()
+
+class ScenarioStore:
+    # Histórico local em SQLite: cenários únicos por chave de conteúdo e execuções (atual x otimizado)
+    # indexadas por cliente, data e conjunto de parâmetros
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS cenarios (id INTEGER PRIMARY KEY AUTOINCREMENT, chave TEXT NOT NULL UNIQUE, regime TEXT NOT NULL, criado_em REAL NOT NULL, {', '.join(f'{c} REAL NOT NULL' for c in (*ENTRADAS, *TAXAS, *SAIDAS))})")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cenarios_parametros ON cenarios (regime, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)")
+            conn.execute("CREATE TABLE IF NOT EXISTS execucoes (id INTEGER PRIMARY KEY AUTOINCREMENT, cliente TEXT NOT NULL, criado_em REAL NOT NULL, regime TEXT NOT NULL, aliquota_irpj_csll REAL NOT NULL, limite_dividendos_pf REAL NOT NULL, aliquota_irrf_dividendos REAL NOT NULL, chave_atual TEXT NOT NULL REFERENCES cenarios (chave), chave_otimizado TEXT NOT NULL REFERENCES cenarios (chave), atividade TEXT NOT NULL DEFAULT 'servicos', folha_mensal REAL NOT NULL DEFAULT 0)")
+            # Históricos gravados antes das opções do regime ganham as colunas com os valores padrão
+            existentes = {c for (_, c, *_) in conn.execute("PRAGMA table_info(execucoes)")}
+            for coluna, definicao in OPCOES_EXECUCAO.items():
+                if coluna not in existentes:
+                    conn.execute(f"ALTER TABLE execucoes ADD COLUMN {coluna} {definicao}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_execucoes_cliente ON execucoes (cliente, criado_em)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_execucoes_data ON execucoes (criado_em)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_execucoes_parametros ON execucoes (regime, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, chave: str) -> Optional[ScenarioResult]:
+        with closing(self._connect()) as conn, conn:
+            linha = conn.execute(f"SELECT {', '.join(SCENARIO_KEYS)} FROM cenarios WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            return None
+        valores = dict(zip(SCENARIO_KEYS, linha))
+        valores["estourou_gatilho"] = bool(valores["estourou_gatilho"])
+        return ScenarioResult(**valores)
+
+    def save(self, chave: str, regime: str, entradas: Sequence[float], taxas: Sequence[float], resultado: Mapping) -> int:
+        # Um cenário já calculado, com a chave de scenario_key sobre as mesmas entradas
+        return self.save_many(regime, {k: [v] for k, v in zip(ENTRADAS, entradas)}, {k: [resultado[k]] for k in SAIDAS}, [chave], taxas)
+
+    def save_many(self, regime: str, entradas: Mapping[str, Sequence[float]], resultados: Mapping[str, Sequence[float]], chaves: Optional[Sequence[str]] = None, taxas: Optional[Sequence] = None, opcoes: Optional[Mapping[str, Sequence]] = None) -> int:
+        # Escrita em lote: uma transação e um executemany para todo o bloco. As taxas podem ser
+        # escalares ou colunas (uma por cenário), assim como as opções do regime que entram na chave;
+        # cenários já gravados são ignorados. Cenários sem resultado (NaN, como o Simples acima do teto)
+        # não cabem nas colunas NOT NULL: ficam de fora e são avisados no log
+        n = len(entradas["faturamento"])
+        if not n:
+            return 0
+        taxas = taxas if taxas is not None else [entradas[k] for k in TAXAS]
+        colunas_taxas = [np.broadcast_to(np.asarray(t, dtype=float), (n,)) for t in taxas]
+        # A chave usa as entradas como informadas; as colunas guardam os valores já ajustados pelo cálculo
+        if chaves is None:
+            linhas = np.column_stack([np.asarray(entradas[k], dtype=float) for k in ENTRADAS] + colunas_taxas).tolist()
+            opcoes_linhas = [dict(zip(opcoes, valores)) for valores in zip(*(np.broadcast_to(v, (n,)).tolist() for v in opcoes.values()))] if opcoes else [None] * n
+            chaves = [scenario_key(regime, linha[:len(ENTRADAS)], linha[len(ENTRADAS):], o) for linha, o in zip(linhas, opcoes_linhas)]
+        colunas = [np.broadcast_to(np.asarray(resultados.get(k, entradas[k]), dtype=float), (n,)) for k in ENTRADAS] + colunas_taxas + [np.asarray(resultados[k], dtype=float) for k in SAIDAS]
+        matriz = np.column_stack(colunas)
+        validas = np.isfinite(matriz).all(axis=1)
+        if not validas.all():
+            logger.warning("%d de %d cenários sem resultado finito não foram gravados no histórico", n - int(validas.sum()), n)
+            if not validas.any():
+                return 0
+            matriz, chaves = matriz[validas], [c for c, v in zip(chaves, validas) if v]
+        linhas = matriz.tolist()
+        agora = time.time()
+        nomes = (*ENTRADAS, *TAXAS, *SAIDAS)
+        with closing(self._connect()) as conn, conn:
+            cur = conn.executemany(f"INSERT OR IGNORE INTO cenarios (chave, regime, criado_em, {', '.join(nomes)}) VALUES (?, ?, ?, {', '.join('?' * len(nomes))})", ([chave, regime, agora, *linha] for chave, linha in zip(chaves, linhas)))
+            return cur.rowcount
+
+    def record_run(self, cliente: str, regime: str, taxas: Sequence[float], chave_atual: str, chave_otimizado: str, atividade: str = "servicos", folha_mensal: float = 0.0) -> int:
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute("INSERT INTO execucoes (cliente, criado_em, regime, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, chave_atual, chave_otimizado, atividade, folha_mensal) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (cliente, time.time(), regime, *taxas, chave_atual, chave_otimizado, atividade, float(folha_mensal)))
+            return cur.lastrowid
+
+    def runs(self, cliente: Optional[str] = None, limite: int = 50) -> List[Dict]:
+        # Execuções mais recentes com os totais dos dois cenários, sem reabrir cada cenário
+        filtro, args = ("WHERE e.cliente = ?", (cliente,)) if cliente is not None else ("", ())
+        with closing(self._connect()) as conn, conn:
+            conn.row_factory = sqlite3.Row
+            linhas = conn.execute(f"SELECT e.id, e.cliente, e.criado_em, e.regime, e.aliquota_irpj_csll, e.limite_dividendos_pf, e.aliquota_irrf_dividendos, e.chave_atual, e.chave_otimizado, e.atividade, e.folha_mensal, a.faturamento, a.num_pf, a.despesas AS despesas_atual, a.pro_labore AS pro_labore_atual, a.dividendos_total AS dividendos_atual, o.despesas AS despesas_otimizado, o.pro_labore AS pro_labore_otimizado, o.dividendos_total AS dividendos_otimizado, a.total_impostos AS impostos_atual, o.total_impostos AS impostos_otimizado FROM execucoes e JOIN cenarios a ON a.chave = e.chave_atual JOIN cenarios o ON o.chave = e.chave_otimizado {filtro} ORDER BY e.criado_em DESC LIMIT ?", (*args, limite)).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def clients(self) -> List[str]:
+        with closing(self._connect()) as conn, conn:
+            return [c for (c,) in conn.execute("SELECT DISTINCT cliente FROM execucoes ORDER BY cliente")]
+
+def save_history(caminho: Path, resultado: "pd.DataFrame", taxas: Dict[str, float], regime: str = "Lucro Real") -> int:
+    # Grava os dois cenários de cada linha da saída do processamento em lote, um lote por chunk
+    store = ScenarioStore(str(caminho))
+    colunas_taxas = [resultado[k].to_numpy(dtype=float) if k in resultado.columns else v for k, v in taxas.items()]
+    opcoes = {k: resultado[k].to_numpy(dtype=float) for k in ("rbt12", "folha_12m") if k in resultado.columns} if regime == "Simples Nacional" else None
+    gravados = 0
+    for cenario in ("atual", "otim"):
+        entradas = {"faturamento": resultado["faturamento"], "despesas": resultado[f"desp_{cenario}"], "pro_labore": resultado[f"pl_{cenario}"], "dividendos_total": resultado[f"div_{cenario}"], "num_pf": resultado["num_pf"]}
+        saidas = {c: resultado[f"{cenario}_{c}"].to_numpy(dtype=float) for c in SCENARIO_COLUMNS}
+        gravados += store.save_many(regime, entradas, saidas, taxas=colunas_taxas, opcoes=opcoes)
+    return gravados
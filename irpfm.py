@@ -0,0 +1,58 @@
+from typing import Dict, Mapping
+import numpy as np
+from batch import ArrayLike
+
+# Imposto mínimo anual da pessoa física de alta renda (Lei 15.270/2025): alíquota sobe linearmente de 0%
+# em R$ 600 mil/ano a 10% a partir de R$ 1,2 milhão; o IRRF mensal de 10% é só antecipação
+LIMITE_INICIAL = 600_000.0
+LIMITE_INTEGRAL = 1_200_000.0
+ALIQUOTA_MAXIMA = 0.10
+# Soma das alíquotas nominais de IRPJ (15% + 10% adicional) e CSLL (9%) das empresas em geral
+ALIQUOTA_NOMINAL_PJ = 0.34
+
+def minimum_rate(renda_anual: ArrayLike, limite_inicial: float = LIMITE_INICIAL, limite_integral: float = LIMITE_INTEGRAL, aliquota_maxima: float = ALIQUOTA_MAXIMA) -> np.ndarray:
+    renda_anual = np.asarray(renda_anual, dtype=float)
+    return aliquota_maxima * np.clip((renda_anual - limite_inicial) / (limite_integral - limite_inicial), 0.0, 1.0)
+
+def reconcile_partners(dividendos_socios: ArrayLike, irrf_socios: ArrayLike, irpj_csll: ArrayLike, lucro_antes_impostos: ArrayLike, outros_rendimentos: ArrayLike = 0.0, imposto_outros: ArrayLike = 0.0, aliquota_nominal_pj: ArrayLike = ALIQUOTA_NOMINAL_PJ, limite_inicial: float = LIMITE_INICIAL, limite_integral: float = LIMITE_INTEGRAL, aliquota_maxima: float = ALIQUOTA_MAXIMA) -> Dict[str, np.ndarray]:
+    # Ajuste anual por sócio a partir dos resultados mensais. Formas: dividendos e IRRF dos sócios em
+    # (..., meses, sócios), IRPJ/CSLL e lucro da empresa em (..., meses); rendimentos e imposto já pago
+    # fora da empresa (pró-labore, salários) são anuais por sócio, (..., sócios) ou escalares.
+    # Saldo positivo é imposto a pagar na declaração; negativo, restituição do IRRF retido a mais
+    dividendos_socios = np.asarray(dividendos_socios, dtype=float)
+    dividendos = dividendos_socios.sum(axis=-2)
+    irrf_retido = np.asarray(irrf_socios, dtype=float).sum(axis=-2)
+    irpj_csll_anual = np.asarray(irpj_csll, dtype=float).sum(axis=-1)
+    lucro_anual = np.asarray(lucro_antes_impostos, dtype=float).sum(axis=-1)
+    renda = dividendos + np.asarray(outros_rendimentos, dtype=float)
+    aliquota = minimum_rate(renda, limite_inicial, limite_integral, aliquota_maxima)
+    irpfm_bruto = aliquota * renda
+    # Imposto já pago sobre os demais rendimentos abate o mínimo antes do redutor
+    irpfm_apurado = np.maximum(irpfm_bruto - np.asarray(imposto_outros, dtype=float), 0.0)
+    aliquota_irpfm = np.divide(irpfm_apurado, renda, out=np.zeros(np.shape(irpfm_apurado)), where=renda > 0)
+    # Redutor: a parte dos dividendos em que IRPJ/CSLL efetivos mais o IRPFM passam da alíquota nominal
+    # da empresa é devolvida, limitada ao próprio IRPFM
+    aliquota_pj = np.divide(irpj_csll_anual, lucro_anual, out=np.zeros(np.shape(lucro_anual)), where=lucro_anual > 0)[..., None]
+    excesso = np.maximum(aliquota_pj + aliquota_irpfm - np.asarray(aliquota_nominal_pj, dtype=float)[..., None], 0.0)
+    redutor = np.minimum(dividendos * excesso, irpfm_apurado)
+    irpfm_devido = irpfm_apurado - redutor
+    saldo = irpfm_devido - irrf_retido
+    return {
+        "dividendos_anuais": dividendos,
+        "outros_rendimentos": np.broadcast_to(np.asarray(outros_rendimentos, dtype=float), dividendos.shape),
+        "renda_total": renda,
+        "aliquota_minima": aliquota,
+        "irpfm_bruto": irpfm_bruto,
+        "aliquota_efetiva_pj": np.broadcast_to(aliquota_pj, dividendos.shape),
+        "redutor": redutor,
+        "irpfm_devido": irpfm_devido,
+        "irrf_retido": irrf_retido,
+        "saldo": saldo,
+        "imposto_a_pagar": np.maximum(saldo, 0.0),
+        "restituicao": np.maximum(-saldo, 0.0),
+    }
+
+def reconcile_year(mensal: Mapping[str, np.ndarray], outros_rendimentos: ArrayLike = 0.0, imposto_outros: ArrayLike = 0.0, aliquota_nominal_pj: ArrayLike = ALIQUOTA_NOMINAL_PJ) -> Dict[str, np.ndarray]:
+    # Atalho para o resultado de compute_scenario_partners com os 12 meses no penúltimo eixo
+    # (empresas x meses x sócios), como sai de faturamento em (empresas, 12)
+    return reconcile_partners(mensal["dividendos_socios"], mensal["irrf_socios"], mensal["irpj_csll"], mensal["lucro_antes_impostos"], outros_rendimentos, imposto_outros, aliquota_nominal_pj)
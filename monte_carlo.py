@@ -0,0 +1,108 @@
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple, Union
+import numpy as np
+from batch import compute_scenario_batch
+from utils import format_currency_brl
+
+# Distribuição como tupla: ("fixo", v), ("normal", media, desvio), ("lognormal", media, desvio),
+# ("uniforme", minimo, maximo) ou ("triangular", minimo, moda, maximo); números puros valem como fixos
+Distribution = Union[float, Tuple]
+PERCENTIS = (5, 25, 50, 75, 95)
+
+def _amostrar(rng: np.random.Generator, dist: Distribution, n: int) -> np.ndarray:
+    if isinstance(dist, (int, float)):
+        return np.full(n, float(dist))
+    tipo, *params = dist
+    if tipo == "fixo":
+        return np.full(n, float(params[0]))
+    if tipo == "normal":
+        return rng.normal(params[0], params[1], n)
+    if tipo == "lognormal":
+        # Parametrizada pela média e desvio da própria variável, não do log
+        media, desvio = params
+        sigma2 = np.log1p((desvio / media) ** 2)
+        return rng.lognormal(np.log(media) - sigma2 / 2, np.sqrt(sigma2), n)
+    if tipo == "uniforme":
+        return rng.uniform(params[0], params[1], n)
+    if tipo == "triangular":
+        return rng.triangular(params[0], params[1], params[2], n)
+    raise ValueError(f"Distribuição desconhecida: {tipo}")
+
+def _lote(semente: np.random.SeedSequence, n: int, faturamento: Distribution, despesas: Distribution, pro_labore: float, num_pf: int, dividendos_total: Optional[float], fracao_lucro: float, taxas: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(semente)
+    fat = _amostrar(rng, faturamento, n)
+    desp = _amostrar(rng, despesas, n)
+    if dividendos_total is None:
+        # Política de distribuir uma fração do lucro após IRPJ/CSLL do próprio mês
+        lucro = np.clip(fat - desp - pro_labore, 0, None)
+        dividendos = fracao_lucro * (1 - taxas["aliquota_irpj_csll"]) * lucro
+    else:
+        dividendos = dividendos_total
+    resultado = compute_scenario_batch(fat, desp, pro_labore, dividendos, num_pf, **taxas)
+    return resultado["estourou_gatilho"], resultado["irrf_dividendos"], resultado["total_impostos"]
+
+def simulate_irrf_risk(faturamento: Distribution, despesas: Distribution, pro_labore: float, num_pf: int = 1, dividendos_total: Optional[float] = None, fracao_lucro: float = 1.0, amostras: int = 1_000_000, chunk: int = 250_000, workers: int = 1, seed: int = 0, aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10, percentis: Sequence[int] = PERCENTIS) -> Dict:
+    # Cada bloco recebe sua própria semente derivada (SeedSequence.spawn): o resultado não depende
+    # do número de processos nem da ordem em que os blocos terminam
+    taxas = {"aliquota_irpj_csll": aliquota_irpj_csll, "limite_dividendos_pf": limite_dividendos_pf, "aliquota_irrf_dividendos": aliquota_irrf_dividendos}
+    tamanhos = [min(chunk, amostras - i) for i in range(0, amostras, chunk)]
+    sementes = np.random.SeedSequence(seed).spawn(len(tamanhos))
+    args = (faturamento, despesas, pro_labore, num_pf, dividendos_total, fracao_lucro, taxas)
+    gatilhos = 0
+    irrf = 0.0
+    impostos = np.empty(amostras)
+    if workers <= 1:
+        blocos = (_lote(s, n, *args) for s, n in zip(sementes, tamanhos))
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        blocos = pool.map(_lote, sementes, tamanhos, *([a] * len(tamanhos) for a in args))
+    try:
+        inicio = 0
+        for estourou, irrf_bloco, total in blocos:
+            gatilhos += int(estourou.sum())
+            irrf += float(irrf_bloco.sum())
+            impostos[inicio:inicio + total.size] = total
+            inicio += total.size
+    finally:
+        if workers > 1:
+            pool.shutdown()
+    return {"amostras": amostras, "prob_gatilho": gatilhos / amostras if amostras else 0.0, "irrf_esperado": irrf / amostras if amostras else 0.0, "imposto_esperado": float(impostos.mean()) if amostras else 0.0, "percentis": dict(zip(percentis, np.percentile(impostos, percentis).tolist())) if amostras else {}}
+
+def _dist(texto: str) -> Distribution:
+    tipo, *params = texto.split(":")
+    try:
+        return float(tipo) if not params else (tipo, *map(float, params))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Distribuição inválida: {texto}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Risco de disparar o IRRF sobre dividendos com faturamento incerto (Monte Carlo)")
+    parser.add_argument("--faturamento", type=_dist, required=True, help="Ex.: normal:300000:60000, lognormal:300000:60000, uniforme:200000:400000")
+    parser.add_argument("--despesas", type=_dist, required=True, help="Mesmo formato; um número é um valor fixo")
+    parser.add_argument("--pro-labore", type=float, required=True)
+    parser.add_argument("--num-pf", type=int, default=1)
+    parser.add_argument("--dividendos", type=float, help="Dividendos fixos; sem isso, distribui --fracao-lucro do lucro após IRPJ/CSLL")
+    parser.add_argument("--fracao-lucro", type=float, default=1.0)
+    parser.add_argument("--amostras", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=250_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--aliquota-irpj-csll", type=float, default=0.34)
+    parser.add_argument("--limite-dividendos-pf", type=float, default=50_000.0)
+    parser.add_argument("--aliquota-irrf-dividendos", type=float, default=0.10)
+    args = parser.parse_args(argv)
+    try:
+        r = simulate_irrf_risk(args.faturamento, args.despesas, args.pro_labore, args.num_pf, args.dividendos, args.fracao_lucro, args.amostras, args.chunk, args.workers, args.seed, args.aliquota_irpj_csll, args.limite_dividendos_pf, args.aliquota_irrf_dividendos)
+    except ValueError as e:
+        print(f"❌ Erro: {e}", file=sys.stderr)
+        return 1
+    print(f"Amostras: {r['amostras']}")
+    print(f"Probabilidade de disparar o IRRF: {r['prob_gatilho'] * 100:.2f}%")
+    print(f"IRRF esperado: {format_currency_brl(r['irrf_esperado'])}   Imposto total esperado: {format_currency_brl(r['imposto_esperado'])}")
+    print("   ".join(f"p{p}: {format_currency_brl(v)}" for p, v in r["percentis"].items()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
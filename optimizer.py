@@ -0,0 +1,43 @@
+from typing import Dict, List, Optional
+from utils import compute_scenario
+
+def _despesas_maximas(faturamento: float, pro_labore: float, retirada_total: float, desp_max: float, aliquota_irpj_csll: float, respeitar_lucro: bool) -> float:
+    # Despesas são sempre vantajosas (reduzem a base do IRPJ/CSLL); o único freio é o
+    # lucro após IRPJ/CSLL precisar cobrir os dividendos: (1 - a) * (F - D - P) >= R - P
+    dividendos = retirada_total - pro_labore
+    if not respeitar_lucro or dividendos <= 0:
+        return desp_max
+    if aliquota_irpj_csll >= 1:
+        return float("-inf")
+    return min(desp_max, faturamento - pro_labore - dividendos / (1 - aliquota_irpj_csll))
+
+def optimize_scenario(faturamento: float, num_pf: int, retirada_total: float, desp_max: float, desp_min: float = 0.0, pl_min_ratio: float = 0.05, pl_max: Optional[float] = None, div_max: Optional[float] = None, respeitar_lucro: bool = True, aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10) -> Optional[Dict[str, float]]:
+    faturamento = max(0, faturamento)
+    retirada_total = max(0, retirada_total)
+    num_pf = max(1, num_pf)
+    # Faixa viável do pró-labore; os dividendos completam a retirada (V = R - P)
+    p_lo = max(0.0, pl_min_ratio * faturamento)
+    if div_max is not None:
+        p_lo = max(p_lo, retirada_total - div_max)
+    p_hi = retirada_total if pl_max is None else min(pl_max, retirada_total)
+    if p_lo > p_hi or desp_min > desp_max:
+        return None
+    # O custo é linear por partes em P: basta avaliar os extremos e os pontos de quebra
+    # (lucro zerado, troca da restrição de lucro e o degrau do IRRF em limite * num_pf)
+    candidatos: List[float] = [p_lo, p_hi, faturamento - desp_max, retirada_total - limite_dividendos_pf * num_pf]
+    a = aliquota_irpj_csll
+    if respeitar_lucro and 0 < a < 1:
+        candidatos.append((retirada_total - (1 - a) * (faturamento - desp_max)) / a)
+        candidatos.append((retirada_total - (1 - a) * (faturamento - desp_min)) / a)
+    melhor = None
+    for p in candidatos:
+        pro_labore = min(max(p, p_lo), p_hi)
+        despesas = _despesas_maximas(faturamento, pro_labore, retirada_total, desp_max, a, respeitar_lucro)
+        if despesas < desp_min - 1e-6:
+            continue
+        despesas = max(despesas, desp_min)
+        cenario = compute_scenario(faturamento, despesas, pro_labore, retirada_total - pro_labore, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
+        chave = (round(cenario["total_impostos"], 6), -cenario["caixa_apos_impostos"])
+        if melhor is None or chave < melhor[0]:
+            melhor = (chave, cenario)
+    return None if melhor is None else melhor[1]
@@ -0,0 +1,94 @@
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+from batch import ALERTAS_ERRO, COLUNAS_ENTRADA, SCENARIO_COLUMNS, alert_messages, validate_inputs_batch
+from history import save_history
+from regimes import compute_regime_batch
+
+def open_batches(caminho: Path, batch_size: int = 65_536) -> Iterator[pa.RecordBatch]:
+    # Um record batch por vez, lido de um arquivo mapeado em memória. No Arrow IPC os buffers das
+    # colunas apontam direto para o mapa (sem cópia nem decodificação); no Parquet o mapa evita a
+    # leitura para buffers próprios, mas cada grupo de linhas ainda é decodificado
+    caminho = Path(caminho)
+    if caminho.suffix.lower() == ".parquet":
+        arquivo = pq.ParquetFile(caminho, memory_map=True)
+        yield from arquivo.iter_batches(batch_size=batch_size)
+        return
+    mapa = pa.memory_map(str(caminho), "r")
+    try:
+        leitor = pa.ipc.open_file(mapa)
+        lotes = (leitor.get_batch(i) for i in range(leitor.num_record_batches))
+    except pa.ArrowInvalid:
+        # Formato de stream (.arrows) não tem rodapé com o índice dos lotes
+        mapa.seek(0)
+        lotes = pa.ipc.open_stream(mapa)
+    for lote in lotes:
+        # Lotes maiores que o pedido são fatiados, o que também não copia
+        for inicio in range(0, lote.num_rows, batch_size):
+            yield lote.slice(inicio, batch_size)
+
+def _numpy(coluna: pa.Array) -> np.ndarray:
+    # Colunas numéricas sem nulos viram arrays do NumPy sobre o mesmo buffer; as demais (com nulos,
+    # decimais, texto) são convertidas, com nulos como NaN
+    if coluna.null_count == 0 and (pa.types.is_floating(coluna.type) or pa.types.is_integer(coluna.type)):
+        return coluna.to_numpy(zero_copy_only=True)
+    return coluna.cast(pa.float64()).to_numpy(zero_copy_only=False)
+
+def _alertas(codigos: np.ndarray) -> pa.Array:
+    # Textos só das combinações de códigos presentes no lote, repetidos pelo Arrow (take), sem um str do
+    # Python por linha
+    presentes, indices = np.unique(codigos, return_inverse=True)
+    return pa.array(alert_messages(presentes).tolist(), pa.string()).take(pa.array(indices))
+
+def process_batch(lote: pa.RecordBatch, taxas: Dict[str, float], regime: str = "Lucro Real") -> pa.RecordBatch:
+    # Mesmas colunas de saída de cli.process_chunk, sem passar pelo pandas: as colunas de entrada seguem
+    # para a saída sem cópia e os resultados do NumPy entram no lote como buffers
+    nomes = lote.schema.names
+    faltando = [c for c in COLUNAS_ENTRADA if c not in nomes]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    coluna = lambda nome: _numpy(lote.column(nome))
+    parametros = {k: (coluna(k) if k in nomes else v) for k, v in taxas.items()}
+    opcoes = {k: coluna(k) for k in ("rbt12", "folha_12m") if k in nomes} if regime == "Simples Nacional" else {}
+    faturamento, num_pf = coluna("faturamento"), coluna("num_pf")
+    saida = dict(zip(nomes, lote.columns))
+    totais = {}
+    for cenario in ("atual", "otim"):
+        desp, pl, div = coluna(f"desp_{cenario}"), coluna(f"pl_{cenario}"), coluna(f"div_{cenario}")
+        resultado = compute_regime_batch(regime, faturamento, desp, pl, div, num_pf, **parametros, **opcoes)
+        for nome in SCENARIO_COLUMNS:
+            saida[f"{cenario}_{nome}"] = pa.array(np.broadcast_to(resultado[nome], (lote.num_rows,)))
+        codigos = validate_inputs_batch(faturamento, desp, pl, div)
+        saida[f"{cenario}_valido"] = pa.array((codigos & ALERTAS_ERRO) == 0)
+        saida[f"{cenario}_alertas"] = _alertas(codigos)
+        saida[f"{cenario}_codigo_alertas"] = pa.array(codigos)
+        totais[cenario] = resultado["total_impostos"]
+    economia = totais["atual"] - totais["otim"]
+    saida["economia_mensal"] = pa.array(economia)
+    saida["economia_anual"] = pa.array(economia * 12)
+    return pa.RecordBatch.from_arrays(list(saida.values()), names=list(saida))
+
+def run(entrada: Path, saida: Path, batch_size: int = 65_536, taxas: Optional[Dict[str, float]] = None, regime: str = "Lucro Real", historico: Optional[Path] = None) -> int:
+    # Memória limitada pelo tamanho do lote, qualquer que seja o arquivo: cada lote é lido, calculado,
+    # gravado como um grupo de linhas do Parquet e descartado
+    if Path(saida).suffix.lower() != ".parquet":
+        raise ValueError("A saída do processamento out-of-core deve ser um arquivo .parquet")
+    taxas = taxas or {"aliquota_irpj_csll": 0.34, "limite_dividendos_pf": 50_000.0, "aliquota_irrf_dividendos": 0.10}
+    escritor = None
+    linhas = 0
+    try:
+        for lote in open_batches(entrada, batch_size):
+            resultado = process_batch(lote, taxas, regime)
+            if historico is not None:
+                save_history(historico, resultado.to_pandas(), taxas, regime)
+            if escritor is None:
+                escritor = pq.ParquetWriter(saida, resultado.schema)
+            escritor.write_batch(resultado)
+            linhas += lote.num_rows
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return linhas
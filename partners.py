@@ -0,0 +1,71 @@
+from typing import Dict, Optional
+import numpy as np
+from batch import ArrayLike, _clamp, compute_scenario_batch
+
+def partner_irrf(dividendos_socios: ArrayLike, limite_dividendos_pf: ArrayLike = 50_000.0, aliquota_irrf_dividendos: ArrayLike = 0.10) -> np.ndarray:
+    # O gatilho vale por sócio: quem passa do limite paga IRRF sobre todo o dividendo que recebeu
+    dividendos_socios = np.asarray(dividendos_socios, dtype=float)
+    limite = np.asarray(limite_dividendos_pf, dtype=float)[..., None]
+    aliquota = np.asarray(aliquota_irrf_dividendos, dtype=float)[..., None]
+    return np.where(dividendos_socios > limite, aliquota * dividendos_socios, 0.0)
+
+def compute_scenario_partners(faturamento: ArrayLike, despesas: ArrayLike, pro_labore: ArrayLike, dividendos_socios: ArrayLike, aliquota_irpj_csll: ArrayLike = 0.34, limite_dividendos_pf: ArrayLike = 50_000.0, aliquota_irrf_dividendos: ArrayLike = 0.10) -> Dict[str, np.ndarray]:
+    # Como compute_scenario_batch, mas com os dividendos de cada sócio na última dimensão
+    # (empresas x sócios); sócios ausentes ficam com 0
+    dividendos_socios = _clamp(np.atleast_1d(np.asarray(dividendos_socios, dtype=float)), 0.0)
+    dividendos_total = dividendos_socios.sum(axis=-1)
+    # Média por sócio só entre os que recebem: as posições de preenchimento não contam
+    num_pf = np.maximum((dividendos_socios > 0).sum(axis=-1), 1)
+    resultado = compute_scenario_batch(faturamento, despesas, pro_labore, dividendos_total, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
+    irrf_socios = partner_irrf(dividendos_socios, limite_dividendos_pf, aliquota_irrf_dividendos)
+    acima = dividendos_socios > np.asarray(limite_dividendos_pf, dtype=float)[..., None]
+    irrf_dividendos = irrf_socios.sum(axis=-1)
+    total_impostos = resultado["irpj_csll"] + irrf_dividendos
+    faturamento = resultado["faturamento"]
+    resultado["irrf_dividendos"] = irrf_dividendos
+    resultado["estourou_gatilho"] = acima.any(axis=-1)
+    resultado["total_impostos"] = total_impostos
+    resultado["carga_efetiva"] = np.divide(total_impostos, faturamento, out=np.zeros_like(total_impostos), where=faturamento > 0) * 100
+    resultado["caixa_apos_impostos"] = faturamento - resultado["despesas"] - resultado["pro_labore"] - total_impostos
+    resultado["dividendos_socios"] = dividendos_socios
+    resultado["irrf_socios"] = irrf_socios
+    resultado["socios_acima_limite"] = acima.sum(axis=-1)
+    return resultado
+
+def allocate_dividends_batch(dividendos_total: ArrayLike, participacoes: ArrayLike, limite_dividendos_pf: float = 50_000.0) -> np.ndarray:
+    # Enchimento por nível: cada sócio recebe min(participação * nível, limite) e o nível sobe até
+    # distribuir o total, então ninguém passa do limite enquanto outro ainda cabe abaixo dele.
+    # O que sobrar com todos no limite vai para um único sócio (o de maior participação): como o IRRF
+    # incide sobre todo o dividendo de quem estoura, concentrar o excesso minimiza o imposto.
+    # Ordenação por linha: O(n log n) para n sócios; participação 0 marca sócio ausente
+    participacoes = np.atleast_2d(np.asarray(participacoes, dtype=float))
+    participacoes = np.where(participacoes > 0, participacoes, 0.0)
+    dividendos_total = _clamp(np.asarray(dividendos_total, dtype=float).reshape(-1), 0.0)
+    dividendos_total = np.broadcast_to(dividendos_total, participacoes.shape[:1])
+    empresas, socios = participacoes.shape
+    ativos = participacoes > 0
+    # Nível em que cada sócio atinge o limite, em ordem crescente
+    saturacao = np.divide(limite_dividendos_pf, participacoes, out=np.full(participacoes.shape, np.inf), where=ativos)
+    ordem = np.argsort(saturacao, axis=1, kind="stable")
+    niveis = np.take_along_axis(saturacao, ordem, axis=1)
+    pesos = np.take_along_axis(participacoes, ordem, axis=1)
+    # Peso ainda não saturado após os j primeiros sócios atingirem o limite
+    peso_restante = pesos[:, ::-1].cumsum(axis=1)[:, ::-1] - pesos
+    saturados = np.arange(1, socios + 1)
+    distribuido = saturados * limite_dividendos_pf + np.multiply(niveis, peso_restante, out=np.zeros(participacoes.shape), where=peso_restante > 0)
+    distribuido[~np.isfinite(niveis)] = np.inf
+    j = (distribuido <= dividendos_total[:, None]).sum(axis=1)
+    n_ativos = ativos.sum(axis=1)
+    peso_livre = np.where(j > 0, np.take_along_axis(peso_restante, np.maximum(j - 1, 0)[:, None], axis=1)[:, 0], pesos.sum(axis=1))
+    nivel = np.divide(dividendos_total - j * limite_dividendos_pf, peso_livre, out=np.full(empresas, np.inf), where=peso_livre > 0)
+    alocacao = np.minimum(np.multiply(participacoes, nivel[:, None], out=np.zeros(participacoes.shape), where=ativos), limite_dividendos_pf)
+    excesso = np.where(j >= n_ativos, dividendos_total - n_ativos * limite_dividendos_pf, 0.0)
+    linhas = np.flatnonzero((excesso > 0) & (n_ativos > 0))
+    alocacao[linhas, participacoes[linhas].argmax(axis=1)] += excesso[linhas]
+    return alocacao
+
+def allocate_dividends(dividendos_total: float, participacoes: ArrayLike, limite_dividendos_pf: float = 50_000.0) -> Optional[np.ndarray]:
+    participacoes = np.asarray(participacoes, dtype=float)
+    if participacoes.ndim != 1 or not (participacoes > 0).any():
+        return None
+    return allocate_dividends_batch(dividendos_total, participacoes[None, :], limite_dividendos_pf)[0]
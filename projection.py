@@ -0,0 +1,113 @@
+from typing import Dict, NamedTuple, Optional, Union
+import numpy as np
+from batch import ArrayLike, compute_scenario_batch
+
+ANO_INICIAL = 2026
+ANO_FINAL = 2033
+MESES_MAXIMO = (ANO_FINAL - ANO_INICIAL + 1) * 12
+SERIES = ("faturamento", "despesas", "pro_labore", "dividendos_total", "num_pf")
+RESULTADOS = ("irpj_csll", "irrf_dividendos", "total_impostos", "caixa_apos_impostos", "estourou_gatilho")
+
+class YearParams(NamedTuple):
+    aliquota_irpj_csll: float = 0.34
+    limite_dividendos_pf: float = 50_000.0
+    aliquota_irrf_dividendos: float = 0.10
+
+def default_params() -> Dict[int, YearParams]:
+    return {ano: YearParams() for ano in range(ANO_INICIAL, ANO_FINAL + 1)}
+
+def month_year(mes: int) -> int:
+    return ANO_INICIAL + mes // 12
+
+def _por_cliente(valores: ArrayLike, clientes: int) -> np.ndarray:
+    # Regra única para vetores: com um valor por cliente vira coluna e vale para todos os meses (também
+    # quando o número de clientes coincide com o de meses); os demais são um valor por mês. Para um valor
+    # por mês nesse caso, passe uma linha (1 x meses)
+    valores = np.asarray(valores, dtype=float)
+    if valores.ndim == 1 and valores.shape[0] == clientes:
+        return valores[:, None]
+    return valores
+
+class Projection:
+    # Séries mensais (clientes x meses) a partir de jan/2026; cada mês aplica o gatilho de IRRF de
+    # compute_scenario com os parâmetros do seu ano. Alterações recalculam só as colunas afetadas e os
+    # acumulados são refeitos a partir do primeiro mês alterado, quando consultados
+    def __init__(self, faturamento: ArrayLike, despesas: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike, num_pf: ArrayLike = 1, meses: Optional[int] = None, params: Optional[Dict[int, YearParams]] = None):
+        faturamento = np.atleast_2d(np.asarray(faturamento, dtype=float))
+        meses = faturamento.shape[1] if meses is None else meses
+        if not 1 <= meses <= MESES_MAXIMO:
+            raise ValueError(f"Horizonte deve ter entre 1 e {MESES_MAXIMO} meses")
+        forma = (faturamento.shape[0], meses)
+        self.meses = meses
+        self.clientes = forma[0]
+        self.params = default_params()
+        self.params.update(params or {})
+        self.series: Dict[str, np.ndarray] = {}
+        for nome, valores in zip(SERIES, (faturamento, despesas, pro_labore, dividendos_total, num_pf)):
+            self.series[nome] = np.array(np.broadcast_to(_por_cliente(valores, forma[0]), forma), dtype=float)
+        self.resultados = {nome: np.empty(forma, dtype=bool if nome == "estourou_gatilho" else float) for nome in RESULTADOS}
+        self._impostos_acumulados = np.empty(forma)
+        self._caixa_acumulado = np.empty(forma)
+        self._sujo_desde = 0
+        self._recalcular(0, meses)
+
+    def _taxas(self, inicio: int, fim: int) -> Dict[str, np.ndarray]:
+        anos = [self.params[month_year(m)] for m in range(inicio, fim)]
+        return {campo: np.array([getattr(p, campo) for p in anos]) for campo in YearParams._fields}
+
+    def _recalcular(self, inicio: int, fim: int, clientes: Union[slice, np.ndarray] = slice(None)) -> None:
+        fatia = (clientes, slice(inicio, fim))
+        resultado = compute_scenario_batch(*(self.series[nome][fatia] for nome in SERIES), **self._taxas(inicio, fim))
+        for nome in RESULTADOS:
+            self.resultados[nome][fatia] = resultado[nome]
+        self._sujo_desde = min(self._sujo_desde, inicio)
+
+    def update(self, inicio: int, fim: Optional[int] = None, clientes: Union[slice, np.ndarray] = slice(None), **series: ArrayLike) -> None:
+        # Substitui as séries nos meses [inicio, fim) dos clientes escolhidos e recalcula só essa fatia
+        fim = inicio + 1 if fim is None else fim
+        if not 0 <= inicio < fim <= self.meses:
+            raise ValueError(f"Intervalo de meses inválido: {inicio}-{fim}")
+        selecionados = np.arange(self.clientes)[clientes].size
+        for nome, valores in series.items():
+            if nome not in SERIES:
+                raise KeyError(nome)
+            self.series[nome][clientes, inicio:fim] = _por_cliente(valores, selecionados)
+        self._recalcular(inicio, fim, clientes)
+
+    def set_year_params(self, ano: int, **taxas: float) -> None:
+        if ano not in self.params:
+            raise KeyError(ano)
+        self.params[ano] = self.params[ano]._replace(**taxas)
+        inicio = (ano - ANO_INICIAL) * 12
+        if inicio < self.meses:
+            self._recalcular(inicio, min(inicio + 12, self.meses))
+
+    def _acumular(self) -> None:
+        inicio = self._sujo_desde
+        if inicio >= self.meses:
+            return
+        for acumulado, mensal in ((self._impostos_acumulados, self.resultados["total_impostos"]), (self._caixa_acumulado, self.resultados["caixa_apos_impostos"])):
+            np.cumsum(mensal[:, inicio:], axis=1, out=acumulado[:, inicio:])
+            if inicio > 0:
+                acumulado[:, inicio:] += acumulado[:, inicio - 1:inicio]
+        self._sujo_desde = self.meses
+
+    @property
+    def impostos_acumulados(self) -> np.ndarray:
+        self._acumular()
+        return self._impostos_acumulados
+
+    @property
+    def caixa_acumulado(self) -> np.ndarray:
+        self._acumular()
+        return self._caixa_acumulado
+
+    def annual_summary(self) -> Dict[str, np.ndarray]:
+        # Totais por ano (clientes x anos); o último ano pode ser parcial
+        anos = -(-self.meses // 12)
+        resumo = {"anos": np.arange(ANO_INICIAL, ANO_INICIAL + anos)}
+        for nome in RESULTADOS:
+            mensal = np.zeros((self.clientes, anos * 12))
+            mensal[:, :self.meses] = self.resultados[nome]
+            resumo["meses_com_irrf" if nome == "estourou_gatilho" else nome] = mensal.reshape(self.clientes, anos, 12).sum(axis=2)
+        return resumo
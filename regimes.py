@@ -0,0 +1,131 @@
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from batch import INPUT_COLUMNS, SCENARIO_COLUMNS, ArrayLike, _clamp, compute_scenario_batch
+from utils import ScenarioResult, compute_scenario
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+REGIMES = ("Lucro Real", "Lucro Presumido", "Simples Nacional")
+# Rótulo do tributo da empresa (coluna irpj_csll) em cada regime
+REGIME_TAX_LABEL = {"Lucro Real": "IRPJ + CSLL (34%)", "Lucro Presumido": "IRPJ + Adicional + CSLL (presumido)", "Simples Nacional": "DAS (Simples Nacional)"}
+
+class BracketTable(NamedTuple):
+    # Faixas compiladas: tetos de receita bruta em 12 meses em ordem crescente, com a alíquota
+    # nominal e a parcela a deduzir de cada faixa; a busca é um searchsorted (O(log n))
+    tetos: np.ndarray
+    aliquotas: np.ndarray
+    deducoes: np.ndarray
+
+def compile_brackets(faixas: Sequence[Tuple[float, float, float]]) -> BracketTable:
+    faixas = sorted(faixas)
+    tabela = BracketTable(*(np.array(coluna, dtype=float) for coluna in zip(*faixas)))
+    for coluna in tabela:
+        coluna.flags.writeable = False
+    return tabela
+
+# LC 123/2006 com redação da LC 155/2016: (teto RBT12, alíquota nominal, parcela a deduzir)
+ANEXO_III = compile_brackets([(180_000.0, 0.06, 0.0), (360_000.0, 0.112, 9_360.0), (720_000.0, 0.135, 17_640.0), (1_800_000.0, 0.16, 35_640.0), (3_600_000.0, 0.21, 125_640.0), (4_800_000.0, 0.33, 648_000.0)])
+ANEXO_V = compile_brackets([(180_000.0, 0.155, 0.0), (360_000.0, 0.18, 4_500.0), (720_000.0, 0.195, 9_900.0), (1_800_000.0, 0.205, 17_100.0), (3_600_000.0, 0.23, 62_100.0), (4_800_000.0, 0.305, 540_000.0)])
+ANEXOS = {3: ANEXO_III, 5: ANEXO_V}
+FATOR_R_MINIMO = 0.28
+
+# Percentuais de presunção (IRPJ, CSLL) por atividade
+PRESUNCAO = {"servicos": (0.32, 0.32), "servicos_hospitalares": (0.08, 0.12)}
+
+def effective_rate(tabela: BracketTable, rbt12: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    # Alíquota efetiva = (RBT12 × nominal − parcela a deduzir) / RBT12; sem receita nos 12 meses
+    # anteriores vale a nominal da faixa. Acima do teto do Simples a alíquota fica NaN.
+    rbt12 = _clamp(np.asarray(rbt12, dtype=float), 0.0)
+    faixa = np.searchsorted(tabela.tetos, rbt12, side="left")
+    excede = faixa >= tabela.tetos.size
+    faixa = np.minimum(faixa, tabela.tetos.size - 1)
+    nominal = tabela.aliquotas[faixa]
+    efetiva = np.divide(rbt12 * nominal - tabela.deducoes[faixa], rbt12, out=np.array(nominal, dtype=float), where=rbt12 > 0)
+    return np.where(excede, np.nan, efetiva), excede
+
+def fator_r(folha_12m: ArrayLike, rbt12: ArrayLike) -> np.ndarray:
+    folha_12m = np.asarray(folha_12m, dtype=float)
+    rbt12 = np.asarray(rbt12, dtype=float)
+    return np.divide(folha_12m, rbt12, out=np.zeros(np.broadcast(folha_12m, rbt12).shape), where=rbt12 > 0)
+
+def _finalizar(base: Dict[str, np.ndarray], tributo_empresa: np.ndarray) -> Dict[str, np.ndarray]:
+    # Troca o IRPJ/CSLL do Lucro Real pelo tributo do regime e refaz os totais
+    faturamento = base["faturamento"]
+    total_impostos = tributo_empresa + base["irrf_dividendos"]
+    base["irpj_csll"] = tributo_empresa
+    base["lucro_apos_irpj_csll"] = base["lucro_antes_impostos"] - tributo_empresa
+    base["total_impostos"] = total_impostos
+    base["carga_efetiva"] = np.divide(total_impostos, faturamento, out=np.zeros_like(total_impostos), where=faturamento > 0) * 100
+    base["caixa_apos_impostos"] = faturamento - base["despesas"] - base["pro_labore"] - total_impostos
+    return base
+
+def compute_presumido_batch(faturamento: ArrayLike, despesas: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike, num_pf: ArrayLike, atividade: str = "servicos", aliquota_irpj: float = 0.15, aliquota_adicional: float = 0.10, limite_adicional: float = 20_000.0, aliquota_csll: float = 0.09, limite_dividendos_pf: ArrayLike = 50_000.0, aliquota_irrf_dividendos: ArrayLike = 0.10) -> Dict[str, np.ndarray]:
+    # IRPJ e CSLL incidem sobre o faturamento presumido, não sobre o lucro contábil; o adicional de
+    # 10% vale sobre a base do IRPJ acima de R$ 20 mil/mês (R$ 60 mil no trimestre)
+    presuncao_irpj, presuncao_csll = PRESUNCAO[atividade]
+    base = compute_scenario_batch(faturamento, despesas, pro_labore, dividendos_total, num_pf, 0.0, limite_dividendos_pf, aliquota_irrf_dividendos)
+    base_irpj = presuncao_irpj * base["faturamento"]
+    irpj = aliquota_irpj * base_irpj + aliquota_adicional * _clamp(base_irpj - limite_adicional, 0.0)
+    csll = aliquota_csll * presuncao_csll * base["faturamento"]
+    return _finalizar(base, irpj + csll)
+
+def compute_simples_batch(faturamento: ArrayLike, despesas: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike, num_pf: ArrayLike, rbt12: Optional[ArrayLike] = None, folha_12m: Optional[ArrayLike] = None, anexo: Optional[int] = None, limite_dividendos_pf: ArrayLike = 50_000.0, aliquota_irrf_dividendos: ArrayLike = 0.10) -> Dict[str, np.ndarray]:
+    # Sem histórico, RBT12 e folha são o mês atual anualizado (a folha inclui o pró-labore).
+    # Com Fator R (folha / RBT12) de pelo menos 28% a atividade vai para o Anexo III, senão Anexo V
+    base = compute_scenario_batch(faturamento, despesas, pro_labore, dividendos_total, num_pf, 0.0, limite_dividendos_pf, aliquota_irrf_dividendos)
+    rbt12 = base["faturamento"] * 12 if rbt12 is None else np.asarray(rbt12, dtype=float)
+    folha_12m = base["pro_labore"] * 12 if folha_12m is None else np.asarray(folha_12m, dtype=float)
+    fr = fator_r(folha_12m, rbt12)
+    aliquota_iii, excede = effective_rate(ANEXO_III, rbt12)
+    aliquota_v, _ = effective_rate(ANEXO_V, rbt12)
+    if anexo is None:
+        no_anexo_iii = fr >= FATOR_R_MINIMO
+    else:
+        no_anexo_iii = np.full(np.shape(fr), anexo == 3)
+    aliquota = np.where(no_anexo_iii, aliquota_iii, aliquota_v)
+    resultado = _finalizar(base, aliquota * base["faturamento"])
+    resultado["aliquota_efetiva"] = aliquota
+    resultado["fator_r"] = fr
+    resultado["anexo"] = np.where(no_anexo_iii, 3, 5)
+    resultado["excede_limite"] = excede
+    return resultado
+
+def compute_regime_batch(regime: str, faturamento: ArrayLike, despesas: ArrayLike, pro_labore: ArrayLike, dividendos_total: ArrayLike, num_pf: ArrayLike, aliquota_irpj_csll: ArrayLike = 0.34, limite_dividendos_pf: ArrayLike = 50_000.0, aliquota_irrf_dividendos: ArrayLike = 0.10, **opcoes) -> Dict[str, np.ndarray]:
+    if regime == "Lucro Real":
+        return compute_scenario_batch(faturamento, despesas, pro_labore, dividendos_total, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
+    if regime == "Lucro Presumido":
+        return compute_presumido_batch(faturamento, despesas, pro_labore, dividendos_total, num_pf, limite_dividendos_pf=limite_dividendos_pf, aliquota_irrf_dividendos=aliquota_irrf_dividendos, **opcoes)
+    if regime == "Simples Nacional":
+        return compute_simples_batch(faturamento, despesas, pro_labore, dividendos_total, num_pf, limite_dividendos_pf=limite_dividendos_pf, aliquota_irrf_dividendos=aliquota_irrf_dividendos, **opcoes)
+    raise ValueError(f"Regime desconhecido: {regime}")
+
+def compute_scenario_regime(regime: str, faturamento: float, despesas: float, pro_labore: float, dividendos_total: float, num_pf: int, aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10, **opcoes) -> ScenarioResult:
+    # Versão escalar para o app; o Lucro Real continua no compute_scenario original
+    if regime == "Lucro Real":
+        return compute_scenario(faturamento, despesas, pro_labore, dividendos_total, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos)
+    resultado = compute_regime_batch(regime, faturamento, despesas, pro_labore, dividendos_total, num_pf, aliquota_irpj_csll, limite_dividendos_pf, aliquota_irrf_dividendos, **opcoes)
+    return ScenarioResult(*(resultado[k].item() for k in SCENARIO_COLUMNS))
+
+def compare_regimes(df: "pd.DataFrame", aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10, atividade: str = "servicos") -> "pd.DataFrame":
+    import pandas as pd
+    # Comparativo lado a lado de uma carteira inteira numa chamada: uma coluna de imposto total e de
+    # carga por regime, mais o regime de menor imposto. Colunas opcionais: rbt12 e folha_12m
+    entradas = {k: df[k].to_numpy(dtype=float) for k in INPUT_COLUMNS}
+    simples = {k: df[k].to_numpy(dtype=float) for k in ("rbt12", "folha_12m") if k in df.columns}
+    opcoes = {"Lucro Real": {}, "Lucro Presumido": {"atividade": atividade}, "Simples Nacional": simples}
+    saida = {}
+    totais = []
+    for regime in REGIMES:
+        resultado = compute_regime_batch(regime, **entradas, aliquota_irpj_csll=aliquota_irpj_csll, limite_dividendos_pf=limite_dividendos_pf, aliquota_irrf_dividendos=aliquota_irrf_dividendos, **opcoes[regime])
+        saida[f"{regime} - total_impostos"] = resultado["total_impostos"]
+        saida[f"{regime} - carga_efetiva"] = resultado["carga_efetiva"]
+        totais.append(resultado["total_impostos"])
+        if regime == "Simples Nacional":
+            saida["Simples Nacional - anexo"] = resultado["anexo"]
+    totais = np.vstack(totais)
+    # Acima do teto do Simples o total é NaN e o regime fica fora da escolha
+    melhor = np.argmin(np.where(np.isnan(totais), np.inf, totais), axis=0)
+    saida["melhor_regime"] = np.array(REGIMES)[melhor]
+    saida["economia_vs_lucro_real"] = totais[0] - totais[melhor, np.arange(totais.shape[1])]
+    return pd.DataFrame(saida, index=df.index)
@@ -0,0 +1,210 @@
+import argparse
+import base64
+import html
+import re
+import sys
+import textwrap
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterator, Optional
+import numpy as np
+import pandas as pd
+from matplotlib import font_manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from batch import SCENARIO_COLUMNS
+from charts import draw_tax_chart
+from cli import process_chunk, read_chunks
+from regimes import ANEXO_III, REGIMES, REGIME_TAX_LABEL
+from utils import COMPARISON_CURRENCY_KEYS, COMPARISON_METRICS, comparison_columns, format_currency_brl, generate_summary_text
+
+TEMPLATE_HTML = Path(__file__).with_name("templates") / "report.html"
+FORMATOS = ("html", "pdf")
+# Emojis do resumo não existem nas fontes do matplotlib; no PDF eles são removidos
+_EMOJI = re.compile("[\u2600-\u27bf\ufe0f\U0001f000-\U0001faff]")
+_NEGRITO = re.compile(r"\*\*(.+?)\*\*")
+# Acima do teto do Simples os valores do regime saem NaN; no relatório vira este aviso
+ACIMA_DO_LIMITE = "Acima do limite do Simples"
+# Chaves na ordem das linhas da tabela comparativa (a carga efetiva entra antes do caixa)
+_CHAVES_TABELA = (*COMPARISON_CURRENCY_KEYS[:10], "carga_efetiva", *COMPARISON_CURRENCY_KEYS[10:])
+
+# Estado de cada processo: template, fontes e a figura Agg carregados uma vez e reaproveitados
+_worker: Dict = {}
+
+def _atualizar_grafico(ax, v_atual, v_otim) -> None:
+    # Só alturas, rótulos e escala mudam entre relatórios; eixos, legenda e títulos ficam prontos
+    for barras, valores in zip(ax.containers, (v_atual, v_otim)):
+        for barra, valor in zip(barras, valores):
+            barra.set_height(valor if np.isfinite(valor) else 0.0)
+    for rotulo, barra, valor in zip(ax.texts, (*ax.containers[0], *ax.containers[1]), (*v_atual, *v_otim)):
+        rotulo.set_y(barra.get_height())
+        rotulo.set_text(f"R$ {valor:,.0f}" if np.isfinite(valor) else "acima do limite")
+    ax.relim()
+    ax.autoscale_view()
+
+def _montar_pdf(fig: Figure) -> Dict:
+    # Página A4 única: resumo e tabela na metade de cima, gráfico na de baixo
+    topo, base = fig.subfigures(2, 1, height_ratios=[1.25, 1])
+    topo.text(0.06, 0.96, "Simulador Reforma Tributária 2026", fontsize=16, fontweight="bold", color="#1e3a5f", va="top")
+    subtitulo = topo.text(0.06, 0.915, "", fontsize=10, color="#64748b", va="top")
+    resumo = topo.text(0.06, 0.87, "", fontsize=7.5, va="top", linespacing=1.4)
+    ax = topo.add_axes([0.06, 0.02, 0.88, 0.5])
+    ax.axis("off")
+    tabela = ax.table(cellText=[[""] * 3 for _ in COMPARISON_METRICS], colLabels=["Métrica", "Cenário Atual", "Cenário Otimizado"], loc="center", cellLoc="right", colLoc="center", colWidths=[0.44, 0.28, 0.28])
+    tabela.auto_set_font_size(False)
+    tabela.set_fontsize(8)
+    for (linha, coluna), celula in tabela.get_celld().items():
+        celula.set_edgecolor("#e2e8f0")
+        if linha == 0:
+            celula.set_facecolor("#1e3a5f")
+            celula.get_text().set_color("white")
+        elif coluna == 0:
+            celula.get_text().set_horizontalalignment("left")
+    draw_tax_chart(base, [0.0] * 3, [0.0] * 3)
+    return {"subtitulo": subtitulo, "resumo": resumo, "tabela": tabela, "grafico": base.axes[0]}
+
+def _iniciar_worker(formato: str, destino: Path, dpi: int = 72, regime: str = "Lucro Real") -> None:
+    # Figura montada uma vez por processo e só atualizada a cada relatório
+    for peso in ("normal", "bold"):
+        font_manager.findfont(font_manager.FontProperties(family="DejaVu Sans", weight=peso))
+    if formato == "pdf":
+        fig = Figure(figsize=(8.27, 11.69))
+        artistas = _montar_pdf(fig)
+    else:
+        fig = Figure(figsize=(12, 6))
+        draw_tax_chart(fig, [0.0] * 3, [0.0] * 3)
+        artistas = {"grafico": fig.axes[0]}
+    FigureCanvasAgg(fig)
+    _worker.update(formato=formato, destino=destino, dpi=dpi, regime=regime, fig=fig, artistas=artistas, template=Template(TEMPLATE_HTML.read_text(encoding="utf-8")) if formato == "html" else None)
+    # Um desenho de aquecimento popula os caches de glifos e de layout de texto
+    _atualizar_grafico(artistas["grafico"], [1.0, 1.0, 2.0], [1.0, 0.0, 1.0])
+    fig.canvas.draw()
+
+def _png(v_atual, v_otim) -> bytes:
+    _atualizar_grafico(_worker["artistas"]["grafico"], v_atual, v_otim)
+    buffer = BytesIO()
+    _worker["fig"].savefig(buffer, format="png", dpi=_worker["dpi"], pil_kwargs={"compress_level": 1})
+    return buffer.getvalue()
+
+def markdown_html(texto: str) -> str:
+    # Só o subconjunto usado pelo generate_summary_text: título ###, **negrito** e quebras com dois espaços
+    blocos = []
+    for bloco in texto.strip().split("\n\n"):
+        bloco = _NEGRITO.sub(r"<strong>\1</strong>", html.escape(bloco.strip(), quote=False))
+        if bloco.startswith("### "):
+            blocos.append(f"<h3>{bloco[4:]}</h3>")
+        else:
+            blocos.append(f"<p>{bloco.replace('  ' + chr(10), '<br>' + chr(10))}</p>")
+    return "\n".join(blocos)
+
+def _nome_arquivo(indice: int, cliente: str, formato: str) -> str:
+    return f"{indice:06d}_{re.sub(r'[^0-9A-Za-z_-]+', '_', cliente).strip('_') or 'cliente'}.{formato}"
+
+def _html(cliente: str, resumo: str, metricas, coluna_atual, coluna_otimizada, v_atual, v_otim) -> str:
+    linhas = "\n".join(f"<tr><td>{html.escape(m)}</td><td class=\"valor\">{a}</td><td class=\"valor\">{o}</td></tr>" for m, a, o in zip(metricas, coluna_atual, coluna_otimizada))
+    grafico = base64.b64encode(_png(v_atual, v_otim)).decode("ascii")
+    return _worker["template"].substitute(cliente=html.escape(cliente), regime=html.escape(_worker["regime"]), resumo=markdown_html(resumo), linhas=linhas, grafico=grafico)
+
+def _pdf(cliente: str, resumo: str, metricas, coluna_atual, coluna_otimizada, v_atual, v_otim) -> bytes:
+    artistas = _worker["artistas"]
+    # "$" escapado para o matplotlib não interpretar "R$ ... R$" como mathtext
+    artistas["subtitulo"].set_text(f"{cliente} · {_worker['regime']}".replace("$", r"\$"))
+    paragrafos = [_EMOJI.sub("", _NEGRITO.sub(r"\1", p)).strip() for p in resumo.strip().split("\n\n")[1:]]
+    artistas["resumo"].set_text("\n".join(textwrap.fill(linha.strip(), 105) for p in paragrafos for linha in p.split("\n") if linha.strip()).replace("$", r"\$"))
+    celulas = artistas["tabela"].get_celld()
+    for linha, valores in enumerate(zip(metricas, coluna_atual, coluna_otimizada), start=1):
+        for coluna, valor in enumerate(valores):
+            celulas[linha, coluna].get_text().set_text(valor.replace("$", r"\$"))
+    _atualizar_grafico(artistas["grafico"], v_atual, v_otim)
+    buffer = BytesIO()
+    _worker["fig"].savefig(buffer, format="pdf")
+    return buffer.getvalue()
+
+def render_chunk(df: pd.DataFrame, inicio: int, taxas: Dict[str, float]) -> int:
+    # Cálculo vetorizado do bloco inteiro e formatação das tabelas de todos os clientes numa chamada
+    regime = _worker["regime"]
+    resultado = process_chunk(df, taxas, regime)
+    cenarios = {c: [dict(zip(SCENARIO_COLUMNS, linha)) for linha in resultado[[f"{c}_{k}" for k in SCENARIO_COLUMNS]].to_numpy(dtype=object)] for c in ("atual", "otim")}
+    colunas = comparison_columns(*cenarios["atual"], *cenarios["otim"])
+    n = len(resultado)
+    metricas = list(COMPARISON_METRICS)
+    if regime != "Lucro Real":
+        metricas[4] = REGIME_TAX_LABEL[regime]
+    limites = resultado["limite_dividendos_pf"].to_numpy(dtype=float) if "limite_dividendos_pf" in resultado.columns else np.full(n, taxas["limite_dividendos_pf"])
+    clientes = resultado["cliente"].astype(str).tolist() if "cliente" in resultado.columns else [f"Cliente {inicio + i + 1}" for i in range(n)]
+    formato = _worker["formato"]
+    for i, (atual, otim) in enumerate(zip(cenarios["atual"], cenarios["otim"])):
+        atual["estourou_gatilho"] = bool(atual["estourou_gatilho"])
+        otim["estourou_gatilho"] = bool(otim["estourou_gatilho"])
+        economia = atual["total_impostos"] - otim["total_impostos"]
+        if np.isnan(economia):
+            # Cliente acima do teto do Simples: sem comparação, só o aviso no lugar dos valores
+            resumo = f"### 📊 Resumo Executivo\n\n**⚠️ {ACIMA_DO_LIMITE} Nacional:** a receita bruta de 12 meses passa de {format_currency_brl(float(ANEXO_III.tetos[-1]))}. O cliente não pode optar por este regime e os tributos não foram calculados.\n"
+            for coluna, cenario in ((colunas[i], atual), (colunas[n + i], otim)):
+                coluna[:] = [ACIMA_DO_LIMITE if np.isnan(cenario[k]) else texto for k, texto in zip(_CHAVES_TABELA, coluna)]
+        else:
+            resumo = generate_summary_text(atual, otim, economia, economia * 12, int(resultado["num_pf"].iat[i]), limites[i])
+        v_atual = [atual["irpj_csll"], atual["irrf_dividendos"], atual["total_impostos"]]
+        v_otim = [otim["irpj_csll"], otim["irrf_dividendos"], otim["total_impostos"]]
+        caminho = _worker["destino"] / _nome_arquivo(inicio + i, clientes[i], formato)
+        if formato == "pdf":
+            caminho.write_bytes(_pdf(clientes[i], resumo, metricas, colunas[i], colunas[n + i], v_atual, v_otim))
+        else:
+            caminho.write_text(_html(clientes[i], resumo, metricas, colunas[i], colunas[n + i], v_atual, v_otim), encoding="utf-8")
+    return n
+
+def _blocos(entrada: Path, chunksize: int) -> Iterator:
+    inicio = 0
+    for df in read_chunks(entrada, chunksize):
+        yield df, inicio
+        inicio += len(df)
+
+def run(entrada: Path, destino: Path, formato: str = "html", workers: int = 1, chunksize: int = 200, dpi: int = 72, taxas: Optional[Dict[str, float]] = None, regime: str = "Lucro Real") -> int:
+    taxas = taxas or {"aliquota_irpj_csll": 0.34, "limite_dividendos_pf": 50_000.0, "aliquota_irrf_dividendos": 0.10}
+    destino.mkdir(parents=True, exist_ok=True)
+    args = (formato, destino, dpi, regime)
+    if workers <= 1:
+        _iniciar_worker(*args)
+        return sum(render_chunk(df, inicio, taxas) for df, inicio in _blocos(entrada, chunksize))
+    # Blocos pequenos equilibram a carga entre os processos; a janela limita a memória em voo
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker, initargs=args) as pool:
+        pendentes = deque()
+        for df, inicio in _blocos(entrada, chunksize):
+            pendentes.append(pool.submit(render_chunk, df, inicio, taxas))
+            if len(pendentes) >= workers * 2:
+                total += pendentes.popleft().result()
+        while pendentes:
+            total += pendentes.popleft().result()
+    return total
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Relatórios HTML/PDF por cliente a partir de uma carteira CSV/Parquet")
+    parser.add_argument("entrada", type=Path, help="Carteira no formato do cli.py (coluna opcional: cliente)")
+    parser.add_argument("destino", type=Path, help="Diretório onde gravar um relatório por cliente")
+    parser.add_argument("--formato", choices=FORMATOS, default="html")
+    parser.add_argument("--workers", type=int, default=1, help="Processos em paralelo")
+    parser.add_argument("--chunksize", type=int, default=200, help="Clientes por bloco enviado a cada processo")
+    parser.add_argument("--dpi", type=int, default=72, help="Resolução do gráfico nos relatórios HTML")
+    parser.add_argument("--regime", choices=REGIMES, default="Lucro Real")
+    parser.add_argument("--aliquota-irpj-csll", type=float, default=0.34)
+    parser.add_argument("--limite-dividendos-pf", type=float, default=50_000.0)
+    parser.add_argument("--aliquota-irrf-dividendos", type=float, default=0.10)
+    args = parser.parse_args(argv)
+    taxas = {"aliquota_irpj_csll": args.aliquota_irpj_csll, "limite_dividendos_pf": args.limite_dividendos_pf, "aliquota_irrf_dividendos": args.aliquota_irrf_dividendos}
+    inicio = time.perf_counter()
+    try:
+        total = run(args.entrada, args.destino, args.formato, args.workers, args.chunksize, args.dpi, taxas, args.regime)
+    except (OSError, ValueError) as e:
+        print(f"❌ Erro: {e}", file=sys.stderr)
+        return 1
+    duracao = time.perf_counter() - inicio
+    print(f"✅ {total} relatórios em {args.destino} em {duracao:.1f} s ({total / duracao if duracao else 0:.1f} relatórios/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Tuple
+import numpy as np
+from batch import compute_scenario_batch
+
+class SensitivityCache:
+    # O IRPJ/CSLL depende só do faturamento e o IRRF só dos dividendos, então cada eixo
+    # é calculado uma vez por conjunto de parâmetros e a grade é montada por broadcast.
+    # Ao mover ou ampliar a janela, apenas os valores de eixo novos são calculados.
+    def __init__(self, max_parametros: int = 32):
+        self.max_parametros = max_parametros
+        self._entradas: "OrderedDict[Tuple, Dict[str, Dict[float, float]]]" = OrderedDict()
+        self._lock = Lock()
+
+    def _entrada(self, chave: Tuple) -> Dict[str, Dict[float, float]]:
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                entrada = self._entradas[chave] = {"irpj_csll": {}, "irrf_dividendos": {}}
+                while len(self._entradas) > self.max_parametros:
+                    self._entradas.popitem(last=False)
+            else:
+                self._entradas.move_to_end(chave)
+            return entrada
+
+    @staticmethod
+    def _completar(memo: Dict[float, float], valores: np.ndarray, calcular) -> np.ndarray:
+        novos = [v for v in valores.tolist() if v not in memo]
+        if novos:
+            memo.update(zip(novos, calcular(np.array(novos)).tolist()))
+        return np.array([memo[v] for v in valores.tolist()])
+
+    def grid(self, faturamentos: np.ndarray, dividendos: np.ndarray, despesas: float, pro_labore: float, num_pf: int, aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10) -> Dict[str, np.ndarray]:
+        faturamentos = np.asarray(faturamentos, dtype=float)
+        dividendos = np.asarray(dividendos, dtype=float)
+        entrada = self._entrada((float(despesas), float(pro_labore), int(num_pf), float(aliquota_irpj_csll), float(limite_dividendos_pf), float(aliquota_irrf_dividendos)))
+        taxas = {"aliquota_irpj_csll": aliquota_irpj_csll, "limite_dividendos_pf": limite_dividendos_pf, "aliquota_irrf_dividendos": aliquota_irrf_dividendos}
+        irpj_csll = self._completar(entrada["irpj_csll"], faturamentos, lambda f: compute_scenario_batch(f, despesas, pro_labore, 0.0, num_pf, **taxas)["irpj_csll"])
+        irrf = self._completar(entrada["irrf_dividendos"], dividendos, lambda d: compute_scenario_batch(0.0, 0.0, 0.0, d, num_pf, **taxas)["irrf_dividendos"])
+        # Linhas = dividendos, colunas = faturamento (mesma orientação do heatmap)
+        total_impostos = irpj_csll[None, :] + irrf[:, None]
+        fat = np.where(faturamentos > 0, faturamentos, 0.0)[None, :]
+        carga_efetiva = np.divide(total_impostos, fat, out=np.zeros_like(total_impostos), where=fat > 0) * 100
+        return {"total_impostos": total_impostos, "carga_efetiva": carga_efetiva, "gatilho": limite_dividendos_pf * max(1, num_pf)}
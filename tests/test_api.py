@@ -0,0 +1,71 @@
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import api
+from utils import compute_scenario
+
+CENARIO = {"faturamento": 300_000, "despesas": 60_000, "pro_labore": 20_000, "dividendos_total": 120_000, "num_pf": 2}
+
+@pytest.fixture(scope="module")
+def porta():
+    servidor = api.make_server("127.0.0.1", 0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield servidor.server_address[1]
+    servidor.shutdown()
+    servidor.server_close()
+
+def _post(porta: int, rota: str, corpo):
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=10)
+    try:
+        conexao.request("POST", rota, body=corpo if isinstance(corpo, bytes) else json.dumps(corpo))
+        resposta = conexao.getresponse()
+        return resposta.status, json.loads(resposta.read())
+    finally:
+        conexao.close()
+
+def _bruto(porta: int, requisicao: bytes) -> int:
+    # Cabeçalhos montados à mão, para os casos que o http.client não deixa enviar
+    with socket.create_connection(("127.0.0.1", porta), timeout=10) as s:
+        s.sendall(requisicao)
+        return int(s.makefile("rb").readline().split()[1])
+
+def test_cenario_igual_ao_compute_scenario(porta):
+    status, corpo = _post(porta, "/scenario", CENARIO)
+    assert status == 200
+    assert corpo == compute_scenario(*CENARIO.values()).to_dict()
+
+@pytest.mark.parametrize("rota, corpo, mensagem", [
+    ("/scenario", {**CENARIO, "faturamento": 10 ** 400}, "Campo numérico inválido: faturamento"),
+    ("/scenario", {**CENARIO, "despesas": "muito"}, "Campo numérico inválido: despesas"),
+    ("/scenario", {**CENARIO, "num_pf": True}, "Campo numérico inválido: num_pf"),
+    ("/scenario", {"faturamento": 1}, "Campo obrigatório ausente: despesas"),
+    ("/scenario", [1, 2], "Corpo deve ser um objeto JSON"),
+    ("/scenario", b"{nao e json", "JSON inválido"),
+    ("/scenario", b"\xff\xfe", "JSON inválido"),
+    ("/bulk", {"cenarios": {**CENARIO, "faturamento": [1, 2], "despesas": [1, 2, 3]}}, "Colunas com tamanhos diferentes"),
+    ("/bulk", {"cenarios": {k: [v, v] for k, v in CENARIO.items()}, "regime": "MEI"}, "Regime inválido: MEI"),
+    ("/bulk", {"cenarios": {**{k: [v] for k, v in CENARIO.items()}, "faturamento": [10 ** 400]}}, "Coluna numérica inválida: faturamento"),
+])
+def test_erros_de_entrada_dao_400(porta, rota, corpo, mensagem):
+    assert _post(porta, rota, corpo) == (400, {"erro": mensagem})
+
+def test_rota_desconhecida_da_404(porta):
+    assert _post(porta, "/nada", CENARIO)[0] == 404
+
+def test_content_length(porta):
+    assert _bruto(porta, b"POST /scenario HTTP/1.1\r\nHost: x\r\n\r\n") == 411
+    assert _bruto(porta, b"POST /scenario HTTP/1.1\r\nHost: x\r\nContent-Length: abc\r\n\r\n{}") == 400
+    assert _bruto(porta, b"POST /scenario HTTP/1.1\r\nHost: x\r\nContent-Length: -5\r\n\r\n{}") == 400
+    assert _bruto(porta, b"POST /scenario HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n" % (api.MAX_BODY + 1)) == 413
+
+def test_bulk_marca_o_simples_acima_do_teto(porta):
+    colunas = {**{k: [v, v] for k, v in CENARIO.items()}, "faturamento": [100_000, 500_000]}
+    status, corpo = _post(porta, "/bulk", {"cenarios": colunas, "regime": "Simples Nacional"})
+    assert status == 200
+    assert corpo["excede_limite"] == [False, True] and corpo["total_impostos"][1] is None
@@ -0,0 +1,47 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from batch import ALERTA_DESPESAS_EXCEDEM, ALERTA_FATURAMENTO_ZERO, ALERTA_NEGATIVO, ALERTAS_ERRO, SCENARIO_COLUMNS, alert_messages, compute_scenario_batch, validate_inputs_batch
+from utils import compute_scenario, validate_inputs
+
+def _cenarios(n: int = 2_000, seed: int = 0):
+    # Inclui zeros, negativos e dividendos em torno do gatilho de R$ 50 mil por sócio
+    rng = np.random.default_rng(seed)
+    faturamento = np.round(rng.choice([0.0, -1_000.0, 1.0], n, p=[0.02, 0.02, 0.96]) * rng.uniform(0, 600_000, n), 2)
+    despesas = np.round(rng.uniform(-5_000, 300_000, n), 2)
+    pro_labore = np.round(rng.uniform(0, 60_000, n), 2)
+    num_pf = rng.integers(0, 5, n)
+    dividendos = np.where(rng.random(n) < 0.2, 50_000.0 * np.maximum(num_pf, 1), np.round(rng.uniform(0, 400_000, n), 2))
+    return faturamento, despesas, pro_labore, dividendos, num_pf
+
+def test_gatilho_do_irrf_e_estrito_e_incide_sobre_todo_o_dividendo():
+    # R$ 50.000,00 por sócio ainda sai sem IRRF; um centavo acima, os 10% valem sobre o total distribuído
+    no_limite = compute_scenario(300_000, 50_000, 30_000, 100_000, 2)
+    acima = compute_scenario(300_000, 50_000, 30_000, 100_000.02, 2)
+    assert not no_limite["estourou_gatilho"] and no_limite["irrf_dividendos"] == 0
+    assert acima["estourou_gatilho"] and acima["irrf_dividendos"] == 100_000.02 * 0.10
+    # O degrau: R$ 0,02 a mais de dividendos custam R$ 10 mil de imposto
+    assert acima["total_impostos"] - no_limite["total_impostos"] > 10_000
+
+def test_lote_igual_ao_escalar():
+    faturamento, despesas, pro_labore, dividendos, num_pf = _cenarios()
+    lote = compute_scenario_batch(faturamento, despesas, pro_labore, dividendos, num_pf)
+    for i in range(faturamento.size):
+        escalar = compute_scenario(faturamento[i], despesas[i], pro_labore[i], dividendos[i], int(num_pf[i]))
+        assert {c: lote[c][i].item() for c in SCENARIO_COLUMNS} == escalar.to_dict(), i
+
+def test_validacao_em_lote_igual_a_escalar():
+    faturamento, despesas, pro_labore, dividendos, _ = _cenarios(seed=1)
+    codigos = validate_inputs_batch(faturamento, despesas, pro_labore, dividendos)
+    mensagens = alert_messages(codigos)
+    for i in range(faturamento.size):
+        valido, mensagem = validate_inputs(faturamento[i], despesas[i], pro_labore[i], dividendos[i])
+        assert (valido, mensagem) == ((codigos[i] & ALERTAS_ERRO) == 0, mensagens[i]), i
+
+def test_codigos_de_alerta():
+    codigos = validate_inputs_batch([100_000, 0, -1, 100_000], [10_000, 0, 0, 90_000], [20_000, 0, 0, 20_000], [0, 0, 0, 0])
+    # Todas as regras são avaliadas; a mensagem de uma linha com erro mostra só o erro
+    assert codigos.tolist() == [0, ALERTA_FATURAMENTO_ZERO, ALERTA_NEGATIVO | ALERTA_DESPESAS_EXCEDEM, ALERTA_DESPESAS_EXCEDEM]
+    assert alert_messages(codigos)[2] == validate_inputs(-1, 0, 0, 0)[1]
@@ -0,0 +1,29 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from breakeven import BreakevenIndex, breakeven_despesas, max_tax_free_dividend, revenue_for_load
+
+FATURAMENTO = np.array([100_000.0, 200_000.0, 300_000.0])
+FOLHA = np.array([120_000.0, 600_000.0, 1_200_000.0])
+
+def test_dividendo_no_limite_ainda_sai_sem_irrf():
+    np.testing.assert_array_equal(max_tax_free_dividend([1, 3], 50_000.0), [50_000.0, 150_000.0])
+    np.testing.assert_array_equal(max_tax_free_dividend(2, 50_000.0, [30_000.0, -1.0]), [30_000.0, 0.0])
+
+def test_indice_aceita_folha_por_linha_no_simples():
+    indice = BreakevenIndex()
+    esperado = breakeven_despesas(FATURAMENTO, 15_000.0, 80_000.0, 1, "Simples Nacional", folha_12m=FOLHA)
+    np.testing.assert_array_equal(indice.breakeven_despesas(FATURAMENTO, 15_000.0, 80_000.0, 1, "Simples Nacional", folha_12m=FOLHA), esperado)
+    # Mesma folha em outra ordem: respostas vêm da memória, linha a linha
+    np.testing.assert_array_equal(indice.breakeven_despesas(FATURAMENTO[::-1], 15_000.0, 80_000.0, 1, "Simples Nacional", folha_12m=FOLHA[::-1]), esperado[::-1])
+    # Folha escalar é só uma coluna constante
+    escalar = indice.breakeven_despesas(FATURAMENTO, 15_000.0, 80_000.0, 1, "Simples Nacional", folha_12m=300_000.0)
+    np.testing.assert_array_equal(escalar, breakeven_despesas(FATURAMENTO, 15_000.0, 80_000.0, 1, "Simples Nacional", folha_12m=300_000.0))
+
+def test_receita_para_a_carga_com_folha_por_linha():
+    cargas = np.array([10.0, 12.0, 14.0])
+    resposta = BreakevenIndex().revenue_for_load(cargas, 20_000.0, 15_000.0, 50_000.0, 1, "Simples Nacional", folha_12m=FOLHA)
+    esperado = [revenue_for_load(c, 20_000.0, 15_000.0, 50_000.0, 1, "Simples Nacional", folha_12m=f) for c, f in zip(cargas, FOLHA)]
+    np.testing.assert_allclose(resposta, esperado)
@@ -0,0 +1,38 @@
+import gc
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.figure import Figure
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from charts import render_tax_chart_png
+
+# Sem o cache LRU: cada chamada cria e renderiza uma figura nova
+_renderizar = render_tax_chart_png.__wrapped__
+
+def _valores(i: int):
+    base = 10_000.0 + i * 37.0
+    return base, base * 0.1, base * 1.1, base * 0.8, 0.0, base * 0.8
+
+def _figuras_vivas() -> int:
+    gc.collect()
+    return sum(isinstance(o, Figure) for o in gc.get_objects())
+
+def test_renderizacao_nao_deixa_figuras_nem_pyplot():
+    antes = _figuras_vivas()
+    png = _renderizar(*_valores(0))
+    assert png.startswith(b"\x89PNG")
+    assert _figuras_vivas() == antes
+    assert "matplotlib.pyplot" not in sys.modules
+
+def test_memoria_estavel_com_sessoes_concorrentes():
+    # Renderizações paralelas dão os mesmos PNGs das sequenciais e, após o aquecimento, não deixam
+    # objetos para trás
+    esperados = [_renderizar(*_valores(i)) for i in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(lambda i: _renderizar(*_valores(i)), range(4))) == esperados
+        gc.collect()
+        objetos = len(gc.get_objects())
+        list(pool.map(lambda i: _renderizar(*_valores(i)), range(4, 16)))
+    assert _figuras_vivas() == 0
+    assert len(gc.get_objects()) - objetos < 1_000
@@ -0,0 +1,27 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cli
+
+def _entrada() -> pd.DataFrame:
+    return pd.DataFrame({"faturamento": [100_000.0, 300_000.0], "num_pf": [1, 2], "desp_atual": [20_000.0, 60_000.0], "pl_atual": [15_000.0, 20_000.0], "div_atual": [50_000.0, 150_000.0], "desp_otim": [30_000.0, 80_000.0], "pl_otim": [20_000.0, 40_000.0], "div_otim": [40_000.0, 100_000.0]})
+
+def test_out_of_core_com_csv_e_recusado(tmp_path):
+    entrada = tmp_path / "clientes.csv"
+    _entrada().to_csv(entrada, index=False)
+    with pytest.raises(ValueError, match="--out-of-core requer entrada Parquet ou Arrow IPC"):
+        cli.run(entrada, tmp_path / "saida.parquet", out_of_core=True)
+    assert cli.main([str(entrada), str(tmp_path / "saida.parquet"), "--out-of-core"]) == 1
+    assert not (tmp_path / "saida.parquet").exists()
+
+def test_csv_e_out_of_core_dao_o_mesmo_resultado(tmp_path):
+    _entrada().to_csv(tmp_path / "clientes.csv", index=False)
+    _entrada().to_parquet(tmp_path / "clientes.parquet")
+    assert cli.run(tmp_path / "clientes.csv", tmp_path / "saida.csv", chunksize=1) == 2
+    assert cli.run(tmp_path / "clientes.parquet", tmp_path / "saida.parquet", out_of_core=True) == 2
+    csv, parquet = pd.read_csv(tmp_path / "saida.csv"), pd.read_parquet(tmp_path / "saida.parquet")
+    pd.testing.assert_series_equal(csv["economia_mensal"], parquet["economia_mensal"])
+    assert csv["atual_estourou_gatilho"].tolist() == [False, True]
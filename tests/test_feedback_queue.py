@@ -0,0 +1,126 @@
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from contextlib import closing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feedback_queue import FeedbackQueue, FeedbackWorker, SMTPConfig
+
+class _SMTPFalso(socketserver.StreamRequestHandler):
+    # Servidor SMTP mínimo: guarda as mensagens recebidas e recusa o DATA enquanto o servidor pedir
+    def _responder(self, linha: str) -> None:
+        self.wfile.write(f"{linha}\r\n".encode())
+
+    def handle(self):
+        servidor = self.server
+        servidor.conexoes += 1
+        self._responder("220 falso")
+        while True:
+            linha = self.rfile.readline().decode().strip()
+            comando = linha.split(" ", 1)[0].upper()
+            if not linha or comando == "QUIT":
+                self._responder("221 tchau")
+                return
+            if comando in ("EHLO", "HELO", "MAIL", "RCPT", "NOOP", "RSET"):
+                self._responder("250 ok")
+            elif comando == "DATA":
+                self._responder("354 manda")
+                corpo = []
+                while (parte := self.rfile.readline().decode()) != ".\r\n":
+                    corpo.append(parte)
+                if servidor.recusar > 0:
+                    servidor.recusar -= 1
+                    self._responder("554 recusada")
+                else:
+                    servidor.mensagens.append("".join(corpo))
+                    self._responder("250 entregue")
+            else:
+                self._responder("502 nao implementado")
+
+def _servidor():
+    servidor = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPFalso)
+    servidor.daemon_threads = True
+    servidor.mensagens, servidor.recusar, servidor.conexoes = [], 0, 0
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def _worker(tmp_path, porta: int, **kwargs):
+    fila = FeedbackQueue(str(tmp_path / "fila.sqlite3"))
+    config = SMTPConfig("127.0.0.1", porta, "simulador@example.com", "", "destino@example.com", starttls=False)
+    return fila, FeedbackWorker(fila, config, **kwargs)
+
+def _enfileirar(fila: FeedbackQueue, n: int) -> None:
+    for i in range(n):
+        fila.enqueue(f"Nome {i}", "a@example.com", "Cidade", "Contador", f"Sugestão {i}")
+
+def test_entrega_em_uma_conexao(tmp_path):
+    servidor = _servidor()
+    try:
+        fila, worker = _worker(tmp_path, servidor.server_address[1])
+        _enfileirar(fila, 3)
+        assert worker.process_once() == 3
+        worker._close()
+        assert fila.counts() == {"enviado": 3}
+        assert len(servidor.mensagens) == 3 and "Sugest" in servidor.mensagens[0]
+        assert servidor.conexoes == 1
+    finally:
+        servidor.shutdown()
+
+def test_recusa_volta_para_a_fila_e_esgota_no_dead_letter(tmp_path):
+    servidor = _servidor()
+    try:
+        fila, worker = _worker(tmp_path, servidor.server_address[1], max_tentativas=2, backoff_base=0.0)
+        _enfileirar(fila, 2)
+        # A recusa é só da mensagem: a seguinte ainda sai no mesmo lote
+        servidor.recusar = 1
+        assert worker.process_once() == 1
+        assert fila.counts() == {"enviado": 1, "pendente": 1}
+        servidor.recusar = 1
+        assert worker.process_once() == 0
+        assert fila.counts() == {"enviado": 1, "falhou": 1}
+        assert worker.process_once() == 0
+        worker._close()
+    finally:
+        servidor.shutdown()
+
+def test_servidor_fora_do_ar_para_o_lote_e_espera(tmp_path):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        porta = s.getsockname()[1]
+    fila, worker = _worker(tmp_path, porta, backoff_base=60.0)
+    _enfileirar(fila, 5)
+    inicio = time.time()
+    assert worker.process_once() == 0
+    # Só o primeiro item gastou uma tentativa; os demais seguem pendentes, sem novas conexões até o fim da espera
+    assert fila.counts() == {"pendente": 5}
+    assert worker._pausa_ate >= inicio + 60.0
+    assert worker.process_once() == 0
+    with closing(fila._connect()) as conn:
+        assert sorted(n for (n,) in conn.execute("SELECT tentativas FROM fila_feedback")) == [0, 0, 0, 0, 1]
+
+def test_run_sobrevive_a_excecao_inesperada(tmp_path, caplog):
+    servidor = _servidor()
+    try:
+        fila, worker = _worker(tmp_path, servidor.server_address[1], poll_interval=0.01)
+        original = worker.process_once
+        chamadas = []
+        def falha_uma_vez():
+            chamadas.append(1)
+            if len(chamadas) == 1:
+                raise RuntimeError("erro inesperado")
+            return original()
+        worker.process_once = falha_uma_vez
+        _enfileirar(fila, 1)
+        worker.start()
+        for _ in range(200):
+            if fila.counts().get("enviado"):
+                break
+            time.sleep(0.01)
+        worker.stop(5)
+        assert fila.counts() == {"enviado": 1}
+        assert "erro inesperado" in caplog.text
+    finally:
+        servidor.shutdown()
@@ -0,0 +1,56 @@
+import logging
+import os
+import sqlite3
+import sys
+from contextlib import closing
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import history
+from cli import process_chunk
+from history import SAIDAS, ScenarioStore, scenario_key
+from regimes import compute_regime_batch, compute_scenario_regime
+
+TAXAS = (0.34, 50_000.0, 0.10)
+
+def test_chave_muda_com_a_versao_das_regras(monkeypatch):
+    entradas = (100_000.0, 20_000.0, 15_000.0, 60_000.0, 1)
+    chave = scenario_key("Lucro Real", entradas, TAXAS)
+    assert chave == scenario_key("Lucro Real", entradas, TAXAS)
+    monkeypatch.setattr(history, "VERSAO_REGRAS", "outra")
+    assert scenario_key("Lucro Real", entradas, TAXAS) != chave
+
+def test_save_e_get_devolvem_o_mesmo_cenario(tmp_path):
+    store = ScenarioStore(str(tmp_path / "h.sqlite3"))
+    entradas = (100_000.0, 20_000.0, 15_000.0, 60_000.0, 2)
+    resultado = compute_scenario_regime("Lucro Real", *entradas, *TAXAS)
+    chave = scenario_key("Lucro Real", entradas, TAXAS)
+    assert store.save(chave, "Lucro Real", entradas, TAXAS, resultado) == 1
+    assert store.save(chave, "Lucro Real", entradas, TAXAS, resultado) == 0
+    assert store.get(chave).to_dict() == resultado.to_dict()
+    store.record_run("Cliente", "Lucro Real", TAXAS, chave, chave)
+    assert store.clients() == ["Cliente"] and store.runs()[0]["impostos_atual"] == resultado["total_impostos"]
+
+def test_simples_acima_do_teto_fica_de_fora_e_e_avisado(tmp_path, caplog):
+    store = ScenarioStore(str(tmp_path / "h.sqlite3"))
+    faturamento = np.array([100_000.0, 500_000.0, 200_000.0])
+    entradas = {"faturamento": faturamento, "despesas": np.full(3, 20_000.0), "pro_labore": np.full(3, 15_000.0), "dividendos_total": np.full(3, 30_000.0), "num_pf": np.ones(3)}
+    resultado = compute_regime_batch("Simples Nacional", **entradas, aliquota_irpj_csll=0.34, limite_dividendos_pf=50_000.0, aliquota_irrf_dividendos=0.10)
+    assert np.isnan(resultado["total_impostos"][1])
+    with caplog.at_level(logging.WARNING, logger="history"):
+        gravados = store.save_many("Simples Nacional", entradas, {k: resultado[k] for k in SAIDAS}, taxas=TAXAS)
+    assert gravados == 2
+    assert "1 de 3" in caplog.text
+    with closing(sqlite3.connect(store.path)) as conn:
+        assert sorted(f for (f,) in conn.execute("SELECT faturamento FROM cenarios")) == [100_000.0, 200_000.0]
+
+def test_save_history_grava_os_dois_cenarios_de_cada_linha(tmp_path):
+    entrada = pd.DataFrame({"faturamento": [100_000.0, 300_000.0], "num_pf": [1, 2], "desp_atual": [20_000.0, 60_000.0], "pl_atual": [15_000.0, 20_000.0], "div_atual": [50_000.0, 150_000.0], "desp_otim": [30_000.0, 80_000.0], "pl_otim": [20_000.0, 40_000.0], "div_otim": [40_000.0, 100_000.0]})
+    caminho = tmp_path / "h.sqlite3"
+    taxas = dict(zip(("aliquota_irpj_csll", "limite_dividendos_pf", "aliquota_irrf_dividendos"), TAXAS))
+    assert history.save_history(caminho, process_chunk(entrada, taxas), taxas) == 4
+    # Reprocessar o mesmo arquivo não duplica cenários
+    assert history.save_history(caminho, process_chunk(entrada, taxas), taxas) == 0
+    chave = scenario_key("Lucro Real", (300_000.0, 60_000.0, 20_000.0, 150_000.0, 2), TAXAS)
+    assert ScenarioStore(str(caminho)).get(chave)["irrf_dividendos"] == 15_000.0
@@ -0,0 +1,41 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from irpfm import minimum_rate, reconcile_partners, reconcile_year
+from partners import compute_scenario_partners, partner_irrf
+
+def _ano(aliquota_pj: float, dividendo_mensal: float = 100_000.0):
+    # Um sócio, 12 meses iguais; a empresa paga `aliquota_pj` sobre R$ 400 mil de lucro por mês
+    dividendos = np.full((12, 1), dividendo_mensal)
+    return dividendos, partner_irrf(dividendos), np.full(12, aliquota_pj * 400_000.0), np.full(12, 400_000.0)
+
+def test_aliquota_minima_sobe_linearmente_entre_600_mil_e_1_2_milhao():
+    np.testing.assert_allclose(minimum_rate([0.0, 600_000.0, 900_000.0, 1_200_000.0, 5_000_000.0]), [0.0, 0.0, 0.05, 0.10, 0.10])
+
+@pytest.mark.parametrize("aliquota_pj, redutor", [(0.34, 120_000.0), (0.30, 72_000.0), (0.20, 0.0)])
+def test_redutor_devolve_o_que_passa_da_aliquota_nominal(aliquota_pj, redutor):
+    # R$ 1,2 milhão de dividendos: IRPFM bruto de R$ 120 mil; o redutor é o excesso de (PJ efetiva + 10%) sobre 34%
+    resultado = reconcile_partners(*_ano(aliquota_pj))
+    assert resultado["irpfm_bruto"][0] == pytest.approx(120_000.0)
+    assert resultado["redutor"][0] == pytest.approx(redutor)
+    assert resultado["irpfm_devido"][0] == pytest.approx(120_000.0 - redutor)
+
+def test_irrf_retido_a_mais_vira_restituicao():
+    # IRRF de 10% todo mês (R$ 100 mil > limite) e nenhum IRPFM devido com a empresa a 34%
+    resultado = reconcile_partners(*_ano(0.34))
+    assert resultado["irrf_retido"][0] == pytest.approx(120_000.0)
+    assert resultado["restituicao"][0] == pytest.approx(120_000.0) and resultado["imposto_a_pagar"][0] == 0.0
+    # Imposto já pago sobre outros rendimentos abate o mínimo antes do redutor
+    abatido = reconcile_partners(*_ano(0.20, 40_000.0), outros_rendimentos=600_000.0, imposto_outros=50_000.0)
+    assert abatido["irpfm_bruto"][0] == pytest.approx(0.08 * 1_080_000.0)
+    assert abatido["irpfm_devido"][0] == pytest.approx(0.08 * 1_080_000.0 - 50_000.0)
+
+def test_reconcile_year_com_o_resultado_mensal_dos_socios():
+    mensal = compute_scenario_partners(np.full((2, 12), 300_000.0), 60_000.0, 20_000.0, np.tile([[60_000.0, 40_000.0]], (2, 12, 1)))
+    resultado = reconcile_year(mensal)
+    assert resultado["saldo"].shape == (2, 2)
+    np.testing.assert_allclose(resultado["irrf_retido"][0], [12 * 6_000.0, 0.0])
+    np.testing.assert_allclose(resultado["dividendos_anuais"][0], [720_000.0, 480_000.0])
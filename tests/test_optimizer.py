@@ -0,0 +1,38 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from optimizer import optimize_scenario
+from utils import compute_scenario
+
+def _forca_bruta(faturamento, num_pf, retirada, desp_max, pl_min_ratio=0.05, pl_max=None):
+    # Grade fina de pró-labore e despesas com as mesmas restrições do otimizador
+    melhor = None
+    p_hi = retirada if pl_max is None else min(pl_max, retirada)
+    for p in np.linspace(pl_min_ratio * faturamento, p_hi, 401):
+        for d in np.linspace(0, desp_max, 201):
+            if (1 - 0.34) * max(0, faturamento - d - p) < retirada - p - 1e-6:
+                continue
+            total = compute_scenario(faturamento, d, p, retirada - p, num_pf)["total_impostos"]
+            melhor = total if melhor is None else min(melhor, total)
+    return melhor
+
+@pytest.mark.parametrize("faturamento, num_pf, retirada, desp_max", [(300_000.0, 1, 150_000.0, 80_000.0), (300_000.0, 2, 200_000.0, 50_000.0), (120_000.0, 1, 90_000.0, 10_000.0), (600_000.0, 3, 250_000.0, 200_000.0)])
+def test_nao_perde_para_a_forca_bruta(faturamento, num_pf, retirada, desp_max):
+    otimo = optimize_scenario(faturamento, num_pf, retirada, desp_max)
+    assert otimo["total_impostos"] <= _forca_bruta(faturamento, num_pf, retirada, desp_max) + 1e-6
+    # Restrições: retirada preservada, pró-labore mínimo e lucro após IRPJ/CSLL cobrindo os dividendos
+    assert otimo["pro_labore"] + otimo["dividendos_total"] == pytest.approx(retirada)
+    assert otimo["pro_labore"] >= 0.05 * faturamento - 1e-6
+    assert otimo["lucro_apos_irpj_csll"] >= otimo["dividendos_total"] - 1e-6
+
+def test_fica_abaixo_do_gatilho_quando_possivel():
+    # R$ 60 mil de dividendos estouram o gatilho; mover R$ 10 mil para o pró-labore evita o IRRF
+    otimo = optimize_scenario(300_000.0, 1, 90_000.0, 100_000.0)
+    assert not otimo["estourou_gatilho"] and otimo["dividendos_por_pf"] <= 50_000.0
+
+def test_inviavel_devolve_none():
+    assert optimize_scenario(100_000.0, 1, 50_000.0, 10_000.0, pl_min_ratio=0.05, pl_max=1_000.0) is None
+    assert optimize_scenario(100_000.0, 1, 50_000.0, 10_000.0, desp_min=20_000.0) is None
@@ -0,0 +1,39 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from partners import allocate_dividends, allocate_dividends_batch, compute_scenario_partners
+from utils import compute_scenario
+
+def test_gatilho_por_socio():
+    # Só o sócio acima do limite paga IRRF, sobre tudo o que recebeu
+    resultado = compute_scenario_partners(300_000.0, 60_000.0, 20_000.0, [80_000.0, 20_000.0])
+    np.testing.assert_allclose(resultado["irrf_socios"], [8_000.0, 0.0])
+    assert resultado["socios_acima_limite"] == 1 and resultado["estourou_gatilho"]
+
+def test_posicoes_vazias_nao_entram_na_media():
+    # Sócios ausentes (0) não diluem os dividendos por PF; com partes iguais o resultado é o do compute_scenario
+    resultado = compute_scenario_partners(300_000.0, 60_000.0, 20_000.0, [[60_000.0, 0.0, 0.0], [30_000.0, 30_000.0, 0.0]])
+    np.testing.assert_allclose(resultado["dividendos_por_pf"], [60_000.0, 30_000.0])
+    iguais = compute_scenario_partners(300_000.0, 60_000.0, 20_000.0, [60_000.0, 60_000.0])
+    assert iguais["total_impostos"] == compute_scenario(300_000.0, 60_000.0, 20_000.0, 120_000.0, 2)["total_impostos"]
+
+def test_alocacao_respeita_o_limite_enquanto_cabe():
+    alocacao = allocate_dividends(120_000.0, [0.5, 0.3, 0.2])
+    np.testing.assert_allclose(alocacao.sum(), 120_000.0)
+    assert (alocacao <= 50_000.0 + 1e-6).all()
+    # Acima de limite × sócios, o excesso vai todo para o sócio de maior participação
+    excesso = allocate_dividends(200_000.0, [0.5, 0.3, 0.2])
+    np.testing.assert_allclose(excesso, [100_000.0, 50_000.0, 50_000.0])
+    assert allocate_dividends(10_000.0, [0.0, 0.0]) is None
+
+def test_alocacao_em_lote_igual_a_uma_por_vez():
+    rng = np.random.default_rng(0)
+    participacoes = np.where(rng.random((200, 4)) < 0.2, 0.0, rng.random((200, 4)))
+    participacoes[:, 0] += 0.01
+    totais = rng.uniform(0, 300_000, 200)
+    lote = allocate_dividends_batch(totais, participacoes)
+    np.testing.assert_allclose(lote.sum(axis=1), totais)
+    for i in range(0, 200, 17):
+        np.testing.assert_allclose(lote[i], allocate_dividends(totais[i], participacoes[i]))
@@ -0,0 +1,44 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from projection import Projection
+
+def _projecao(clientes: int = 3, meses: int = 12) -> Projection:
+    faturamento = np.linspace(100_000, 400_000, clientes)[:, None]
+    return Projection(faturamento, faturamento * 0.2, 15_000, np.linspace(40_000, 200_000, clientes)[:, None], 2, meses=meses)
+
+def _recalculada(p: Projection) -> Projection:
+    return Projection(*(p.series[nome] for nome in ("faturamento", "despesas", "pro_labore", "dividendos_total", "num_pf")), params=p.params)
+
+def test_update_vetor_por_cliente_quando_clientes_igual_a_meses():
+    # 2 clientes selecionados e 2 meses: o vetor é um valor por cliente, repetido nos dois meses
+    p = _projecao()
+    p.update(3, 5, clientes=np.array([0, 2]), dividendos_total=[10_000, 90_000])
+    np.testing.assert_array_equal(p.series["dividendos_total"][[0, 2], 3:5], [[10_000, 10_000], [90_000, 90_000]])
+    np.testing.assert_array_equal(p.resultados["total_impostos"], _recalculada(p).resultados["total_impostos"])
+
+def test_update_vetor_por_cliente_com_mascara_e_varios_meses():
+    p = _projecao()
+    p.update(0, 6, clientes=np.array([True, False, True]), despesas=[1_000, 2_000])
+    np.testing.assert_array_equal(p.series["despesas"][0, :6], 1_000)
+    np.testing.assert_array_equal(p.series["despesas"][2, :6], 2_000)
+    np.testing.assert_array_equal(p.resultados["total_impostos"], _recalculada(p).resultados["total_impostos"])
+
+def test_update_vetor_por_mes():
+    p = _projecao()
+    p.update(2, 6, faturamento=[150_000, 250_000, 350_000, 450_000])
+    np.testing.assert_array_equal(p.series["faturamento"][:, 2:6], np.tile([150_000, 250_000, 350_000, 450_000.0], (3, 1)))
+    np.testing.assert_allclose(p.impostos_acumulados, _recalculada(p).impostos_acumulados)
+
+def test_init_e_update_leem_vetores_com_a_mesma_regra_quando_clientes_igual_a_meses():
+    # 3 clientes e 3 meses: o vetor é por cliente na criação e na alteração; uma linha é por mês
+    dividendos = np.array([10_000.0, 90_000.0, 200_000.0])
+    p = Projection(np.full((3, 3), 300_000.0), 60_000, 15_000, dividendos, 1)
+    np.testing.assert_array_equal(p.series["dividendos_total"], np.repeat(dividendos[:, None], 3, axis=1))
+    p.update(0, 3, dividendos_total=dividendos[::-1])
+    np.testing.assert_array_equal(p.series["dividendos_total"], np.repeat(dividendos[::-1, None], 3, axis=1))
+    p.update(0, 3, dividendos_total=dividendos[None, :])
+    np.testing.assert_array_equal(p.series["dividendos_total"], np.tile(dividendos, (3, 1)))
+    np.testing.assert_array_equal(p.resultados["total_impostos"], _recalculada(p).resultados["total_impostos"])
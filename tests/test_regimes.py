@@ -0,0 +1,42 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from regimes import ANEXO_III, ANEXO_V, FATOR_R_MINIMO, compute_regime_batch, compute_scenario_regime, effective_rate, fator_r
+from utils import compute_scenario
+
+def test_fator_r_de_28_por_cento_vai_para_o_anexo_iii():
+    # R$ 100 mil/mês: RBT12 de R$ 1,2 milhão na 4ª faixa; folha exatamente no mínimo fica no Anexo III
+    rbt12 = 1_200_000.0
+    folha = np.array([FATOR_R_MINIMO * rbt12, FATOR_R_MINIMO * rbt12 - 1.0])
+    resultado = compute_regime_batch("Simples Nacional", 100_000.0, 20_000.0, 15_000.0, 30_000.0, 1, folha_12m=folha)
+    assert resultado["anexo"].tolist() == [3, 5]
+    np.testing.assert_allclose(resultado["aliquota_efetiva"], [(rbt12 * 0.16 - 35_640.0) / rbt12, (rbt12 * 0.205 - 17_100.0) / rbt12])
+    np.testing.assert_allclose(resultado["irpj_csll"], resultado["aliquota_efetiva"] * 100_000.0)
+
+def test_fator_r_sem_historico_usa_o_pro_labore_anualizado():
+    # Sem folha informada, a folha de 12 meses é o pró-labore × 12
+    np.testing.assert_allclose(fator_r(15_000.0 * 12, 50_000.0 * 12), 0.3)
+    assert compute_regime_batch("Simples Nacional", 50_000.0, 0.0, 15_000.0, 0.0, 1)["anexo"] == 3
+    assert compute_regime_batch("Simples Nacional", 50_000.0, 0.0, 10_000.0, 0.0, 1)["anexo"] == 5
+    assert fator_r(100.0, 0.0) == 0.0
+
+def test_aliquota_efetiva_nas_bordas_das_faixas_e_acima_do_teto():
+    efetiva, excede = effective_rate(ANEXO_III, [0.0, 180_000.0, 180_000.01, 4_800_000.0, 4_800_000.01])
+    np.testing.assert_allclose(efetiva[:4], [0.06, 0.06, (180_000.01 * 0.112 - 9_360.0) / 180_000.01, (4_800_000.0 * 0.33 - 648_000.0) / 4_800_000.0])
+    assert np.isnan(efetiva[4]) and excede.tolist() == [False, False, False, False, True]
+    assert np.isnan(effective_rate(ANEXO_V, 5_000_000.0)[0])
+
+def test_presumido_com_adicional_do_irpj():
+    # Serviços: presunção de 32%; IRPJ 15% + adicional de 10% acima de R$ 20 mil de base; CSLL 9% sobre 32%
+    resultado = compute_scenario_regime("Lucro Presumido", 100_000.0, 40_000.0, 15_000.0, 30_000.0, 1)
+    assert resultado["irpj_csll"] == pytest.approx(0.15 * 32_000.0 + 0.10 * 12_000.0 + 0.09 * 32_000.0)
+    hospitalar = compute_scenario_regime("Lucro Presumido", 100_000.0, 40_000.0, 15_000.0, 30_000.0, 1, atividade="servicos_hospitalares")
+    assert hospitalar["irpj_csll"] == pytest.approx(0.15 * 8_000.0 + 0.09 * 12_000.0)
+
+def test_lucro_real_e_o_compute_scenario():
+    assert compute_scenario_regime("Lucro Real", 200_000.0, 50_000.0, 20_000.0, 120_000.0, 2) == compute_scenario(200_000.0, 50_000.0, 20_000.0, 120_000.0, 2)
+    with pytest.raises(ValueError):
+        compute_regime_batch("MEI", 1.0, 0.0, 0.0, 0.0, 1)
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from threading import Lock, get_ident
+from typing import Dict, List, Optional
+
+# Limites superiores dos buckets em segundos, no estilo dos histogramas do Prometheus
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = "simulador_stage_seconds"
+# Com a instrumentação desligada todo stage() devolve este mesmo contexto vazio: nenhuma medição nem alocação
+_DESLIGADO = nullcontext()
+
+class SessionStages:
+    # Tempos de uma sessão do app por etapa: execuções, total, pior e último, para o painel de depuração
+    def __init__(self):
+        self.etapas: Dict[str, List[float]] = {}
+
+    def observe(self, nome: str, segundos: float) -> None:
+        etapa = self.etapas.get(nome)
+        if etapa is None:
+            self.etapas[nome] = [1, segundos, segundos, segundos]
+        else:
+            etapa[0] += 1
+            etapa[1] += segundos
+            etapa[2] = max(etapa[2], segundos)
+            etapa[3] = segundos
+
+    def slowest(self, n: int = 10) -> List[Dict]:
+        linhas = [{"etapa": nome, "execucoes": c, "total": t, "media": t / c, "pior": p, "ultima": u} for nome, (c, t, p, u) in self.etapas.items()]
+        return sorted(linhas, key=lambda linha: linha["pior"], reverse=True)[:n]
+
+class _Cronometro:
+    __slots__ = ("metricas", "nome", "sessao", "inicio")
+
+    def __init__(self, metricas: "StageMetrics", nome: str, sessao: Optional[SessionStages]):
+        self.metricas = metricas
+        self.nome = nome
+        self.sessao = sessao
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.metricas.observe(self.nome, time.perf_counter() - self.inicio, self.sessao)
+
+class StageMetrics:
+    # Histogramas por etapa, compartilhados entre sessões e threads; ligar e desligar vale na hora
+    def __init__(self, enabled: bool = False, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = Lock()
+        self._etapas: Dict[str, List] = {}
+
+    def stage(self, nome: str, sessao: Optional[SessionStages] = None, enabled: Optional[bool] = None):
+        # enabled, quando informado, vale só para esta medição (ex.: a escolha de uma sessão do app) no
+        # lugar do padrão do processo
+        if not (self.enabled if enabled is None else enabled):
+            return _DESLIGADO
+        return _Cronometro(self, nome, sessao)
+
+    def observe(self, nome: str, segundos: float, sessao: Optional[SessionStages] = None) -> None:
+        # Contagens por bucket não acumuladas; a exportação acumula
+        indice = bisect_left(self.buckets, segundos)
+        with self._lock:
+            etapa = self._etapas.get(nome)
+            if etapa is None:
+                etapa = self._etapas[nome] = [[0] * (len(self.buckets) + 1), 0.0, 0.0]
+            etapa[0][indice] += 1
+            etapa[1] += segundos
+            etapa[2] = max(etapa[2], segundos)
+        if sessao is not None:
+            sessao.observe(nome, segundos)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._etapas = {}
+
+    def _copia(self) -> Dict[str, List]:
+        with self._lock:
+            return {nome: [list(contagens), soma, pior] for nome, (contagens, soma, pior) in self._etapas.items()}
+
+    def _quantil(self, contagens: List[int], q: float, pior: float) -> float:
+        # Interpolação linear dentro do bucket, como o histogram_quantile do Prometheus; o último bucket vai até o pior tempo
+        alvo = q * sum(contagens)
+        acumulado = 0
+        for i, c in enumerate(contagens):
+            if c and acumulado + c >= alvo:
+                inferior = self.buckets[i - 1] if i > 0 else 0.0
+                superior = self.buckets[i] if i < len(self.buckets) else max(pior, inferior)
+                return min(inferior + (superior - inferior) * (alvo - acumulado) / c, pior)
+            acumulado += c
+        return 0.0
+
+    def snapshot(self) -> Dict[str, Dict]:
+        saida = {}
+        for nome, (contagens, soma, pior) in sorted(self._copia().items()):
+            n = sum(contagens)
+            acumulado = 0
+            buckets = {}
+            for limite, c in zip((*map(str, self.buckets), "+Inf"), contagens):
+                acumulado += c
+                buckets[limite] = acumulado
+            saida[nome] = {"count": n, "sum": soma, "max": pior, "mean": soma / n if n else 0.0, "p50": self._quantil(contagens, 0.5, pior), "p95": self._quantil(contagens, 0.95, pior), "p99": self._quantil(contagens, 0.99, pior), "buckets": buckets}
+        return saida
+
+    def to_json(self) -> str:
+        return json.dumps({"timestamp": time.time(), "metric": METRIC_NAME, "stages": self.snapshot()}, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        linhas = [f"# HELP {METRIC_NAME} Tempo de cada etapa do simulador em segundos.", f"# TYPE {METRIC_NAME} histogram"]
+        for nome, dados in self.snapshot().items():
+            rotulo = nome.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            for limite, acumulado in dados["buckets"].items():
+                linhas.append(f'{METRIC_NAME}_bucket{{stage="{rotulo}",le="{limite}"}} {acumulado}')
+            linhas.append(f'{METRIC_NAME}_sum{{stage="{rotulo}"}} {dados["sum"]!r}')
+            linhas.append(f'{METRIC_NAME}_count{{stage="{rotulo}"}} {dados["count"]}')
+        return "\n".join(linhas) + "\n"
+
+    def export(self, path: str) -> None:
+        # JSON para .json, texto do Prometheus (node_exporter textfile) para o resto; troca atômica do arquivo
+        conteudo = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        temporario = f"{path}.{os.getpid()}.{get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+        os.replace(temporario, path)
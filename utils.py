@@ -1,10 +1,153 @@
-from typing import Dict, Tuple
-import pandas as pd
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+import numpy as np
+from batch import ALERTA_DESPESAS_EXCEDEM, ALERTA_DIVIDENDOS_EXCEDEM, ALERTA_FATURAMENTO_ZERO, ALERTA_NEGATIVO, ALERTA_PRO_LABORE_BAIXO, MENSAGENS_ALERTA
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SCENARIO_KEYS = ("faturamento", "despesas", "pro_labore", "lucro_antes_impostos", "irpj_csll", "lucro_apos_irpj_csll", "dividendos_total", "dividendos_por_pf", "estourou_gatilho", "irrf_dividendos", "total_impostos", "carga_efetiva", "caixa_apos_impostos")
+
+# Posição de cada chave na tupla de valores, calculada uma vez
+_INDICE = {chave: i for i, chave in enumerate(SCENARIO_KEYS)}
+
+class ScenarioResult(Mapping):
+    # Resultado imutável de compute_scenario; continua acessível como dicionário (r["total_impostos"]).
+    # Os valores ficam numa única tupla, montada em __new__ sem um setattr por campo
+    __slots__ = ("_valores",)
+
+    def __new__(cls, faturamento, despesas, pro_labore, lucro_antes_impostos, irpj_csll, lucro_apos_irpj_csll, dividendos_total, dividendos_por_pf, estourou_gatilho, irrf_dividendos, total_impostos, carga_efetiva, caixa_apos_impostos):
+        self = object.__new__(cls)
+        object.__setattr__(self, "_valores", (faturamento, despesas, pro_labore, lucro_antes_impostos, irpj_csll, lucro_apos_irpj_csll, dividendos_total, dividendos_por_pf, estourou_gatilho, irrf_dividendos, total_impostos, carga_efetiva, caixa_apos_impostos))
+        return self
+
+    def __setattr__(self, chave, valor):
+        raise AttributeError("ScenarioResult é imutável")
+
+    def __delattr__(self, chave):
+        raise AttributeError("ScenarioResult é imutável")
+
+    def __getitem__(self, chave: str):
+        return self._valores[_INDICE[chave]]
+
+    def __contains__(self, chave) -> bool:
+        return chave in _INDICE
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(SCENARIO_KEYS)
+
+    def __len__(self) -> int:
+        return len(SCENARIO_KEYS)
+
+    def __reduce__(self):
+        return (ScenarioResult, self._valores)
+
+    def __repr__(self) -> str:
+        return f"ScenarioResult({', '.join(f'{k}={v!r}' for k, v in zip(SCENARIO_KEYS, self._valores))})"
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(zip(SCENARIO_KEYS, self._valores))
+
+for _chave, _i in _INDICE.items():
+    setattr(ScenarioResult, _chave, property(lambda self, _i=_i: self._valores[_i]))
 
 def format_currency_brl(value: float) -> str:
     return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
-def compute_scenario(faturamento: float, despesas: float, pro_labore: float, dividendos_total: float, num_pf: int, aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10) -> Dict[str, float]:
+_LIMITE_EXATO = 2.0 ** 53 / 100
+
+def _centavos_exatos(valores: np.ndarray) -> np.ndarray:
+    # Arredonda |v| * 100 exatamente como o format ",.2f" (meio para par sobre o valor binário exato):
+    # só os empates aparentes em ,5 dependem do erro do produto, obtido pelo algoritmo de Dekker
+    produto = valores * 100.0
+    centavos = np.rint(produto)
+    diferenca = produto - centavos
+    empate = np.flatnonzero(np.abs(diferenca) == 0.5)
+    if empate.size:
+        v = valores[empate]
+        c = 134217729.0 * v
+        alto = c - (c - v)
+        erro = (alto * 100.0 - produto[empate]) + (v - alto) * 100.0
+        centavos[empate] += np.where(diferenca[empate] > 0, erro > 0, -1.0 * (erro < 0))
+    return centavos.astype(np.int64)
+
+def _tabela(textos) -> np.ndarray:
+    # Cada texto de até 4 caracteres ASCII como 4 bytes (completados com NUL) num uint32
+    return np.frombuffer(b"".join(t.encode().ljust(4, b"\0") for t in textos), dtype=np.uint32)
+
+_GRUPOS = _tabela(f".{i:03d}" for i in range(1000))
+_CENTAVOS = _tabela(f",{i:02d}" for i in range(100))
+# Valores por bloco: o buffer de bytes de um bloco cabe no cache
+_BLOCO = 16_384
+
+def _tamanho(digitos: int) -> int:
+    return digitos + (digitos - 1) // 3 + 3
+
+def _formatar_bloco(validos: np.ndarray, negativo: np.ndarray, codigos: np.ndarray, d_max: int) -> None:
+    # Cada linha de um buffer de bytes recebe o número alinhado à direita: centavos (",cc") e grupos de
+    # milhar (".ddd") vêm prontos de tabelas, 4 bytes por escrita. A linha de saída é a janela do buffer
+    # que começa no prefixo, copiada e alargada para code points de uma vez
+    n = validos.size
+    centavos = _centavos_exatos(validos)
+    inteiro = centavos // 100
+    fracao = centavos - inteiro * 100
+    # Inteiros de 32 bits quando cabem: a divisão por constante fica bem mais barata
+    tipo = np.uint32 if d_max <= 9 else np.uint64
+    inteiro = inteiro.astype(tipo)
+    largura = codigos.shape[1]
+    grupos = -(-d_max // 3)
+    fim = 4 * grupos + 4
+    S = fim + largura + 1
+    B = np.zeros(n * S, dtype=np.uint8)
+    campo = lambda col: np.ndarray((n,), dtype=np.uint32, buffer=B, offset=col, strides=(S,))
+    campo(fim)[...] = _CENTAVOS.take(fracao)
+    resto = inteiro
+    for col in range(fim - 4, 4, -4):
+        quociente = resto // 1000
+        campo(col)[...] = _GRUPOS.take(resto - quociente * 1000)
+        resto = quociente
+    campo(4)[...] = _GRUPOS.take(resto)
+    # O primeiro dígito fica antes dos centavos tantas posições quantos os dígitos e pontos do número;
+    # o grupo mais alto sai com zeros à esquerda, que ficam fora da janela
+    inicio = np.arange(fim - 1, n * S, S)
+    for k in range(1, d_max):
+        maior = inteiro >= tipo(10 ** k)
+        inicio -= maior
+        if k % 3 == 0:
+            inicio -= maior
+    B[inicio - 1] = ord("-")
+    inicio -= negativo
+    B[inicio - 3] = ord("R")
+    B[inicio - 2] = ord("$")
+    B[inicio - 1] = ord(" ")
+    janelas = np.ndarray((n * S - largura + 1,), dtype=f"V{largura}", buffer=B, strides=(1,))
+    np.copyto(codigos, janelas[inicio - 3].view(np.uint8).reshape(n, largura), casting="unsafe")
+
+def format_currency_brl_array(values) -> np.ndarray:
+    # Versão em lote de format_currency_brl, com o mesmo texto para cada valor
+    valores = np.asarray(values, dtype=float).ravel()
+    absolutos = np.abs(valores)
+    # Fora do limite ficam também NaN e infinitos
+    exato = absolutos < _LIMITE_EXATO
+    todos_exatos = bool(exato.all())
+    validos = absolutos if todos_exatos else np.where(exato, absolutos, 0.0)
+    negativo = np.signbit(valores) & exato
+    # Largura do texto mais longo: o do maior valor ou, com o "-", o do maior negativo
+    maiores = np.array([validos.max(initial=0.0), validos.max(initial=-1.0, where=negativo)])
+    d_max, d_negativo = (len(str(c // 100)) for c in _centavos_exatos(np.maximum(maiores, 0.0)).tolist())
+    largura = max(_tamanho(d_max), _tamanho(d_negativo) + 1 if maiores[1] >= 0 else 0) + 3
+    textos = np.empty(valores.size, dtype=f"U{largura}")
+    codigos = textos.view(np.uint32).reshape(valores.size, largura)
+    for i in range(0, valores.size, _BLOCO):
+        bloco = slice(i, i + _BLOCO)
+        _formatar_bloco(validos[bloco], negativo[bloco], codigos[bloco], d_max)
+    if not todos_exatos:
+        resto_textos = [format_currency_brl(v) for v in valores[~exato]]
+        textos = textos.astype(f"U{max([largura] + [len(t) for t in resto_textos])}")
+        textos[~exato] = resto_textos
+    return textos.reshape(np.shape(values))
+
+def compute_scenario(faturamento: float, despesas: float, pro_labore: float, dividendos_total: float, num_pf: int, aliquota_irpj_csll: float = 0.34, limite_dividendos_pf: float = 50_000.0, aliquota_irrf_dividendos: float = 0.10) -> ScenarioResult:
     faturamento = max(0, faturamento)
     despesas = max(0, despesas)
     pro_labore = max(0, pro_labore)
@@ -21,22 +164,23 @@ def compute_scenario(faturamento: float, despesas: float, pro_labore: float, div
     carga_efetiva = (total_impostos / faturamento * 100) if faturamento > 0 else 0
     caixa_apos_impostos = faturamento - despesas - pro_labore - total_impostos
     lucro_apos_irpj_csll = lucro_antes_impostos - irpj_csll
-    return {"faturamento": faturamento, "despesas": despesas, "pro_labore": pro_labore, "lucro_antes_impostos": lucro_antes_impostos, "irpj_csll": irpj_csll, "lucro_apos_irpj_csll": lucro_apos_irpj_csll, "dividendos_total": dividendos_total, "dividendos_por_pf": dividendos_por_pf, "estourou_gatilho": estourou_gatilho, "irrf_dividendos": irrf_dividendos, "total_impostos": total_impostos, "carga_efetiva": carga_efetiva, "caixa_apos_impostos": caixa_apos_impostos}
+    return ScenarioResult(faturamento, despesas, pro_labore, lucro_antes_impostos, irpj_csll, lucro_apos_irpj_csll, dividendos_total, dividendos_por_pf, estourou_gatilho, irrf_dividendos, total_impostos, carga_efetiva, caixa_apos_impostos)
 
 def validate_inputs(faturamento: float, despesas: float, pro_labore: float, dividendos_total: float) -> Tuple[bool, str]:
+    # Versão de um cenário; para colunas inteiras, validate_inputs_batch com os mesmos códigos e textos
     alertas = []
     if any(v < 0 for v in [faturamento, despesas, pro_labore, dividendos_total]):
-        return False, "❌ Erro: Valores não podem ser negativos."
+        return False, MENSAGENS_ALERTA[ALERTA_NEGATIVO]
     if faturamento == 0:
-        return False, "❌ Erro: Faturamento deve ser maior que zero."
+        return False, MENSAGENS_ALERTA[ALERTA_FATURAMENTO_ZERO]
     if despesas + pro_labore > faturamento:
-        alertas.append("⚠️ Atenção: Despesas + Pró-labore excedem o faturamento (lucro negativo).")
+        alertas.append(MENSAGENS_ALERTA[ALERTA_DESPESAS_EXCEDEM])
     lucro_estimado = max(0, faturamento - despesas - pro_labore)
     lucro_apos_ir_estimado = lucro_estimado * 0.66
     if dividendos_total > lucro_apos_ir_estimado * 1.1:
-        alertas.append("⚠️ Atenção: Dividendos informados excedem o lucro líquido estimado. Verifique os valores.")
+        alertas.append(MENSAGENS_ALERTA[ALERTA_DIVIDENDOS_EXCEDEM])
     if faturamento > 0 and pro_labore / faturamento < 0.05:
-        alertas.append("⚠️ Alerta: Pró-labore muito baixo em relação ao faturamento. Isso pode gerar questionamentos fiscais.")
+        alertas.append(MENSAGENS_ALERTA[ALERTA_PRO_LABORE_BAIXO])
     mensagem = "\n".join(alertas) if alertas else ""
     return True, mensagem
 
@@ -58,6 +202,20 @@ def generate_summary_text(cenario_atual: Dict[str, float], cenario_otimizado: Di
         texto += "**📊 Impacto:** Ambos os cenários têm carga tributária equivalente.\n"
     return texto
 
-def create_comparison_table(cenario_atual: Dict[str, float], cenario_otimizado: Dict[str, float]) -> pd.DataFrame:
-    data = {"Métrica": ["Faturamento Mensal", "Despesas Operacionais", "Pró-labore", "Lucro Antes de Impostos", "IRPJ + CSLL (34%)", "Lucro Após IRPJ/CSLL", "Dividendos Distribuídos", "Dividendos por PF", "IRRF sobre Dividendos (10%)", "TOTAL IMPOSTOS", "Carga Efetiva (%)", "Caixa Após Impostos"], "Cenário Atual": [format_currency_brl(cenario_atual["faturamento"]), format_currency_brl(cenario_atual["despesas"]), format_currency_brl(cenario_atual["pro_labore"]), format_currency_brl(cenario_atual["lucro_antes_impostos"]), format_currency_brl(cenario_atual["irpj_csll"]), format_currency_brl(cenario_atual["lucro_apos_irpj_csll"]), format_currency_brl(cenario_atual["dividendos_total"]), format_currency_brl(cenario_atual["dividendos_por_pf"]), format_currency_brl(cenario_atual["irrf_dividendos"]), format_currency_brl(cenario_atual["total_impostos"]), f"{cenario_atual['carga_efetiva']:.2f}%", format_currency_brl(cenario_atual["caixa_apos_impostos"])], "Cenário Otimizado": [format_currency_brl(cenario_otimizado["faturamento"]), format_currency_brl(cenario_otimizado["despesas"]), format_currency_brl(cenario_otimizado["pro_labore"]), format_currency_brl(cenario_otimizado["lucro_antes_impostos"]), format_currency_brl(cenario_otimizado["irpj_csll"]), format_currency_brl(cenario_otimizado["lucro_apos_irpj_csll"]), format_currency_brl(cenario_otimizado["dividendos_total"]), format_currency_brl(cenario_otimizado["dividendos_por_pf"]), format_currency_brl(cenario_otimizado["irrf_dividendos"]), format_currency_brl(cenario_otimizado["total_impostos"]), f"{cenario_otimizado['carga_efetiva']:.2f}%", format_currency_brl(cenario_otimizado["caixa_apos_impostos"])]}
+COMPARISON_METRICS = ["Faturamento Mensal", "Despesas Operacionais", "Pró-labore", "Lucro Antes de Impostos", "IRPJ + CSLL (34%)", "Lucro Após IRPJ/CSLL", "Dividendos Distribuídos", "Dividendos por PF", "IRRF sobre Dividendos (10%)", "TOTAL IMPOSTOS", "Carga Efetiva (%)", "Caixa Após Impostos"]
+
+COMPARISON_CURRENCY_KEYS = ["faturamento", "despesas", "pro_labore", "lucro_antes_impostos", "irpj_csll", "lucro_apos_irpj_csll", "dividendos_total", "dividendos_por_pf", "irrf_dividendos", "total_impostos", "caixa_apos_impostos"]
+
+def comparison_columns(*cenarios: Dict[str, float]) -> List[List[str]]:
+    # Formata os valores monetários de todos os cenários numa única chamada em lote
+    textos = format_currency_brl_array([[c[k] for k in COMPARISON_CURRENCY_KEYS] for c in cenarios]).tolist()
+    return [t[:10] + [f"{c['carga_efetiva']:.2f}%"] + t[10:] for c, t in zip(cenarios, textos)]
+
+def comparison_column(cenario: Dict[str, float]) -> List[str]:
+    return comparison_columns(cenario)[0]
+
+def create_comparison_table(cenario_atual: Dict[str, float], cenario_otimizado: Dict[str, float]) -> "pd.DataFrame":
+    import pandas as pd
+    coluna_atual, coluna_otimizada = comparison_columns(cenario_atual, cenario_otimizado)
+    data = {"Métrica": COMPARISON_METRICS, "Cenário Atual": coluna_atual, "Cenário Otimizado": coluna_otimizada}
     return pd.DataFrame(data)